@@ -44,11 +44,11 @@ class TrendRecord(BaseEngineRecord):
 # ---------------------------
 
 class CashFlowRecord(BaseEngineRecord):
-    operating_cf: float
-    investing_cf: float
-    financing_cf: float
-    cf_pattern: str       # "healthy", "strained", "burning"
-    cf_risk_flag: Optional[str]
+    operating_cf: Optional[float]   # None without a prior-year balance sheet
+    investing_cf: Optional[float]
+    financing_cf: Optional[float]
+    cf_pattern: str       # "healthy", "strained", "burning", "insufficient_history"
+    cf_risk_flag: Optional[str]     # "negative_operating_cf", "financing_dependent", "negative_free_cash_flow", None
 
 
 # ---------------------------
@@ -1,13 +1,38 @@
-from openai import OpenAI
+import threading
 from afap_ai_engine.prompt_builder import build_afap_prompt
+from afap_ai_engine.stream_parser import SectionStreamParser, parse_sections
 import unicodedata
 
-client = OpenAI()
+# Default client, created on first use (an OpenAI() unless set here or
+# a client is passed per call)
+client = None
+_client_lock = threading.Lock()
+
+
+def get_client(override=None):
+    """
+    The client to call: override if given, else the module default.
+    Anything with responses.create(model, input, stream=False) works,
+    e.g. afap_ai_engine.responses_client.ResponsesHTTPClient.
+    """
+    global client
+    if override is not None:
+        return override
+    with _client_lock:
+        if client is None:
+            from openai import OpenAI
+            client = OpenAI()
+        return client
 
 
 def afap_llm_interpretation(
     structured_records,
     model="gpt-5-mini",
+    on_result=None,
+    stream=False,
+    on_section=None,
+    client=None,
+    telemetry=None
 ):
     """
     Wraps OpenAI API call for AFAP interpretation.
@@ -26,10 +51,25 @@ def afap_llm_interpretation(
         }
     }
 
+    on_result, if given, is called with each interpretation as soon as
+    it is produced so callers can persist progress incrementally.
+
+    With stream=True the response is streamed and parsed into the
+    prompt's output-schema sections as tokens arrive; on_section, if
+    given, receives each section as soon as it is complete:
+    {"Company", "Year", "analysis_profile", "section", "text"}.
+    Every interpretation carries the parsed "sections" dict.
+
+    client overrides the default OpenAI client (see get_client).
+
+    telemetry, an afap_ai_engine.telemetry.LLMTelemetry, receives one
+    span per call: tokens, latency, time to first token and attempts.
+
     Returns:
         List[dict] — one interpretation per record
     """
 
+    client = get_client(client)
     interpretations = []
 
     for record in structured_records:
@@ -42,28 +82,92 @@ def afap_llm_interpretation(
         # 🔑 Unified prompt builder handles ALL interpretation logic
         messages = build_afap_prompt(record)
 
-        response = client.responses.create(
-            model=model,
-            input=messages
-        )
+        timer = telemetry.start_call(record, model, stream) if telemetry is not None else None
+        try:
+            if stream:
+                raw_text, sections, usage, attempts = _stream_interpretation(
+                    client, record, messages, model, on_section, timer
+                )
+            else:
+                response = client.responses.create(
+                    model=model,
+                    input=messages
+                )
+                raw_text = response.output_text
+                sections = parse_sections(raw_text)
+                usage, attempts = getattr(response, "usage", None), getattr(response, "attempts", None)
+        except Exception as exc:
+            if timer is not None:
+                timer.finish(attempts=getattr(exc, "attempts", None), error=exc)
+            raise
+
+        if timer is not None:
+            timer.finish(usage, attempts)
 
         # -------------------------------
         # CLEAN AND NORMALIZE OUTPUT
         # -------------------------------
-        raw_text = response.output_text
-        clean_text = unicodedata.normalize("NFKD", raw_text)
-        clean_text = clean_text.encode("utf-8", "ignore").decode("utf-8")
+        clean_text = _clean_text(raw_text)
 
         # -------------------------------
         # APPEND INTERPRETATION
         # -------------------------------
-        interpretations.append({
+        interpretation = {
             "Company": record.get("Company"),
             "Year": record.get("Year"),
             "analysis_profile": record.get("analysis_profile"),
             "temporal_mode": record.get("temporal_mode"),
             "context_used": record.get("context"),
-            "interpretation": clean_text
-        })
+            "interpretation": clean_text,
+            "sections": {name: _clean_text(text) for name, text in sections.items()}
+        }
+        interpretations.append(interpretation)
+
+        if on_result is not None:
+            on_result(interpretation)
+
+    return interpretations
+
+
+def _clean_text(raw_text):
+    clean_text = unicodedata.normalize("NFKD", raw_text)
+    return clean_text.encode("utf-8", "ignore").decode("utf-8")
+
+
+def _stream_interpretation(client, record, messages, model, on_section=None, timer=None):
+    """
+    Streams one response, emitting sections as they complete.
+    Returns (raw_text, sections, usage, attempts).
+    """
+
+    def emit(name, text):
+        if on_section is not None:
+            on_section({
+                "Company": record.get("Company"),
+                "Year": record.get("Year"),
+                "analysis_profile": record.get("analysis_profile"),
+                "section": name,
+                "text": _clean_text(text)
+            })
+
+    parser = SectionStreamParser(on_section=emit)
+
+    events = client.responses.create(
+        model=model,
+        input=messages,
+        stream=True
+    )
+    usage = None
+    for event in events:
+        if event.type == "response.output_text.delta":
+            if timer is not None:
+                timer.first_token()
+            parser.feed(event.delta)
+        elif event.type == "response.completed":
+            response = getattr(event, "response", None)
+            usage = response.get("usage") if isinstance(response, dict) else getattr(response, "usage", None)
+        elif event.type in ("response.failed", "error"):
+            raise RuntimeError(f"Streaming interpretation failed for {record.get('Company')} {record.get('Year')}.")
 
-    return interpretations
\ No newline at end of file
+    sections = parser.close()
+    return parser.text, sections, usage or getattr(events, "usage", None), getattr(events, "attempts", None)
@@ -0,0 +1,342 @@
+# afap_ai_engine/fake_stream_server.py
+
+import itertools
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ------------------------------------------------------------------
+# Local Fake Responses Endpoint
+# ------------------------------------------------------------------
+# Serves POST /v1/responses on 127.0.0.1 in a background thread. With
+# "stream": true the reply is a server-sent event stream of Responses
+# API events (response.created, response.output_text.delta ...,
+# response.completed); otherwise a single JSON response.
+#
+# Point the interpreter at it without network access:
+#   OPENAI_BASE_URL=<server.base_url> OPENAI_API_KEY=local
+# or pass afap_ai_engine.responses_client.ResponsesHTTPClient(server.base_url)
+# as the interpreter's client.
+#
+# For load tests it can also behave like a loaded API: a sampled
+# latency before the first byte, injected 429 / 5xx errors, and a
+# token-per-second budget that answers 429 with Retry-After once spent.
+# ------------------------------------------------------------------
+
+DEFAULT_REPORT = (
+    "- summary: Liquidity was weak and leverage elevated in the reporting year.\n"
+    "- key_risks:\n"
+    "  1. Liquidity: current ratio below 1.0 limited short-term coverage.\n"
+    "  2. Solvency: interest coverage below 1.5 constrained debt service.\n"
+    "- period_specific_actions:\n"
+    "  - Refinancing short-term obligations was appropriate at the time.\n"
+    "- structural_long_term_implications: Persistent thin coverage indicated structural strain.\n"
+    "- contextual_interpretation: Interpretation was based solely on financial metrics.\n"
+    "- confidence_notes: Metric scope was limited to the provided ratios.\n"
+)
+
+
+# ------------------------------------------------------------------
+# Simulated Load Behaviour
+# ------------------------------------------------------------------
+
+def estimate_tokens(text):
+    """
+    Rough token count (about 4 characters per token).
+    """
+    return max(1, len(text) // 4)
+
+
+def latency_sampler(spec):
+    """
+    Turns a latency spec into a function rng -> seconds:
+      None or a number     fixed latency (None = 0)
+      ("uniform", lo, hi)
+      ("exponential", mean)
+      ("lognormal", median, sigma)
+      a callable           called with the rng
+    """
+    if spec is None or isinstance(spec, (int, float)):
+        seconds = float(spec or 0.0)
+        return lambda rng: seconds
+    if callable(spec):
+        return spec
+
+    kind, *params = spec
+    if kind == "uniform":
+        low, high = params
+        return lambda rng: rng.uniform(low, high)
+    if kind == "exponential":
+        (mean,) = params
+        return lambda rng: rng.expovariate(1.0 / mean)
+    if kind == "lognormal":
+        median, sigma = params
+        return lambda rng: rng.lognormvariate(math.log(median), sigma)
+    raise ValueError(f"Unknown latency distribution: {kind}")
+
+
+class TokenBucket:
+    """
+    tokens_per_second budget with burst_seconds worth of capacity.
+    take() returns 0 if the tokens were available, else the seconds
+    until they would be (nothing is taken then).
+    """
+
+    def __init__(self, tokens_per_second, burst_seconds=1.0):
+        self.rate = float(tokens_per_second)
+        self.capacity = self.rate * burst_seconds
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, tokens):
+        tokens = min(tokens, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0.0
+            return (tokens - self.tokens) / self.rate
+
+
+# ------------------------------------------------------------------
+# Server
+# ------------------------------------------------------------------
+
+class FakeResponsesServer:
+    """
+    reply is the report text, or a callable taking the request body and
+    returning it. Streamed replies are cut into chunk_chars deltas sent
+    delta_delay seconds apart.
+
+    latency (see latency_sampler) is slept before each reply starts.
+    error_rate_429 / error_rate_5xx are the chances a request fails with
+    429 or 500/503 before any work; tokens_per_second caps the input +
+    output tokens served, answering 429 with Retry-After beyond it.
+    seed makes the latency and error draws reproducible.
+
+    stats counts requests by outcome ("ok", "429", "500", "503",
+    "rate_limited") plus "tokens" served.
+    """
+
+    def __init__(
+        self,
+        reply=DEFAULT_REPORT,
+        chunk_chars=16,
+        delta_delay=0.0,
+        port=0,
+        latency=None,
+        error_rate_429=0.0,
+        error_rate_5xx=0.0,
+        tokens_per_second=None,
+        seed=0
+    ):
+        self.reply = reply
+        self.chunk_chars = chunk_chars
+        self.delta_delay = delta_delay
+        self.sample_latency = latency_sampler(latency)
+        self.error_rate_429 = error_rate_429
+        self.error_rate_5xx = error_rate_5xx
+        self.token_bucket = TokenBucket(tokens_per_second) if tokens_per_second else None
+        self.requests = []
+        self.stats = {"tokens": 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), _handler_for(self))
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reply_text(self, body):
+        return self.reply(body) if callable(self.reply) else self.reply
+
+    def draw(self):
+        """
+        One request's (injected failure or None, latency seconds).
+        """
+        with self._lock:
+            roll = self._rng.random()
+            latency = max(0.0, self.sample_latency(self._rng))
+            server_error = self._rng.choice((500, 503))
+
+        if roll < self.error_rate_429:
+            return 429, latency
+        if roll < self.error_rate_429 + self.error_rate_5xx:
+            return server_error, latency
+        return None, latency
+
+    def count(self, outcome, tokens=0):
+        with self._lock:
+            self.stats[outcome] = self.stats.get(outcome, 0) + 1
+            self.stats["tokens"] += tokens
+
+
+# ------------------------------------------------------------------
+# Responses API Payloads
+# ------------------------------------------------------------------
+
+def _response_object(response_id, model, text, status, usage=None):
+    content = [{"type": "output_text", "text": text, "annotations": []}] if text is not None else []
+    return {
+        "id": response_id,
+        "object": "response",
+        "created_at": int(time.time()),
+        "status": status,
+        "model": model,
+        "output": [{
+            "type": "message",
+            "id": f"msg_{response_id}",
+            "status": status,
+            "role": "assistant",
+            "content": content
+        }],
+        "parallel_tool_calls": False,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": usage
+    }
+
+
+def _usage(input_tokens, output_tokens):
+    return {
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": input_tokens + output_tokens
+    }
+
+
+def _input_text(body):
+    messages = body.get("input") or []
+    if isinstance(messages, str):
+        return messages
+    return "".join(str(m.get("content", "")) for m in messages if isinstance(m, dict))
+
+
+def _handler_for(server):
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/v1/responses":
+                self.send_error(404)
+                return
+
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            server.requests.append(body)
+
+            # Injected failures answer before any work is done
+            failure, latency = server.draw()
+            if failure is not None:
+                server.count(str(failure))
+                self._send_error(failure, retry_after=0.05 if failure == 429 else None)
+                return
+
+            text = server.reply_text(body)
+            usage = _usage(estimate_tokens(_input_text(body)), estimate_tokens(text))
+
+            if server.token_bucket is not None:
+                wait = server.token_bucket.take(usage["total_tokens"])
+                if wait:
+                    server.count("rate_limited")
+                    self._send_error(429, retry_after=wait)
+                    return
+
+            # Time to first byte
+            if latency:
+                time.sleep(latency)
+
+            response_id = f"resp_{uuid.uuid4().hex[:12]}"
+            model = body.get("model", "fake")
+
+            if body.get("stream"):
+                self._stream(response_id, model, text, usage)
+            else:
+                self._send_json(_response_object(response_id, model, text, "completed", usage))
+            server.count("ok", usage["total_tokens"])
+
+        def _send_json(self, payload, status=200, headers=None):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_error(self, status, retry_after=None):
+            error_type = "rate_limit_error" if status == 429 else "server_error"
+            headers = {}
+            if retry_after is not None:
+                headers["Retry-After"] = str(math.ceil(retry_after))
+                headers["retry-after-ms"] = str(int(retry_after * 1000))
+            self._send_json(
+                {"error": {"message": f"Simulated {status}", "type": error_type, "code": status}},
+                status,
+                headers
+            )
+
+        def _stream(self, response_id, model, text, usage=None):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+
+            sequence = itertools.count()
+
+            def send(event_type, payload):
+                payload = {"type": event_type, "sequence_number": next(sequence), **payload}
+                self.wfile.write(f"event: {event_type}\ndata: {json.dumps(payload)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            send("response.created", {"response": _response_object(response_id, model, None, "in_progress")})
+
+            for start in range(0, len(text), server.chunk_chars):
+                if server.delta_delay:
+                    time.sleep(server.delta_delay)
+                send("response.output_text.delta", {
+                    "item_id": f"msg_{response_id}",
+                    "output_index": 0,
+                    "content_index": 0,
+                    "delta": text[start:start + server.chunk_chars]
+                })
+
+            send("response.output_text.done", {
+                "item_id": f"msg_{response_id}",
+                "output_index": 0,
+                "content_index": 0,
+                "text": text
+            })
+            send("response.completed", {"response": _response_object(response_id, model, text, "completed", usage)})
+
+    return Handler
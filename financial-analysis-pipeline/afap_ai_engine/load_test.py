@@ -0,0 +1,108 @@
+# afap_ai_engine/load_test.py
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from afap_ai_engine.ai_interpreter import afap_llm_interpretation
+from afap_ai_engine.telemetry import LLMTelemetry, percentile_summary
+
+# ------------------------------------------------------------------
+# Interpretation Stage Load Test
+# ------------------------------------------------------------------
+# Drives afap_llm_interpretation with a fixed number of concurrent
+# callers (one record per call) against any injected client, typically
+# a ResponsesHTTPClient pointed at a FakeResponsesServer, and reports
+# throughput, latency percentiles and how errors were recovered.
+# ------------------------------------------------------------------
+
+def run_load_test(records, client, concurrency=8, model="gpt-5-mini", stream=False, server=None):
+    """
+    Interprets every record with concurrency threads and returns a report:
+      requests / succeeded / failed, wall_seconds, throughput_rps,
+      latency_ms (p50 / p95 / p99 / mean / max over succeeded calls),
+      errors (final exception type -> count),
+      client (the client's retry stats, if it keeps any),
+      server (the server's stats, if given) and tokens_per_second,
+      llm_telemetry (the interpreter's per-call telemetry summary).
+    """
+    telemetry = LLMTelemetry()
+
+    def call(record):
+        start = time.perf_counter()
+        try:
+            afap_llm_interpretation([dict(record)], model=model, stream=stream, client=client, telemetry=telemetry)
+        except Exception as exc:
+            return time.perf_counter() - start, type(exc).__name__
+        return time.perf_counter() - start, None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(call, records))
+    wall = time.perf_counter() - start
+
+    latencies = np.array([seconds for seconds, error in results if error is None]) * 1000
+    errors = {}
+    for _, error in results:
+        if error is not None:
+            errors[error] = errors.get(error, 0) + 1
+
+    report = {
+        "requests": len(results),
+        "succeeded": len(latencies),
+        "failed": len(results) - len(latencies),
+        "concurrency": concurrency,
+        "wall_seconds": wall,
+        "throughput_rps": len(latencies) / wall if wall else 0.0,
+        "latency_ms": percentile_summary(latencies),
+        "errors": errors,
+        "llm_telemetry": telemetry.summary()
+    }
+
+    stats = getattr(client, "stats", None)
+    if stats is not None:
+        report["client"] = _copy_stats(stats)
+
+    if server is not None:
+        report["server"] = _copy_stats(server.stats)
+        report["tokens_per_second"] = server.stats.get("tokens", 0) / wall if wall else 0.0
+
+    return report
+
+
+def _copy_stats(stats):
+    return {k: dict(v) if isinstance(v, dict) else v for k, v in stats.items()}
+
+
+def format_report(report, label=""):
+    """
+    One-paragraph text summary of a run_load_test report.
+    """
+    lat = report["latency_ms"]
+    lines = [
+        f"{label}{report['succeeded']}/{report['requests']} ok at concurrency {report['concurrency']} "
+        f"in {report['wall_seconds']:.2f} s ({report['throughput_rps']:.1f} req/s"
+        + (f", {report['tokens_per_second']:,.0f} tok/s)" if "tokens_per_second" in report else ")")
+    ]
+    if lat["p50"] is not None:
+        lines.append(
+            f"  latency ms  p50 {lat['p50']:.0f}  p95 {lat['p95']:.0f}  p99 {lat['p99']:.0f}  max {lat['max']:.0f}"
+        )
+
+    telemetry = report["llm_telemetry"]
+    ttft = telemetry["time_to_first_token_ms"]
+    lines.append(
+        f"  tokens in {telemetry['input_tokens']:,}  out {telemetry['output_tokens']:,}"
+        + (f"  first token p50 {ttft['p50']:.0f} ms  p95 {ttft['p95']:.0f} ms" if ttft["p50"] is not None else "")
+    )
+
+    client = report.get("client")
+    if client is not None:
+        lines.append(
+            f"  retries {client['retries']}  recovered {client['recovered']}  gave up {client['failed']}  "
+            f"errors seen {client['errors'] or '{}'}"
+        )
+    if report["errors"]:
+        lines.append(f"  failed calls {report['errors']}")
+    return "\n".join(lines)
@@ -1,5 +1,24 @@
 from datetime import datetime
 
+# Sub-annual (TTM) runs key "Year" by period, year * 100 + quarter / month,
+# and their records carry the ttm_frequency ("Q" or "M")
+PERIOD_KEY_BASE = 100
+
+
+def analysis_period(structured_record: dict) -> tuple[int, str]:
+    """
+    (calendar year, display label) of a record's "Year": the year itself,
+    or for TTM records the window's end, e.g. "TTM to 2023-Q1".
+    """
+    year = int(structured_record["Year"])
+    frequency = structured_record.get("ttm_frequency")
+    if frequency is None:
+        return year, str(year)
+
+    calendar_year, sub_period = divmod(year, PERIOD_KEY_BASE)
+    end = f"Q{sub_period}" if frequency == "Q" else f"{sub_period:02d}"
+    return calendar_year, f"TTM to {calendar_year}-{end}"
+
 
 def build_afap_prompt(structured_record: dict) -> list[dict]:
     """
@@ -12,10 +31,11 @@ def build_afap_prompt(structured_record: dict) -> list[dict]:
     composite = structured_record.get("composite_risk", {})
     profile = structured_record.get("analysis_profile", "full_diagnostic")
     context = structured_record.get("context", {})
+    peer_percentiles = structured_record.get("peer_percentiles") or {}
 
-    analysis_year = structured_record["Year"]
+    analysis_calendar_year, analysis_year = analysis_period(structured_record)
     current_year = datetime.now().year
-    years_gap = current_year - analysis_year
+    years_gap = current_year - analysis_calendar_year
 
     temporal_mode = structured_record.get("temporal_mode")
 
@@ -83,6 +103,18 @@ def build_afap_prompt(structured_record: dict) -> list[dict]:
             "Do not introduce macroeconomic, industry, or geopolitical assumptions."
         )
 
+    # ------------------------------
+    # PEER BENCHMARK BLOCK (OPTIONAL)
+    # ------------------------------
+    if peer_percentiles:
+        peer_block = (
+            "PEER PERCENTILES (0-100, rank among same-year peers):\n" +
+            "\n".join([f"- {k}: {v:.1f}" for k, v in peer_percentiles.items() if v is not None]) +
+            "\n\n"
+        )
+    else:
+        peer_block = ""
+
     # ------------------------------
     # SYSTEM MESSAGE
     # ------------------------------
@@ -163,7 +195,8 @@ def build_afap_prompt(structured_record: dict) -> list[dict]:
             "RATIOS:\n" +
             "\n".join([f"- {k}: {v}" for k, v in ratios.items()]) + "\n\n"
             "COMPOSITE RISK:\n" +
-            "\n".join([f"- {k}: {v}" for k, v in composite.items()]) + "\n\n"
+            "\n".join([f"- {k}: {v}" for k, v in composite.items()]) + "\n\n" +
+            peer_block +
             "RULES:\n"
             "- Follow the output schema exactly\n"
             "- Tie every risk to explicit metric evidence\n"
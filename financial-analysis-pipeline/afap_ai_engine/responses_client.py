@@ -0,0 +1,182 @@
+# afap_ai_engine/responses_client.py
+
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+
+# ------------------------------------------------------------------
+# Minimal Responses API Client
+# ------------------------------------------------------------------
+# The interpreter only needs client.responses.create(model, input,
+# stream=False): a response with .output_text, or (with stream=True) an
+# iterable of events with .type / .delta. Any object providing that can
+# be injected (see ai_interpreter.afap_llm_interpretation).
+#
+# ResponsesHTTPClient provides it over plain urllib (no openai package),
+# with retries on 429 / 5xx / connection errors, so the interpretation
+# stage can run against fake_stream_server.FakeResponsesServer offline.
+# ------------------------------------------------------------------
+
+RETRY_STATUSES = (408, 409, 429, 500, 502, 503, 504)
+
+
+class LLMRequestError(RuntimeError):
+    """
+    A Responses request that failed for good (status None: no response)
+    after attempts tries.
+    """
+
+    def __init__(self, message, status=None, attempts=None):
+        super().__init__(message)
+        self.status = status
+        self.attempts = attempts
+
+
+class ResponsesHTTPClient:
+    """
+    client.responses.create(...) against base_url (e.g. ".../v1").
+
+    Retryable failures are retried up to max_retries times, sleeping the
+    server's Retry-After if given, else backoff * 2**attempt (capped at
+    backoff_max). Both get random jitter so throttled callers do not all
+    retry at the same instant.
+
+    stats (thread-safe) counts "calls", "attempts", "retries", "failed",
+    "recovered" (calls that succeeded after a retry) and "errors" by
+    status. Responses carry .attempts and .usage.
+    """
+
+    def __init__(self, base_url, api_key="local", timeout=60.0, max_retries=3, backoff=0.25, backoff_max=8.0):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.responses = self
+        self.stats = {"calls": 0, "attempts": 0, "retries": 0, "failed": 0, "recovered": 0, "errors": {}}
+        self._lock = threading.Lock()
+
+    def create(self, model, input, stream=False):
+        payload = json.dumps({"model": model, "input": input, "stream": bool(stream)}).encode("utf-8")
+        response, attempts = self._send(payload)
+
+        if stream:
+            return _EventStream(response, attempts)
+
+        with response:
+            body = json.load(response)
+        return SimpleNamespace(
+            id=body.get("id"),
+            output_text=_output_text(body),
+            usage=body.get("usage"),
+            attempts=attempts
+        )
+
+    # ------------------------------------------------------------------
+    # Retry Loop
+    # ------------------------------------------------------------------
+
+    def _send(self, payload):
+        self._count("calls")
+
+        for attempt in range(self.max_retries + 1):
+            self._count("attempts")
+            request = urllib.request.Request(
+                f"{self.base_url}/responses",
+                data=payload,
+                headers={"Content-Type": "application/json", "Authorization": f"Bearer {self.api_key}"}
+            )
+            try:
+                response = urllib.request.urlopen(request, timeout=self.timeout)
+            except urllib.error.HTTPError as exc:
+                status, retry_after = exc.code, _retry_after(exc.headers)
+                exc.close()
+            except (urllib.error.URLError, ConnectionError, TimeoutError) as exc:
+                status, retry_after = None, None
+                error = exc
+            else:
+                if attempt:
+                    self._count("recovered")
+                return response, attempt + 1
+
+            self._count_error(status)
+            retryable = status is None or status in RETRY_STATUSES
+            if not retryable or attempt == self.max_retries:
+                self._count("failed")
+                detail = f"status {status}" if status is not None else str(error)
+                raise LLMRequestError(
+                    f"Responses request failed after {attempt + 1} attempt(s): {detail}", status, attempt + 1
+                )
+
+            self._count("retries")
+            time.sleep(self._delay(attempt, retry_after))
+
+    def _delay(self, attempt, retry_after):
+        backoff = min(self.backoff_max, self.backoff * 2 ** attempt)
+        if retry_after is not None:
+            return retry_after + random.uniform(0, backoff)
+        return backoff * random.uniform(0.5, 1.0)
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _count_error(self, status):
+        key = str(status) if status is not None else "connection"
+        with self._lock:
+            self.stats["errors"][key] = self.stats["errors"].get(key, 0) + 1
+
+
+# ------------------------------------------------------------------
+# Response Parsing
+# ------------------------------------------------------------------
+
+def _retry_after(headers):
+    if headers is None:
+        return None
+    if headers.get("retry-after-ms"):
+        return float(headers["retry-after-ms"]) / 1000
+    if headers.get("Retry-After"):
+        try:
+            return float(headers["Retry-After"])
+        except ValueError:
+            return None
+    return None
+
+
+def _output_text(body):
+    return "".join(
+        content.get("text", "")
+        for item in body.get("output", [])
+        for content in item.get("content", [])
+        if content.get("type") == "output_text"
+    )
+
+
+class _EventStream:
+    """
+    Iterates server-sent events as objects with attribute access
+    (event.type, event.delta, ...). usage is set once the stream has
+    completed.
+    """
+
+    def __init__(self, response, attempts):
+        self.response = response
+        self.attempts = attempts
+        self.usage = None
+
+    def __iter__(self):
+        with self.response:
+            for line in self.response:
+                line = line.decode("utf-8").rstrip("\r\n")
+                if not line.startswith("data: "):
+                    continue
+                event = json.loads(line[len("data: "):])
+                if event.get("type") == "response.completed":
+                    self.usage = (event.get("response") or {}).get("usage")
+                yield SimpleNamespace(**event)
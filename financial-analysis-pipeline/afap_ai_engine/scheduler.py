@@ -0,0 +1,137 @@
+# afap_ai_engine/scheduler.py
+
+import time
+
+from afap_ai_engine.prompt_builder import build_afap_prompt
+
+# ------------------------------------------------------------------
+# Risk-Prioritized Interpretation Scheduling
+# ------------------------------------------------------------------
+# Orders structured records so the riskiest company-years are
+# interpreted first (composite score, then how many engines are
+# elevated, then the most recent year) and admits them one at a time
+# against a token budget and a wall-clock deadline. Once a limit would
+# be exceeded the stage stops; every record not interpreted is returned
+# as an explicit skipped entry instead of an interpretation.
+# ------------------------------------------------------------------
+
+ELEVATED_SEVERITIES = ("watch", "action", "high")
+SEVERITY_ENGINES = ("trend", "cash_flow", "anomaly", "solvency")
+
+# Expected completion length when a response's usage is not yet known
+DEFAULT_OUTPUT_TOKENS = 600
+
+STOP_TOKEN_BUDGET = "token_budget"
+STOP_DEADLINE = "deadline"
+
+
+def estimate_prompt_tokens(messages):
+    """
+    Rough prompt size (about 4 characters per token).
+    """
+    return max(1, sum(len(m.get("content", "")) for m in messages) // 4)
+
+
+def risk_priority(record):
+    """
+    Sort key putting the highest-risk, most recent company-years first.
+    """
+    composite = (record.get("composite_risk") or {}).get("composite_score") or 0
+    elevated = sum(
+        (record.get(engine) or {}).get("severity") in ELEVATED_SEVERITIES
+        for engine in SEVERITY_ENGINES
+    )
+    return (-composite, -elevated, -int(record["Year"]), str(record["Company"]))
+
+
+class InterpretationScheduler:
+    """
+    Admission control for the interpretation stage.
+
+    max_tokens caps prompt + completion tokens across every call made
+    through the scheduler; deadline_seconds caps wall-clock time from
+    the first order() call. A call is only started if its estimated
+    tokens fit the remaining budget and the mean call latency so far
+    fits the remaining time. Actual usage replaces estimates as calls
+    report it (charge).
+    """
+
+    def __init__(self, max_tokens=None, deadline_seconds=None, output_tokens=DEFAULT_OUTPUT_TOKENS):
+        if max_tokens is not None and max_tokens <= 0:
+            raise ValueError("max_tokens must be positive.")
+        if deadline_seconds is not None and deadline_seconds <= 0:
+            raise ValueError("deadline_seconds must be positive.")
+        self.max_tokens = max_tokens
+        self.deadline_seconds = deadline_seconds
+        self.output_tokens = output_tokens
+
+        self.tokens_spent = 0
+        self.estimated_tokens_spent = 0
+        self.interpreted = 0
+        self.skipped = 0
+        self.stop_reason = None
+        self._started = None
+        self._call_seconds = 0.0
+
+    def order(self, records):
+        """
+        (record, estimated tokens) pairs in priority order.
+        """
+        if self._started is None:
+            self._started = time.perf_counter()
+        ordered = sorted(records, key=risk_priority)
+        return [(r, estimate_prompt_tokens(build_afap_prompt(r)) + self.output_tokens) for r in ordered]
+
+    def admit(self, estimated_tokens):
+        """
+        True if a call of estimated_tokens may start; otherwise records
+        why the stage stopped and returns False from then on.
+        """
+        if self.stop_reason is not None:
+            return False
+        if self.max_tokens is not None and self.tokens_spent + estimated_tokens > self.max_tokens:
+            self.stop_reason = STOP_TOKEN_BUDGET
+            return False
+        if self.deadline_seconds is not None:
+            elapsed = time.perf_counter() - self._started
+            mean_call = self._call_seconds / self.interpreted if self.interpreted else 0.0
+            if elapsed + mean_call > self.deadline_seconds:
+                self.stop_reason = STOP_DEADLINE
+                return False
+        return True
+
+    def charge(self, estimated_tokens, actual_tokens=None, seconds=0.0):
+        """
+        Books one finished call: actual_tokens if the response reported
+        usage, else the estimate.
+        """
+        self.interpreted += 1
+        self.estimated_tokens_spent += estimated_tokens
+        self.tokens_spent += actual_tokens if actual_tokens is not None else estimated_tokens
+        self._call_seconds += seconds
+
+    def skip(self, record):
+        """
+        The explicit entry standing in for a record that was not interpreted.
+        """
+        self.skipped += 1
+        return {
+            "Company": record.get("Company"),
+            "Year": record.get("Year"),
+            "analysis_profile": record.get("analysis_profile"),
+            "temporal_mode": record.get("temporal_mode"),
+            "interpretation": None,
+            "skipped": self.stop_reason
+        }
+
+    def report(self):
+        return {
+            "interpreted": self.interpreted,
+            "skipped": self.skipped,
+            "stop_reason": self.stop_reason,
+            "max_tokens": self.max_tokens,
+            "tokens_spent": self.tokens_spent,
+            "estimated_tokens_spent": self.estimated_tokens_spent,
+            "deadline_seconds": self.deadline_seconds,
+            "elapsed_seconds": time.perf_counter() - self._started if self._started is not None else 0.0
+        }
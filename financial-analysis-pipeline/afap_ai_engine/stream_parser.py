@@ -0,0 +1,108 @@
+import re
+
+# Section names in the order build_afap_prompt's output schema lists them
+SECTION_NAMES = (
+    "summary",
+    "key_risks",
+    "period_specific_actions",
+    "structural_long_term_implications",
+    "contextual_interpretation",
+    "confidence_notes"
+)
+
+# A header line is a section name on its own, optionally decorated as a
+# list item / markdown heading / bold, optionally followed by ":" and
+# the first line of the section body, e.g. "- summary: ...", "## Key Risks"
+_HEADER = re.compile(
+    r"^[\s>#*\-•]*(?P<name>[A-Za-z][A-Za-z _\-]*?)[\s*]*(?::[\s*]*(?P<rest>.*))?$"
+)
+
+
+def _section_name(line):
+    match = _HEADER.match(line)
+    if not match:
+        return None, None
+    name = re.sub(r"[\s\-]+", "_", match.group("name").strip().lower())
+    if name not in SECTION_NAMES:
+        return None, None
+    return name, match.group("rest") or ""
+
+
+class SectionStreamParser:
+    """
+    Incremental parser for AFAP interpretation text.
+
+    feed() takes text deltas as they stream in. A section is complete
+    once the next section header has arrived (or at close()), and is
+    then passed to on_section(name, text) immediately. Text before the
+    first header is kept only in the full text.
+    """
+
+    def __init__(self, on_section=None):
+        self.on_section = on_section
+        self.sections = {}
+        self._chunks = []
+        self._pending = ""
+        self._current = None
+        self._lines = []
+
+    @property
+    def text(self):
+        return "".join(self._chunks)
+
+    def feed(self, delta):
+        """
+        Consumes a text delta. Returns the names of sections it completed.
+        """
+        self._chunks.append(delta)
+        *lines, self._pending = (self._pending + delta).split("\n")
+        return [name for name in map(self._consume_line, lines) if name is not None]
+
+    def close(self):
+        """
+        Flushes the trailing partial line and the last open section.
+        Returns the full sections dict.
+        """
+        if self._pending:
+            line, self._pending = self._pending, ""
+            self._consume_line(line)
+        if self._current is not None:
+            self._emit()
+            self._current = None
+        return self.sections
+
+    def _consume_line(self, line):
+        # Returns the name of the section this line completed, if any
+        name, rest = _section_name(line)
+        if name is None:
+            self._lines.append(line)
+            return None
+
+        completed = self._emit() if self._current is not None else None
+        self._current = name
+        self._lines = [rest] if rest else []
+        return completed
+
+    def _emit(self):
+        name = self._current
+        text = "\n".join(self._lines).strip()
+        self._lines = []
+
+        # A repeated header extends its section rather than replacing it
+        if name in self.sections and text:
+            self.sections[name] = f"{self.sections[name]}\n{text}".strip()
+        else:
+            self.sections.setdefault(name, text)
+
+        if self.on_section is not None:
+            self.on_section(name, text)
+        return name
+
+
+def parse_sections(text):
+    """
+    Parses a complete interpretation into {section name: text}.
+    """
+    parser = SectionStreamParser()
+    parser.feed(text)
+    return parser.close()
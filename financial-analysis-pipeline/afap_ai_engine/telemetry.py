@@ -0,0 +1,257 @@
+# afap_ai_engine/telemetry.py
+
+import bisect
+import json
+import os
+import threading
+import time
+import uuid
+
+import numpy as np
+
+# ------------------------------------------------------------------
+# Interpretation Call Telemetry
+# ------------------------------------------------------------------
+# afap_llm_interpretation reports every Responses call to an
+# LLMTelemetry collector: tokens (from the response's usage), latency,
+# time to first token when streamed, and attempts (retries, when the
+# client reports them). The collector keeps one span per call,
+# fixed-bucket histograms and per-profile totals, and hands each span
+# to an optional exporter as soon as the call ends:
+#
+#   JSONLinesExporter(path)      one JSON span per line, locally
+#   OTelSpanExporter(export)     OpenTelemetry-shaped span dicts
+#                                (gen_ai.* attributes) to export(span)
+#
+# Any callable taking the span dict works as an exporter.
+# ------------------------------------------------------------------
+
+SPAN_NAME = "afap.llm.interpretation"
+
+# Histogram upper bucket edges; a last bucket counts everything above
+LATENCY_BUCKETS_MS = (100, 250, 500, 1_000, 2_500, 5_000, 10_000, 30_000, 60_000)
+TOKEN_BUCKETS = (128, 256, 512, 1_024, 2_048, 4_096, 8_192, 16_384)
+
+PERCENTILES = (50, 95, 99)
+
+
+class LLMTelemetry:
+    """
+    Thread-safe collector of interpretation call spans.
+
+    prices (optional) maps model -> {"input": ..., "output": ...} in
+    currency per million tokens; summaries then carry a "cost".
+    """
+
+    def __init__(self, exporter=None, prices=None):
+        self.exporter = exporter
+        self.prices = prices or {}
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def record(self, span):
+        with self._lock:
+            self.spans.append(span)
+        if self.exporter is not None:
+            self.exporter(span)
+
+    def start_call(self, record, model, stream):
+        """
+        A CallTimer for one call on record; call .finish(...) on it.
+        """
+        return CallTimer(self, record, model, stream)
+
+    def summary(self, analysis_profile=None):
+        """
+        Totals, latency percentiles and histograms over every span (or
+        one profile's), plus per-profile totals.
+        """
+        with self._lock:
+            spans = [
+                s for s in self.spans
+                if analysis_profile is None or s["analysis_profile"] == analysis_profile
+            ]
+
+        by_profile = {}
+        for span in spans:
+            by_profile.setdefault(span["analysis_profile"], []).append(span)
+
+        summary = self._totals(spans)
+        summary["latency_ms"] = percentile_summary([s["latency_ms"] for s in spans if s["status"] == "ok"])
+        summary["time_to_first_token_ms"] = percentile_summary(
+            [s["time_to_first_token_ms"] for s in spans if s["time_to_first_token_ms"] is not None]
+        )
+        summary["histograms"] = {
+            "latency_ms": _histogram([s["latency_ms"] for s in spans], LATENCY_BUCKETS_MS),
+            "input_tokens": _histogram([s["input_tokens"] for s in spans if s["input_tokens"] is not None], TOKEN_BUCKETS),
+            "output_tokens": _histogram([s["output_tokens"] for s in spans if s["output_tokens"] is not None], TOKEN_BUCKETS)
+        }
+        summary["by_profile"] = {profile: self._totals(group) for profile, group in by_profile.items()}
+        return summary
+
+    def _totals(self, spans):
+        totals = {
+            "calls": len(spans),
+            "errors": sum(s["status"] != "ok" for s in spans),
+            "retries": sum(s["retries"] or 0 for s in spans),
+            "input_tokens": sum(s["input_tokens"] or 0 for s in spans),
+            "output_tokens": sum(s["output_tokens"] or 0 for s in spans),
+            "calls_without_usage": sum(s["input_tokens"] is None for s in spans),
+            "latency_ms_total": sum(s["latency_ms"] for s in spans)
+        }
+        totals["total_tokens"] = totals["input_tokens"] + totals["output_tokens"]
+        if self.prices:
+            totals["cost"] = sum(self._cost(s) for s in spans)
+        return totals
+
+    def _cost(self, span):
+        price = self.prices.get(span["model"])
+        if price is None:
+            return 0.0
+        return (
+            (span["input_tokens"] or 0) * price.get("input", 0.0)
+            + (span["output_tokens"] or 0) * price.get("output", 0.0)
+        ) / 1_000_000
+
+
+class CallTimer:
+    """
+    Times one interpretation call from creation to finish().
+    """
+
+    def __init__(self, telemetry, record, model, stream):
+        self.telemetry = telemetry
+        self.record = record
+        self.model = model
+        self.stream = stream
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self._first_token = None
+
+    def first_token(self):
+        if self._first_token is None:
+            self._first_token = time.perf_counter()
+
+    def finish(self, usage=None, attempts=None, error=None):
+        end = time.perf_counter()
+        input_tokens, output_tokens = usage_tokens(usage)
+        span = {
+            "name": SPAN_NAME,
+            "span_id": uuid.uuid4().hex[:16],
+            "Company": self.record.get("Company"),
+            "Year": self.record.get("Year"),
+            "analysis_profile": self.record.get("analysis_profile"),
+            "model": self.model,
+            "stream": self.stream,
+            "start_time": self.start_time,
+            "latency_ms": (end - self._start) * 1000,
+            "time_to_first_token_ms": (
+                (self._first_token - self._start) * 1000 if self._first_token is not None else None
+            ),
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "attempts": attempts,
+            "retries": attempts - 1 if attempts else None,
+            "status": "ok" if error is None else "error",
+            "error": None if error is None else type(error).__name__
+        }
+        self.telemetry.record(span)
+        return span
+
+
+def usage_tokens(usage):
+    """
+    (input_tokens, output_tokens) from a Responses usage dict or object,
+    (None, None) when the response reported none.
+    """
+    if usage is None:
+        return None, None
+    if isinstance(usage, dict):
+        return usage.get("input_tokens"), usage.get("output_tokens")
+    return getattr(usage, "input_tokens", None), getattr(usage, "output_tokens", None)
+
+
+def percentile_summary(values):
+    """
+    p50 / p95 / p99 / mean / max of values (a list or array), all None
+    when there are none. Shared with the load test's latency report.
+    """
+    if len(values) == 0:
+        return {f"p{p}": None for p in PERCENTILES} | {"mean": None, "max": None}
+    values = np.asarray(values, dtype=np.float64)
+    summary = {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+    summary["mean"] = float(values.mean())
+    summary["max"] = float(values.max())
+    return summary
+
+
+def _histogram(values, edges):
+    counts = [0] * (len(edges) + 1)
+    for value in values:
+        counts[bisect.bisect_left(edges, value)] += 1
+    return {"edges": list(edges), "counts": counts}
+
+
+# ------------------------------------------------------------------
+# Exporters
+# ------------------------------------------------------------------
+
+class JSONLinesExporter:
+    """
+    Appends every span to path as one JSON line.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def __call__(self, span):
+        line = json.dumps(span, default=str)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class OTelSpanExporter:
+    """
+    Converts spans to OpenTelemetry-shaped dicts (see otel_span) and
+    passes them to export, e.g. a function posting to an OTLP collector.
+    All spans of one exporter share a trace id.
+    """
+
+    def __init__(self, export, trace_id=None):
+        self.export = export
+        self.trace_id = trace_id or uuid.uuid4().hex
+
+    def __call__(self, span):
+        self.export(otel_span(span, self.trace_id))
+
+
+def otel_span(span, trace_id):
+    """
+    One span as an OpenTelemetry span dict with gen_ai.* attributes.
+    """
+    start_ns = int(span["start_time"] * 1e9)
+    attributes = {
+        "gen_ai.operation.name": "chat",
+        "gen_ai.request.model": span["model"],
+        "gen_ai.usage.input_tokens": span["input_tokens"],
+        "gen_ai.usage.output_tokens": span["output_tokens"],
+        "afap.company": span["Company"],
+        "afap.year": span["Year"],
+        "afap.analysis_profile": span["analysis_profile"],
+        "afap.stream": span["stream"],
+        "afap.attempts": span["attempts"],
+        "afap.time_to_first_token_ms": span["time_to_first_token_ms"]
+    }
+    return {
+        "name": span["name"],
+        "trace_id": trace_id,
+        "span_id": span["span_id"],
+        "kind": "CLIENT",
+        "start_time_unix_nano": start_ns,
+        "end_time_unix_nano": start_ns + int(span["latency_ms"] * 1e6),
+        "attributes": {k: v for k, v in attributes.items() if v is not None},
+        "status": {"code": "OK"} if span["status"] == "ok" else {"code": "ERROR", "message": span["error"]}
+    }
@@ -0,0 +1,55 @@
+# benchmarks/bench_afap_iter.py
+#
+# Time to first result, total time and peak traced memory of afap_run
+# (everything returned at the end) versus afap_iter (one bundle per
+# company as soon as it is done), consuming each bundle and dropping
+# it, against the simulated LLM client of bench_pipelined_run.
+#
+#   python benchmarks/bench_afap_iter.py [n_companies] [latency_ms]
+
+import contextlib
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bench_pipelined_run import N_COMPANIES, PROFILE, SimulatedClient, synthetic_financials
+from orchestrator.orchestrator import COMPANY_BUNDLE_KEYS, afap_iter, afap_run
+
+SHARD_SIZE = 10
+
+
+def measure(consume):
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        first, rows = consume()
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first - start, total, peak / 2 ** 20, rows
+
+
+def run_all():
+    outputs = afap_run(DF, analysis_profile=PROFILE, llm_client=SimulatedClient())
+    return time.perf_counter(), sum(len(outputs[k]) for k in COMPANY_BUNDLE_KEYS)
+
+
+def run_iter():
+    first, rows = None, 0
+    for bundle in afap_iter(DF, analysis_profile=PROFILE, llm_client=SimulatedClient(), shard_size=SHARD_SIZE):
+        first = first or time.perf_counter()
+        rows += sum(len(bundle[k]) for k in COMPANY_BUNDLE_KEYS)
+    return first, rows
+
+
+if __name__ == "__main__":
+    DF = synthetic_financials()
+    print(f"{N_COMPANIES} companies, profile {PROFILE}, afap_iter shard_size {SHARD_SIZE}")
+
+    for label, consume in (("afap_run ", run_all), ("afap_iter", run_iter)):
+        first, total, peak, rows = measure(consume)
+        print(f"{label}  first result {first:6.2f} s  total {total:6.2f} s  peak {peak:7.1f} MiB  ({rows:,} records)")
@@ -0,0 +1,98 @@
+# benchmarks/bench_cash_flow_engines.py
+#
+# Indirect-method cash flow three ways over a synthetic portfolio:
+#   masked   — per company-year groupby with get_amount-style masked
+#              lookups for the current and the prior year (reference)
+#   lag-join — indirect_cash_flow_engine (one sorted line-item matrix
+#              joined to itself one row back)
+# plus the existing operating-profit proxy engine for scale, and checks
+# the lag-join cash flows equal the masked reference.
+#
+#   python benchmarks/bench_cash_flow_engines.py [n_companies]
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bench_fused_engines import N_COMPANIES, YEARS, synthetic_financials
+from engines.cash_flow_engine import cash_flow_engine
+from engines.data_normalizer import normalize_financial_df
+from engines.indirect_cash_flow_engine import indirect_cash_flow_engine
+
+
+def masked_indirect_cash_flow(financials):
+    df = normalize_financial_df(financials)
+    groups = {key: group for key, group in df.groupby(["Company", "Year"], observed=True)}
+
+    def get_amount(group, category, subcategory):
+        row = group[(group["FS Category"] == category) & (group["FS Subcategory"] == subcategory)]
+        return row["Amount"].sum() if not row.empty else np.nan
+
+    def balances(group):
+        return {
+            "wc": (
+                get_amount(group, "Assets", "Current Assets") - get_amount(group, "Assets", "Cash")
+                - get_amount(group, "Liabilities", "Current Liabilities")
+            ),
+            "nca": get_amount(group, "Assets", "Non-Current Assets"),
+            "ncl": get_amount(group, "Liabilities", "Non-Current Liabilities"),
+            "equity": get_amount(group, "Equity", "Equity")
+        }
+
+    results = {}
+    for (company, year), group in groups.items():
+        prior = groups.get((company, year - 1))
+        if prior is None:
+            results[(company, year)] = (None, None, None)
+            continue
+        net_income = (
+            get_amount(group, "Revenue", "Revenue") - get_amount(group, "Expenses", "COGS")
+            - get_amount(group, "Expenses", "Operating Expenses") - get_amount(group, "Expenses", "Finance Costs")
+            - get_amount(group, "Expenses", "Tax")
+        )
+        now, before = balances(group), balances(prior)
+        results[(company, year)] = (
+            float(net_income - (now["wc"] - before["wc"])),
+            float(-(now["nca"] - before["nca"])),
+            float((now["ncl"] - before["ncl"]) + ((now["equity"] - before["equity"]) - net_income))
+        )
+    return results
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    financials = synthetic_financials()
+    print(f"{N_COMPANIES:,} companies x {len(YEARS)} years ({len(financials):,} line items)")
+
+    seconds, _ = timed(cash_flow_engine, financials, compact=True)
+    print(f"proxy cash_flow_engine      {seconds:7.2f} s")
+
+    seconds, reference = timed(masked_indirect_cash_flow, financials)
+    print(f"indirect, masked lookups    {seconds:7.2f} s")
+
+    seconds, records = timed(indirect_cash_flow_engine, financials, compact=True)
+    print(f"indirect, lag-join          {seconds:7.2f} s")
+
+    lag_join = {(r.Company, r.Year): tuple(r.metric_values[:3]) for r in records}
+    same = lag_join.keys() == reference.keys() and all(
+        all(a == b or abs(a - b) <= 1e-9 * max(abs(a), abs(b)) for a, b in zip(lag_join[k], reference[k]))
+        if None not in lag_join[k] else lag_join[k] == reference[k]
+        for k in reference
+    )
+    print(f"lag-join cash flows match the masked reference: {same}")
+    patterns = {}
+    for r in records:
+        patterns[r.cf_pattern] = patterns.get(r.cf_pattern, 0) + 1
+    print(f"cf_pattern counts: {patterns}")
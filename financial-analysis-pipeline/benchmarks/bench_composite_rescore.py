@@ -0,0 +1,117 @@
+# benchmarks/bench_composite_rescore.py
+#
+# What-if analysis over a grid of risk weights / bands, two ways:
+#   engine  — composite_risk_engine re-run per config over the engine
+#             outputs (the dict loop)
+#   rescore — rescore() of the run's SeverityMatrix (vectorised)
+# and checks rescore with the run config reproduces the engine rows.
+#
+#   python benchmarks/bench_composite_rescore.py [n_companies] [n_configs]
+
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config.defaults import DEFAULT_CLIENT_CONFIG
+from engines.composite_risk_engine import SeverityMatrix, composite_risk_engine, rescore, score_matrix
+
+N_COMPANIES = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+N_CONFIGS = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+YEARS = range(2015, 2025)
+
+SEVERITIES = {
+    "trend": ["stable", "watch"],
+    "cash_flow": ["stable", "watch"],
+    "anomaly": ["normal", "watch", "high"],
+    "solvency": ["stable", "watch", "action"]
+}
+
+
+def synthetic_outputs(seed=0):
+    rng = np.random.default_rng(seed)
+    keys = [(f"Company {c:05d}", y) for c in range(N_COMPANIES) for y in YEARS]
+    outputs = {}
+    for engine, levels in SEVERITIES.items():
+        picks = rng.choice(len(levels), size=len(keys), p=[0.6] + [0.4 / (len(levels) - 1)] * (len(levels) - 1))
+        outputs[engine] = [
+            {"Company": company, "Year": year, "severity": levels[i]}
+            for (company, year), i in zip(keys, picks.tolist())
+        ]
+    return outputs
+
+
+def config_grid(n):
+    weights = np.round(np.arange(0.1, 0.55, 0.05), 2).tolist()
+    grid = []
+    for solvency, anomaly in itertools.product(weights, weights):
+        for medium in (0.4, 0.5):
+            grid.append({"risk_weights": {"solvency": solvency, "anomaly": anomaly}, "risk_bands": {"medium": medium}})
+    return grid[:n]
+
+
+def run_engine(outputs, analysis):
+    return composite_risk_engine(
+        outputs["trend"], outputs["cash_flow"], outputs["anomaly"], outputs["solvency"], {"analysis": analysis}
+    )
+
+
+if __name__ == "__main__":
+    outputs = synthetic_outputs()
+    base = DEFAULT_CLIENT_CONFIG["analysis"]
+    grid = config_grid(N_CONFIGS)
+    print(f"{N_COMPANIES * len(YEARS):,} company-years, {len(grid)} configs")
+
+    start = time.perf_counter()
+    rows, matrix = composite_risk_engine(
+        outputs["trend"], outputs["cash_flow"], outputs["anomaly"], outputs["solvency"],
+        {"analysis": base}, return_matrix=True
+    )
+    print(f"run + matrix            {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+    scores, bands = score_matrix(matrix, matrix.analysis_config)
+    same = all(
+        r["composite_score"] == s and r["risk_band"] == b
+        for r, s, b in zip(rows, scores.tolist(), bands.tolist())
+    )
+    print(f"rescore with the run config matches the engine rows: {same}")
+
+    full = [
+        {"risk_weights": {**base["risk_weights"], **c["risk_weights"]}, "risk_bands": {**base["risk_bands"], **c["risk_bands"]}}
+        for c in grid
+    ]
+    start = time.perf_counter()
+    engine_bands = [[r["risk_band"] for r in run_engine(outputs, analysis)] for analysis in full]
+    engine_seconds = time.perf_counter() - start
+    print(f"engine per config       {engine_seconds / len(grid) * 1000:8.1f} ms")
+
+    start = time.perf_counter()
+    results = rescore(matrix, grid)
+    rescore_seconds = time.perf_counter() - start
+    print(f"rescore per config      {rescore_seconds / len(grid) * 1000:8.1f} ms  ({engine_seconds / rescore_seconds:.0f}x)")
+
+    start = time.perf_counter()
+    counts = rescore(matrix, grid, changed_rows=False)
+    counts_seconds = time.perf_counter() - start
+    print(f"  counts only           {counts_seconds / len(grid) * 1000:8.3f} ms  ({engine_seconds / counts_seconds:.0f}x)")
+
+    changed_ok = all(
+        {(c["Company"], c["Year"]): c["risk_band"] for c in result["changed"]}
+        == {(r["Company"], r["Year"]): b for r, b in zip(rows, eb) if b != r["risk_band"]}
+        and result["n_changed"] == len(result["changed"])
+        and result["band_counts"] == summary["band_counts"]
+        for result, summary, eb in zip(results, counts, engine_bands)
+    )
+    print(f"changed rows match the engine for every config: {changed_ok}")
+
+    path = os.path.join(os.path.dirname(__file__), "_severity_matrix.npz")
+    matrix.save(path)
+    start = time.perf_counter()
+    loaded = SeverityMatrix.load(path)
+    print(f"matrix load             {(time.perf_counter() - start) * 1000:8.1f} ms  ({os.path.getsize(path) / 1024:.0f} KiB)")
+    os.remove(path)
+    print(f"loaded matrix identical: {np.array_equal(loaded.codes, matrix.codes) and np.array_equal(loaded.companies, matrix.companies)}")
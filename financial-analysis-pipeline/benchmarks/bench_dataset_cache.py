@@ -0,0 +1,75 @@
+# benchmarks/bench_dataset_cache.py
+#
+# Loading a financials CSV with formatted amounts ("25,685", "(1,200)")
+# three ways:
+#   parse     — pd.read_csv + normalize_financial_df on every load
+#   cold      — storage.dataset_cache.load_financials, cache miss
+#               (parse, normalize, write the entry)
+#   hit       — load_financials again (memory-mapped entry)
+# then the fused engines on the raw frame (normalized inside) versus on
+# the cached frame (used as is), checking outputs are identical.
+#
+#   python benchmarks/bench_dataset_cache.py [n_companies]
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bench_fused_engines import ENGINES, N_COMPANIES, YEARS, synthetic_financials
+from engines.data_normalizer import normalize_financial_df
+from orchestrator.orchestrator import run_base_engines
+from storage.dataset_cache import load_financials
+
+REPEATS = 3
+
+
+def formatted_csv(path):
+    df = synthetic_financials()
+    amounts = df["Amount"].to_numpy(dtype=np.int64)
+    text = pd.Series([f"{abs(a):,}" for a in amounts])
+    df["Amount"] = text.where(amounts >= 0, "(" + text + ")")
+    df.to_csv(path, index=False)
+    return len(df)
+
+
+def best_of(fn, *args, **kwargs):
+    best, result = float("inf"), None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "financials.csv")
+        cache_dir = os.path.join(tmp, "cache")
+        n_rows = formatted_csv(path)
+        print(f"{N_COMPANIES:,} companies x {len(YEARS)} years ({n_rows:,} line items, {os.path.getsize(path) / 2 ** 20:.1f} MiB CSV)")
+
+        seconds, _ = best_of(lambda: normalize_financial_df(pd.read_csv(path)))
+        print(f"parse + normalize    {seconds * 1000:8.1f} ms")
+
+        start = time.perf_counter()
+        load_financials(path, cache_dir=cache_dir)
+        print(f"cache miss (cold)    {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+        seconds, cached = best_of(load_financials, path, cache_dir=cache_dir)
+        print(f"cache hit (mmap)     {seconds * 1000:8.1f} ms")
+
+        raw = pd.read_csv(path)
+        seconds, (from_raw, _) = best_of(run_base_engines, raw, ENGINES, fused=True)
+        print(f"engines, raw frame   {seconds * 1000:8.1f} ms")
+        seconds, (from_cache, _) = best_of(run_base_engines, cached, ENGINES, fused=True)
+        print(f"engines, cached      {seconds * 1000:8.1f} ms")
+        print(f"identical engine outputs: {repr(from_raw) == repr(from_cache)}")
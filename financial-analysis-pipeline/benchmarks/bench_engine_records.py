@@ -0,0 +1,95 @@
+# benchmarks/bench_engine_records.py
+#
+# Measures the memory held by 1M engine output rows as canonical dicts
+# versus compact slotted records (engines.records).
+#
+#   python benchmarks/bench_engine_records.py [n_rows]
+
+import os
+import sys
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from engines.records import RatioRow, SolvencyRow, RATIO_METRICS
+
+N_ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+N_COMPANIES = 10_000
+
+
+def build(factory):
+    rng = np.random.default_rng(0)
+    values = rng.normal(1.0, 0.5, size=(N_ROWS, len(RATIO_METRICS)))
+    companies = [f"Company {i:05d}" for i in range(N_COMPANIES)]
+
+    tracemalloc.start()
+    rows = [
+        factory(companies[i % N_COMPANIES], 2000 + i // N_COMPANIES, values[i])
+        for i in range(N_ROWS)
+    ]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rows, current
+
+
+def solvency_dict(company, year, v):
+    de, ic = v[5], v[6]
+    flags = {"high_leverage": de > 1.5, "weak_coverage": ic < 1.5}
+    count = sum(flags.values())
+    severity = "action" if count == 2 else "watch" if count == 1 else "stable"
+    return {
+        "engine": "solvency_engine",
+        "Company": company,
+        "Year": year,
+        "metrics": {"debt_equity": de, "interest_coverage": ic},
+        "flags": flags,
+        "severity": severity,
+        "explanation": (
+            "Capital structure shows solvency risk."
+            if severity != "stable"
+            else "Solvency position acceptable."
+        )
+    }
+
+
+def solvency_record(company, year, v):
+    de, ic = v[5], v[6]
+    flags = (de > 1.5, ic < 1.5)
+    count = sum(flags)
+    severity = "action" if count == 2 else "watch" if count == 1 else "stable"
+    return SolvencyRow(company, year, (de, ic), flags, severity)
+
+
+def ratio_dict(company, year, v):
+    return {
+        "engine": "ratio_engine",
+        "Company": company,
+        "Year": year,
+        "metrics": dict(zip(RATIO_METRICS, v)),
+        "flags": {},
+        "severity": "stable",
+        "explanation": "Canonical financial ratios"
+    }
+
+
+def ratio_record(company, year, v):
+    return RatioRow(company, year, v)
+
+
+if __name__ == "__main__":
+    for name, as_dict, as_record in (
+        ("solvency_engine", solvency_dict, solvency_record),
+        ("ratio_engine", ratio_dict, ratio_record),
+    ):
+        rows, dict_bytes = build(as_dict)
+        del rows
+        rows, record_bytes = build(as_record)
+        del rows
+        print(
+            f"{name:<16} {N_ROWS:>9,} rows  "
+            f"dicts {dict_bytes / 2**20:8.1f} MiB  "
+            f"records {record_bytes / 2**20:8.1f} MiB  "
+            f"({record_bytes / dict_bytes:.0%})"
+        )
@@ -0,0 +1,102 @@
+# benchmarks/bench_fused_engines.py
+#
+# Compares the orchestrator's engine-by-engine path (ratio_engine, then
+# trend / anomaly / solvency each regrouping the flat ratios frame) with
+# the fused single pass (engines.fused_engine): wall time, peak traced
+# memory with dict and compact outputs, and whether outputs are identical.
+#
+#   python benchmarks/bench_fused_engines.py [n_companies]
+
+import contextlib
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from orchestrator.orchestrator import run_base_engines
+
+N_COMPANIES = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+YEARS = range(2015, 2025)
+ENGINES = ["ratio", "trend", "anomaly", "solvency"]
+
+# (category, subcategory, statement, low, high) — ranges keep most
+# company-years inside the validator's bounds
+LINE_ITEMS = [
+    ("Assets", "Current Assets", "Balance Sheet", 500_000, 2_000_000),
+    ("Assets", "Non-Current Assets", "Balance Sheet", 1_000_000, 5_000_000),
+    ("Assets", "Inventory", "Balance Sheet", 50_000, 300_000),
+    ("Assets", "Cash", "Balance Sheet", 50_000, 300_000),
+    ("Liabilities", "Current Liabilities", "Balance Sheet", 300_000, 1_500_000),
+    ("Liabilities", "Non-Current Liabilities", "Balance Sheet", 500_000, 3_000_000),
+    ("Equity", "Equity", "Balance Sheet", 800_000, 4_000_000),
+    ("Revenue", "Revenue", "Income Statement", 2_000_000, 6_000_000),
+    ("Expenses", "COGS", "Income Statement", 800_000, 2_500_000),
+    ("Expenses", "Operating Expenses", "Income Statement", 400_000, 1_500_000),
+    ("Expenses", "Finance Costs", "Income Statement", 50_000, 400_000),
+    ("Expenses", "Tax", "Income Statement", 50_000, 300_000),
+]
+
+
+def synthetic_financials():
+    n_items = len(LINE_ITEMS)
+    n_years = len(YEARS)
+    n_rows = N_COMPANIES * n_years * n_items
+
+    company_idx = np.repeat(np.arange(N_COMPANIES), n_years * n_items)
+    year = np.tile(np.repeat(np.array(YEARS), n_items), N_COMPANIES)
+    item_idx = np.tile(np.arange(n_items), N_COMPANIES * n_years)
+    items = np.array([i[:3] for i in LINE_ITEMS], dtype=object)
+    low = np.array([i[3] for i in LINE_ITEMS])[item_idx]
+    high = np.array([i[4] for i in LINE_ITEMS])[item_idx]
+
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "Company": np.array([f"Company {i:05d}" for i in range(N_COMPANIES)], dtype=object)[company_idx],
+        "Year": year.astype(np.int64),
+        "FS Category": items[item_idx, 0],
+        "FS Subcategory": items[item_idx, 1],
+        "Statement": items[item_idx, 2],
+        "Amount": rng.integers(low, high, size=n_rows).astype(str),
+    })
+
+
+def run(df, fused, compact):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return run_base_engines(df, ENGINES, compact, fused=fused)
+
+
+def seconds(df, fused):
+    start = time.perf_counter()
+    run(df, fused, compact=False)
+    return time.perf_counter() - start
+
+
+def peak_mib(df, fused, compact):
+    # Traced separately: tracemalloc slows the row-wise path far more
+    tracemalloc.start()
+    run(df, fused, compact)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2**20
+
+
+if __name__ == "__main__":
+    df = synthetic_financials()
+    print(f"{len(df):,} line-item rows ({N_COMPANIES:,} companies x {len(YEARS)} years)")
+
+    for label, fused in (("per-engine", False), ("fused", True)):
+        print(
+            f"{label:<11} time {seconds(df, fused):8.2f} s  "
+            f"peak memory {peak_mib(df, fused, compact=False):7.1f} MiB (dicts)  "
+            f"{peak_mib(df, fused, compact=True):7.1f} MiB (compact records)"
+        )
+
+    (a, a_df), (b, b_df) = run(df, False, False), run(df, True, False)
+    identical = repr(a) == repr(b) and repr(a_df) == repr(b_df) and a_df.equals(b_df)
+    print(f"outputs identical: {identical}  (quarantined: {len(a['quarantine'])})")
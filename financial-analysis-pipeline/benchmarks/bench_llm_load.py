@@ -0,0 +1,64 @@
+# benchmarks/bench_llm_load.py
+#
+# Offline load test of the interpretation stage: afap_llm_interpretation
+# with a ResponsesHTTPClient against a local FakeResponsesServer, under
+# three server behaviours:
+#   clean       — lognormal latency only
+#   faulty      — plus injected 429s and 500/503s
+#   throttled   — plus a token-per-second budget (429 + Retry-After),
+#                 with the default client and with a more patient one
+#
+#   python benchmarks/bench_llm_load.py [n_requests] [concurrency] [stream]
+
+import contextlib
+import io
+import itertools
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from afap_ai_engine.fake_stream_server import FakeResponsesServer
+from afap_ai_engine.load_test import format_report, run_load_test
+from afap_ai_engine.responses_client import ResponsesHTTPClient
+from config.loader import resolve_client_config
+from orchestrator.orchestrator import build_structured_records, resolve_profile, run_base_engines, run_composite
+
+N_REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+CONCURRENCY = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+STREAM = len(sys.argv) > 3 and sys.argv[3] == "stream"
+PROFILE = "full_diagnostic"
+LATENCY = ("lognormal", 0.15, 0.5)
+
+CLIENT = dict(max_retries=5, backoff=0.05)
+
+# name -> (server behaviour, client retry settings)
+SCENARIOS = {
+    "clean": (dict(latency=LATENCY), CLIENT),
+    "faulty": (dict(latency=LATENCY, error_rate_429=0.05, error_rate_5xx=0.05), CLIENT),
+    "throttled": (dict(latency=LATENCY, tokens_per_second=15_000), CLIENT),
+    "throttled+": (dict(latency=LATENCY, tokens_per_second=15_000), dict(max_retries=12, backoff=0.25))
+}
+
+
+def structured_records():
+    df = pd.read_csv(os.path.join(os.path.dirname(__file__), "..", "data", "cleaned", "financial_statements.csv"))
+    engines = resolve_profile(PROFILE)["engines"]
+    with contextlib.redirect_stdout(io.StringIO()):
+        outputs, ratios_df = run_base_engines(df, engines)
+        outputs["composite_risk"] = run_composite(outputs, engines, resolve_client_config(None)["analysis"])
+    records = build_structured_records(ratios_df, outputs, PROFILE)
+    return list(itertools.islice(itertools.cycle(records), N_REQUESTS))
+
+
+if __name__ == "__main__":
+    records = structured_records()
+    print(f"{N_REQUESTS} requests, {CONCURRENCY} concurrent callers, {'streamed' if STREAM else 'non-streamed'}")
+
+    for name, (behaviour, retries) in SCENARIOS.items():
+        with FakeResponsesServer(seed=1, **behaviour) as server:
+            client = ResponsesHTTPClient(server.base_url, **retries)
+            report = run_load_test(records, client, concurrency=CONCURRENCY, stream=STREAM, server=server)
+        print(format_report(report, label=f"{name:<10} "))
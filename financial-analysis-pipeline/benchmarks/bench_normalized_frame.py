@@ -0,0 +1,83 @@
+# benchmarks/bench_normalized_frame.py
+#
+# Compares the normalized frame as object strings / int64 (compact=False)
+# with the compact frame (categorical labels, small-int Year, optional
+# float32 Amount): memory footprint and Company/Year groupby time.
+#
+#   python benchmarks/bench_normalized_frame.py [n_companies]
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from engines.data_normalizer import normalize_financial_df
+
+N_COMPANIES = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+YEARS = range(2015, 2025)
+
+LINE_ITEMS = [
+    ("Assets", "Current Assets", "Balance Sheet"),
+    ("Assets", "Non-Current Assets", "Balance Sheet"),
+    ("Assets", "Inventory", "Balance Sheet"),
+    ("Liabilities", "Current Liabilities", "Balance Sheet"),
+    ("Liabilities", "Non-Current Liabilities", "Balance Sheet"),
+    ("Equity", "Equity", "Balance Sheet"),
+    ("Revenue", "Revenue", "Income Statement"),
+    ("Expenses", "COGS", "Income Statement"),
+    ("Expenses", "Operating Expenses", "Income Statement"),
+    ("Expenses", "Finance Costs", "Income Statement"),
+    ("Expenses", "Tax", "Income Statement"),
+]
+
+
+def synthetic_financials():
+    n_items = len(LINE_ITEMS)
+    n_years = len(YEARS)
+    n_rows = N_COMPANIES * n_years * n_items
+
+    company_idx = np.repeat(np.arange(N_COMPANIES), n_years * n_items)
+    year = np.tile(np.repeat(np.array(YEARS), n_items), N_COMPANIES)
+    item_idx = np.tile(np.arange(n_items), N_COMPANIES * n_years)
+    items = np.array(LINE_ITEMS, dtype=object)
+
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "Company": np.array([f"Company {i:06d}" for i in range(N_COMPANIES)], dtype=object)[company_idx],
+        "Year": year.astype(np.int64),
+        "FS Category": items[item_idx, 0],
+        "FS Subcategory": items[item_idx, 1],
+        "Statement": items[item_idx, 2],
+        "Amount": rng.integers(1_000, 5_000_000, size=n_rows).astype(str),
+    })
+
+
+def groupby_seconds(df, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df.groupby(["Company", "Year"], observed=True)["Amount"].sum()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    raw = synthetic_financials()
+    print(f"{len(raw):,} line-item rows ({N_COMPANIES:,} companies x {len(YEARS)} years)")
+
+    for label, kwargs in (
+        ("object / int64", {"compact": False}),
+        ("compact", {"compact": True}),
+        ("compact + float32", {"compact": True, "float32_amounts": True}),
+    ):
+        df = normalize_financial_df(raw, **kwargs)
+        mib = df.memory_usage(deep=True).sum() / 2**20
+        print(
+            f"{label:<18} memory {mib:8.1f} MiB  "
+            f"groupby {groupby_seconds(df) * 1000:8.1f} ms  "
+            f"Amount {df['Amount'].dtype}"
+        )
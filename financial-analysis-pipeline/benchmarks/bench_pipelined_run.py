@@ -0,0 +1,96 @@
+# benchmarks/bench_pipelined_run.py
+#
+# End-to-end afap_run time with engines and LLM calls run back to back
+# versus pipelined by company shard (run_pipelined), against a simulated
+# LLM client with a fixed per-call latency (no network).
+#
+#   python benchmarks/bench_pipelined_run.py [n_companies] [latency_ms]
+
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from afap_ai_engine.fake_stream_server import DEFAULT_REPORT
+from orchestrator.orchestrator import afap_run
+
+N_COMPANIES = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+LATENCY = (float(sys.argv[2]) if len(sys.argv) > 2 else 6.0) / 1000
+YEARS = range(2015, 2025)
+PROFILE = "full_diagnostic"
+
+LINE_ITEMS = [
+    ("Assets", "Current Assets", 500_000, 2_000_000),
+    ("Assets", "Non-Current Assets", 1_000_000, 5_000_000),
+    ("Assets", "Inventory", 50_000, 300_000),
+    ("Liabilities", "Current Liabilities", 300_000, 1_500_000),
+    ("Liabilities", "Non-Current Liabilities", 500_000, 3_000_000),
+    ("Equity", "Equity", 800_000, 4_000_000),
+    ("Revenue", "Revenue", 2_000_000, 6_000_000),
+    ("Expenses", "COGS", 800_000, 2_500_000),
+    ("Expenses", "Operating Expenses", 400_000, 1_500_000),
+    ("Expenses", "Finance Costs", 50_000, 400_000),
+    ("Expenses", "Tax", 50_000, 300_000),
+]
+
+
+class SimulatedClient:
+    """
+    Stands in for OpenAI(): every responses.create call sleeps LATENCY.
+    """
+
+    def __init__(self):
+        self.responses = self
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def create(self, model, input, stream=False):
+        with self._lock:
+            self.calls += 1
+        time.sleep(LATENCY)
+        return SimpleNamespace(output_text=DEFAULT_REPORT)
+
+
+def synthetic_financials():
+    rng = np.random.default_rng(0)
+    rows = [
+        (f"Company {c:04d}", year, category, subcategory, int(rng.integers(low, high)))
+        for c in range(N_COMPANIES)
+        for year in YEARS
+        for category, subcategory, low, high in LINE_ITEMS
+    ]
+    return pd.DataFrame(rows, columns=["Company", "Year", "FS Category", "FS Subcategory", "Amount"])
+
+
+def timed(**kwargs):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        outputs = afap_run(DF, analysis_profile=PROFILE, llm_client=SimulatedClient(), **kwargs)
+    return time.perf_counter() - start, outputs
+
+
+if __name__ == "__main__":
+    DF = synthetic_financials()
+    n_records = N_COMPANIES * len(YEARS)
+    print(f"{N_COMPANIES} companies x {len(YEARS)} years, {LATENCY * 1000:.0f} ms per LLM call")
+
+    compute, _ = timed(use_mock_ai=True)
+    llm = n_records * LATENCY
+    print(f"engines only      {compute:6.2f} s")
+    print(f"LLM only (serial) {llm:6.2f} s")
+
+    sequential, baseline = timed()
+    print(f"sequential        {sequential:6.2f} s")
+
+    for workers in (1, 4):
+        seconds, outputs = timed(pipeline_shard_size=5, llm_workers=workers)
+        same = repr(outputs) == repr(baseline)
+        print(f"pipelined x{workers}      {seconds:6.2f} s  identical outputs: {same}")
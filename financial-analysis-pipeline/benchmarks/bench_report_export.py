@@ -0,0 +1,89 @@
+# benchmarks/bench_report_export.py
+#
+# Report export from a run directory two ways, wall time and peak
+# traced memory:
+#   DataFrame — every stream read into memory, json_normalize'd into
+#               one DataFrame and written in one go (the notebook path)
+#   streamed  — storage.report_export.export_run_dir (fixed schema,
+#               row batches; xlsx / parquet only if openpyxl / pyarrow
+#               are installed)
+# The run is produced by afap_run against bench_pipelined_run's
+# simulated LLM client with no latency, so interpretations carry a
+# full-length report.
+#
+#   python benchmarks/bench_report_export.py [n_companies]
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import bench_pipelined_run
+from bench_pipelined_run import N_COMPANIES, PROFILE, YEARS, SimulatedClient, synthetic_financials
+from orchestrator.orchestrator import afap_run
+from storage.report_export import EXPORT_SHEETS, export_run_dir
+from storage.run_sink import read_stream
+
+bench_pipelined_run.LATENCY = 0.0
+
+
+def dataframe_export(run_dir, out_dir, fmt):
+    frames = {sheet: pd.json_normalize(list(read_stream(run_dir, sheet))) for sheet in EXPORT_SHEETS}
+    if fmt == "csv":
+        os.makedirs(out_dir, exist_ok=True)
+        for sheet, frame in frames.items():
+            frame.to_csv(os.path.join(out_dir, f"{sheet}.csv"), index=False)
+    else:
+        with pd.ExcelWriter(out_dir + ".xlsx") as writer:
+            for sheet, frame in frames.items():
+                frame.to_excel(writer, sheet_name=sheet, index=False)
+    return {sheet: len(frame) for sheet, frame in frames.items()}
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 2 ** 20, result
+
+
+def installed(module):
+    try:
+        __import__(module)
+    except ImportError:
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        run_dir = os.path.join(tmp, "run")
+        with contextlib.redirect_stdout(io.StringIO()):
+            afap_run(synthetic_financials(), analysis_profile=PROFILE, llm_client=SimulatedClient(), run_dir=run_dir)
+        print(f"{N_COMPANIES} companies x {len(YEARS)} years, profile {PROFILE}")
+
+        for fmt, module in (("csv", None), ("xlsx", "openpyxl"), ("parquet", "pyarrow")):
+            if module is not None and not installed(module):
+                print(f"{fmt:8s} skipped ({module} not installed)")
+                continue
+
+            counts = None
+            if fmt != "parquet":
+                seconds, peak, counts = measure(dataframe_export, run_dir, os.path.join(tmp, f"frame_{fmt}"), fmt)
+                print(f"{fmt:8s} DataFrame  {seconds:6.2f} s  peak {peak:7.1f} MiB")
+
+            target = os.path.join(tmp, "stream.xlsx" if fmt == "xlsx" else f"stream_{fmt}")
+            seconds, peak, written = measure(export_run_dir, run_dir, target, fmt)
+            print(f"{fmt:8s} streamed   {seconds:6.2f} s  peak {peak:7.1f} MiB  ({sum(written.values()):,} rows)")
+            if counts is not None:
+                print(f"{fmt:8s} same row counts: {counts == written}")
@@ -0,0 +1,137 @@
+# benchmarks/bench_rollup.py
+#
+# Nightly portfolio aggregates (band distribution per year, solvency
+# "action" counts and weighted average debt / equity per sector, debt /
+# equity quantiles) two ways:
+#   full        — re-aggregate the complete output lists with pandas
+#   incremental — PortfolioRollup.add() of only the restated rows
+# plus a 4-shard build combined with merge().
+#
+#   python benchmarks/bench_rollup.py [n_companies] [restated_fraction]
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from engines.rollup_engine import PortfolioRollup
+
+N_COMPANIES = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+RESTATED = float(sys.argv[2]) if len(sys.argv) > 2 else 0.01
+YEARS = range(2015, 2025)
+SECTORS = ["Airlines", "Banking", "Energy", "Manufacturing", "Retail", "Telecoms", "Utilities", "Mining"]
+
+rng = np.random.default_rng(0)
+SECTOR_OF = {f"Company {c:05d}": SECTORS[c % len(SECTORS)] for c in range(N_COMPANIES)}
+WEIGHT_OF = {company: float(w) for company, w in zip(SECTOR_OF, rng.uniform(1, 100, N_COMPANIES))}
+
+
+def synthetic_outputs(companies, seed):
+    rng = np.random.default_rng(seed)
+    keys = [(c, y) for c in companies for y in YEARS]
+    scores = rng.choice([0, 1, 2, 3, 4, 5], size=len(keys))
+    debt_equity = rng.lognormal(0.0, 0.8, size=len(keys))
+    coverage = rng.lognormal(0.5, 0.7, size=len(keys))
+
+    composite, solvency = [], []
+    for (company, year), score, de, ic in zip(keys, scores.tolist(), debt_equity.tolist(), coverage.tolist()):
+        composite.append({
+            "Company": company, "Year": year, "composite_score": score,
+            "risk_band": "high" if score >= 4 else "medium" if score >= 2 else "low"
+        })
+        count = (de > 1.5) + (ic < 1.5)
+        solvency.append({
+            "engine": "solvency_engine", "Company": company, "Year": year,
+            "metrics": {"debt_equity": de, "interest_coverage": ic},
+            "severity": "action" if count == 2 else "watch" if count == 1 else "stable"
+        })
+    return composite, solvency
+
+
+def full_aggregates(composite, solvency):
+    comp = pd.DataFrame(composite)
+    solv = pd.DataFrame({
+        "Company": [r["Company"] for r in solvency],
+        "Year": [r["Year"] for r in solvency],
+        "severity": [r["severity"] for r in solvency],
+        "debt_equity": [r["metrics"]["debt_equity"] for r in solvency]
+    })
+    solv["sector"] = solv["Company"].map(SECTOR_OF)
+    solv["weight"] = solv["Company"].map(WEIGHT_OF)
+    solv["weighted"] = solv["weight"] * solv["debt_equity"]
+
+    bands = comp.groupby(["Year", "risk_band"]).size().unstack(fill_value=0)
+    groups = solv.groupby(["Year", "sector"])
+    actions = (solv["severity"] == "action").groupby([solv["Year"], solv["sector"]]).sum()
+    leverage = groups["weighted"].sum() / groups["weight"].sum()
+    p90 = groups["debt_equity"].quantile(0.9, interpolation="lower")
+    return bands, actions, leverage, p90
+
+
+def check(rollup, aggregates):
+    bands, actions, leverage, p90 = aggregates
+    distribution = rollup.band_distribution()
+    bands_ok = all(distribution[y][b] == bands.loc[y, b] for y in bands.index for b in bands.columns)
+    actions_ok = all(rollup.severity_count("action", y, s) == n for (y, s), n in actions.items())
+    leverage_err = max(abs(rollup.weighted_leverage(y, s) - v) / abs(v) for (y, s), v in leverage.items())
+    p90_err = max(abs(rollup.leverage_quantile(y, s, 0.9) - v) / abs(v) for (y, s), v in p90.items())
+    return f"bands {bands_ok}, actions {actions_ok}, leverage rel err {leverage_err:.1e}, p90 rel err {p90_err:.4f}"
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    companies = list(SECTOR_OF)
+    composite, solvency = synthetic_outputs(companies, seed=1)
+    n_rows = len(composite)
+    print(f"{N_COMPANIES:,} companies x {len(YEARS)} years = {n_rows:,} company-years, {len(SECTORS)} sectors")
+
+    seconds, aggregates = timed(full_aggregates, composite, solvency)
+    print(f"full re-aggregation     {seconds * 1000:8.1f} ms")
+
+    rollup = PortfolioRollup(sectors=SECTOR_OF, weights=WEIGHT_OF)
+    seconds, _ = timed(rollup.add, composite, solvency)
+    print(f"rollup initial build    {seconds * 1000:8.1f} ms  ({check(rollup, aggregates)})")
+
+    # Restate a fraction of company-years
+    n_restated = max(1, int(n_rows * RESTATED))
+    picks = rng.choice(n_rows, size=n_restated, replace=False)
+    new_composite, new_solvency = synthetic_outputs(companies, seed=2)
+    changed_composite = [new_composite[i] for i in picks]
+    changed_solvency = [new_solvency[i] for i in picks]
+    for i in picks:
+        composite[i], solvency[i] = new_composite[i], new_solvency[i]
+
+    seconds, aggregates = timed(full_aggregates, composite, solvency)
+    print(f"full after restatement  {seconds * 1000:8.1f} ms")
+    seconds, _ = timed(rollup.add, changed_composite, changed_solvency)
+    print(f"incremental {n_restated:>6,} rows {seconds * 1000:8.1f} ms  ({check(rollup, aggregates)})")
+
+    # Shards over disjoint companies, merged
+    shards = []
+    for k in range(4):
+        shard_companies = set(companies[k::4])
+        shard = PortfolioRollup(sectors=SECTOR_OF, weights=WEIGHT_OF)
+        shard.add(
+            [r for r in composite if r["Company"] in shard_companies],
+            [r for r in solvency if r["Company"] in shard_companies]
+        )
+        shards.append(shard)
+    merged = PortfolioRollup(sectors=SECTOR_OF, weights=WEIGHT_OF)
+    seconds, _ = timed(lambda: [merged.merge(s) for s in shards])
+    print(f"merge of 4 shards       {seconds * 1000:8.1f} ms  ({check(merged, aggregates)})")
+    same = all(
+        a.keys() == b.keys() and all(
+            a[k] == b[k] or (isinstance(a[k], float) and abs(a[k] - b[k]) <= 1e-12 * abs(b[k])) for k in a
+        )
+        for a, b in zip(merged.rollup_rows(), rollup.rollup_rows())
+    )
+    print(f"merged rollup_rows match the single rollup (floats to 1e-12): {same}")
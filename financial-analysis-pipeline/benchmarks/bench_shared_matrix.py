@@ -0,0 +1,84 @@
+# benchmarks/bench_shared_matrix.py
+#
+# Process-pool ratio computation over a line-item matrix, moving data
+# to and from workers two ways:
+#   pickled — each task ships its block of line items and returns its
+#             ratio block and severity codes (pickled both ways)
+#   shared  — each task gets a workspace descriptor and a row range and
+#             writes into preallocated shared output arrays
+#             (engines.shared_matrix), for both shm and mmap backings.
+#
+#   python benchmarks/bench_shared_matrix.py [n_company_years] [n_workers]
+
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from engines.ratio_matrix import LINE_ITEMS, compute_ratio_arrays
+from engines.ratio_engine_eval import DEFAULT_CONFIG, evaluate_ratio_arrays
+from engines.records import RATIO_METRICS
+from engines.shared_matrix import SharedRatioWorkspace, compute_ratio_block
+
+N_ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+N_WORKERS = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+CHUNK_SIZE = 65_536
+
+
+def synthetic_line_items():
+    rng = np.random.default_rng(0)
+    return rng.uniform(50_000, 5_000_000, size=(N_ROWS, len(LINE_ITEMS)))
+
+
+def pickled_block(values):
+    ratios = compute_ratio_arrays(values)
+    _, severity_codes = evaluate_ratio_arrays(ratios, DEFAULT_CONFIG)
+    return np.column_stack([ratios[m] for m in RATIO_METRICS]), severity_codes
+
+
+def run_pickled(executor, values):
+    blocks = [values[start:start + CHUNK_SIZE] for start in range(0, N_ROWS, CHUNK_SIZE)]
+    results = list(executor.map(pickled_block, blocks))
+    payload = sum(len(pickle.dumps(b, protocol=pickle.HIGHEST_PROTOCOL)) for b in blocks)
+    payload += sum(len(pickle.dumps(r, protocol=pickle.HIGHEST_PROTOCOL)) for r in results)
+    return np.concatenate([r[0] for r in results]), np.concatenate([r[1] for r in results]), payload
+
+
+def run_shared(executor, values, backing):
+    with SharedRatioWorkspace(values, backing) as workspace:
+        descriptor = workspace.descriptor
+        bounds = [(start, min(start + CHUNK_SIZE, N_ROWS)) for start in range(0, N_ROWS, CHUNK_SIZE)]
+        list(executor.map(compute_ratio_block, *zip(*[(descriptor, start, stop) for start, stop in bounds])))
+        payload = sum(len(pickle.dumps((descriptor, start, stop))) for start, stop in bounds)
+        return workspace.ratios.array.copy(), workspace.severity_codes.array.copy(), payload
+
+
+def timed(fn, *args, repeat=3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+    values = synthetic_line_items()
+    print(f"{N_ROWS:,} company-years, {N_WORKERS} workers, {CHUNK_SIZE:,} rows per task")
+
+    with ProcessPoolExecutor(max_workers=N_WORKERS) as executor:
+        # Warm the pool so process start-up is not charged to either side
+        list(executor.map(pickled_block, [values[:10]] * N_WORKERS))
+
+        seconds, (ratios, severity, payload) = timed(run_pickled, executor, values)
+        print(f"{'pickled':<8} {seconds:7.2f} s  transferred {payload / 2**20:8.1f} MiB")
+
+        for backing in ("shm", "mmap"):
+            seconds, (shared_ratios, shared_severity, payload) = timed(run_shared, executor, values, backing)
+            identical = np.array_equal(ratios, shared_ratios, equal_nan=True) and np.array_equal(severity, shared_severity)
+            print(f"{backing:<8} {seconds:7.2f} s  transferred {payload / 2**20:8.3f} MiB  identical: {identical}")
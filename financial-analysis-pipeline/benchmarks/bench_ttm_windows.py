@@ -0,0 +1,81 @@
+# benchmarks/bench_ttm_windows.py
+#
+# Trailing-twelve-month windows over a synthetic quarterly portfolio
+# (bench_fused_engines' line items, its years re-read as consecutive
+# quarters, with some filings dropped to leave gaps) two ways:
+#   rolling   — wide pivot reindexed onto each company's full quarter
+#               grid, then groupby("Company").rolling(4).sum() (reference)
+#   shifted   — engines.period_model.ttm_financials (one sorted matrix,
+#               per_year shifted adds, consecutiveness by period ordinal)
+# and checks both give the same windows and flows.
+#
+#   python benchmarks/bench_ttm_windows.py [n_companies]
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bench_fused_engines import N_COMPANIES, YEARS, synthetic_financials
+from engines.period_model import FLOW_ITEMS, ttm_financials
+from engines.ratio_matrix import LINE_ITEMS
+
+DROP_RATE = 0.02
+FLOW_LINES = [LINE_ITEMS[name] for name in FLOW_ITEMS]
+
+
+def quarterly_financials():
+    df = synthetic_financials()
+    quarter_index = df["Year"].to_numpy() - min(YEARS)
+    df["Year"] = 2015 + quarter_index // 4
+    df["Quarter"] = quarter_index % 4 + 1
+    keep = np.random.default_rng(1).random(len(df)) >= DROP_RATE
+    return df[keep].reset_index(drop=True)
+
+
+def rolling_ttm(financials):
+    df = financials.assign(Ordinal=financials["Year"] * 4 + financials["Quarter"] - 1)
+    df = df[df["FS Subcategory"].isin([s for _, s in FLOW_LINES])]
+    wide = df.pivot_table(index=["Company", "Ordinal"], columns="FS Subcategory", values="Amount", aggfunc="sum")
+
+    grids = []
+    for company, group in wide.groupby(level="Company"):
+        ordinals = group.index.get_level_values("Ordinal")
+        grid = pd.MultiIndex.from_product([[company], range(ordinals.min(), ordinals.max() + 1)], names=wide.index.names)
+        grids.append(group.reindex(grid))
+    wide = pd.concat(grids)
+
+    rolled = wide.groupby(level="Company").rolling(4, min_periods=4).sum().droplevel(0)
+    present = wide.notna().groupby(level="Company").rolling(4, min_periods=4).sum().droplevel(0)
+    rolled = rolled.where(present == 4)
+    return rolled.dropna(how="all")
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    financials = quarterly_financials()
+    print(f"{N_COMPANIES:,} companies x {len(YEARS)} quarters ({len(financials):,} line items, {DROP_RATE:.0%} dropped)")
+
+    seconds, reference = timed(rolling_ttm, financials)
+    print(f"groupby().rolling(4).sum()   {seconds:7.3f} s")
+
+    seconds, windows = timed(ttm_financials, financials, "Q")
+    print(f"ttm_financials (shifted)     {seconds:7.3f} s")
+
+    flows = windows[windows["FS Subcategory"].isin([s for _, s in FLOW_LINES])]
+    shifted = flows.assign(Ordinal=flows["Year"] // 100 * 4 + flows["Year"] % 100 - 1).pivot_table(
+        index=["Company", "Ordinal"], columns="FS Subcategory", values="Amount", aggfunc="sum"
+    )
+    reference = reference.reindex(index=shifted.index.union(reference.index), columns=shifted.columns)
+    shifted = shifted.reindex(index=reference.index)
+    same = np.allclose(shifted.to_numpy(), reference.to_numpy(), rtol=1e-12, equal_nan=True)
+    print(f"{len(shifted):,} windows; TTM flows match the rolling reference: {same}")
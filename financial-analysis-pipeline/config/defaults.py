@@ -39,3 +39,39 @@ DEFAULT_CLIENT_CONFIG = {
     # Feature flags (optional future expansion)
     "features_enabled": []
 }
+
+
+# ------------------------------------------------------------------
+# Analysis Profiles (AIFs – AFAP Interpretation Frameworks)
+# ------------------------------------------------------------------
+
+ANALYSIS_PROFILES = {
+    "full_diagnostic": {
+        "engines": ["ratio", "trend", "cash_flow", "anomaly", "solvency", "composite_risk"],
+        "metrics_scope": "all"
+    },
+    "solvency_focus": {
+        "engines": ["ratio", "solvency", "composite_risk"],
+        "metrics_scope": ["debt_to_equity", "interest_coverage", "equity_ratio"]
+    },
+    "liquidity_focus": {
+        "engines": ["ratio", "trend", "cash_flow", "composite_risk"],
+        "metrics_scope": ["current_ratio", "quick_ratio", "cash_ratio"]
+    },
+    "performance_focus": {
+        "engines": ["ratio", "trend"],
+        "metrics_scope": ["operating_margin", "net_margin", "asset_turnover"]
+    },
+    "risk_scan": {
+        "engines": ["ratio", "solvency", "anomaly", "composite_risk"],
+        "metrics_scope": "all"
+    },
+    "going_concern_screen": {
+        "engines": ["ratio", "trend", "solvency", "composite_risk"],
+        "metrics_scope": "critical_only"
+    },
+    "cash_generation": {
+        "engines": ["ratio", "trend", "cash_flow_indirect", "solvency", "composite_risk"],
+        "metrics_scope": "critical_only"
+    }
+}
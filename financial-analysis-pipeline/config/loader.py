@@ -0,0 +1,227 @@
+# config/loader.py
+
+import hashlib
+import json
+from collections.abc import Mapping
+from pathlib import Path
+
+import yaml
+
+from config.defaults import ANALYSIS_PROFILES, DEFAULT_CLIENT_CONFIG
+from config.utils import merge_config
+
+# ------------------------------------------------------------------
+# AFAP Client Configuration Loader
+# ------------------------------------------------------------------
+# Client YAMLs are loaded once, validated, deep-merged with
+# DEFAULT_CLIENT_CONFIG and frozen. Frozen configs are immutable and
+# hashable, so they can be shared across requests and used directly
+# as cache keys (see FrozenConfig.config_hash).
+# ------------------------------------------------------------------
+
+CLIENTS_DIR = Path(__file__).resolve().parent / "clients"
+
+REQUIRED_RISK_WEIGHTS = ("trend", "cash_flow", "anomaly", "solvency")
+REQUIRED_RISK_BANDS = ("low", "medium", "high")
+
+# path -> (mtime_ns, FrozenConfig)
+_CONFIG_CACHE = {}
+
+
+class FrozenConfig(Mapping):
+    """
+    Immutable, hashable view of a merged client configuration.
+    Nested dicts are FrozenConfigs and lists are tuples.
+    """
+
+    __slots__ = ("_data", "_hash")
+
+    def __init__(self, data):
+        object.__setattr__(self, "_data", {k: freeze(v) for k, v in data.items()})
+        object.__setattr__(self, "_hash", None)
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __setattr__(self, name, value):
+        raise TypeError("FrozenConfig is immutable")
+
+    def __hash__(self):
+        return hash(self.config_hash)
+
+    def __eq__(self, other):
+        if isinstance(other, FrozenConfig):
+            return self.config_hash == other.config_hash
+        return Mapping.__eq__(self, other)
+
+    def __repr__(self):
+        return f"FrozenConfig({self.to_dict()!r})"
+
+    @property
+    def config_hash(self):
+        """
+        Stable SHA-256 of the canonical JSON form of this config.
+        """
+        if self._hash is None:
+            canonical = json.dumps(self.to_dict(), sort_keys=True, default=str)
+            object.__setattr__(self, "_hash", hashlib.sha256(canonical.encode("utf-8")).hexdigest())
+        return self._hash
+
+    def to_dict(self):
+        """
+        Returns a mutable deep copy (dicts and lists).
+        """
+        return thaw(self)
+
+
+def freeze(value):
+    if isinstance(value, FrozenConfig):
+        return value
+    if isinstance(value, Mapping):
+        return FrozenConfig(value)
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, set):
+        return frozenset(freeze(v) for v in value)
+    return value
+
+
+def thaw(value):
+    if isinstance(value, Mapping):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(v) for v in value]
+    if isinstance(value, frozenset):
+        return {thaw(v) for v in value}
+    return value
+
+
+# ------------------------------------------------------------------
+# Validation
+# ------------------------------------------------------------------
+
+def validate_client_config(config, source="client config"):
+    """
+    Validates a merged client configuration. Raises ValueError.
+    """
+    analysis = config.get("analysis")
+    if not isinstance(analysis, Mapping):
+        raise ValueError(f"{source}: 'analysis' section must be a mapping.")
+
+    weights = analysis.get("risk_weights", {})
+    missing = [k for k in REQUIRED_RISK_WEIGHTS if k not in weights]
+    if missing:
+        raise ValueError(f"{source}: missing risk_weights: {missing}")
+    for k, v in weights.items():
+        if not isinstance(v, (int, float)) or v < 0:
+            raise ValueError(f"{source}: risk_weights.{k} must be a non-negative number.")
+
+    bands = analysis.get("risk_bands", {})
+    missing = [k for k in REQUIRED_RISK_BANDS if k not in bands]
+    if missing:
+        raise ValueError(f"{source}: missing risk_bands: {missing}")
+    for k in REQUIRED_RISK_BANDS:
+        if not isinstance(bands[k], (int, float)):
+            raise ValueError(f"{source}: risk_bands.{k} must be a number.")
+    if not bands["low"] <= bands["medium"] <= bands["high"]:
+        raise ValueError(f"{source}: risk_bands must satisfy low <= medium <= high.")
+
+    default_profile = config.get("default_profile")
+    if default_profile is not None:
+        if default_profile not in ANALYSIS_PROFILES:
+            raise ValueError(f"{source}: unknown default_profile '{default_profile}'.")
+
+    features = config.get("features_enabled", ())
+    if not isinstance(features, (list, tuple)):
+        raise ValueError(f"{source}: 'features_enabled' must be a list.")
+
+    return config
+
+
+# ------------------------------------------------------------------
+# Loading & Caching
+# ------------------------------------------------------------------
+
+def compile_client_config(overrides, source="client config"):
+    """
+    Deep-merges overrides with DEFAULT_CLIENT_CONFIG, validates the
+    result and freezes it.
+    """
+    merged = merge_config(DEFAULT_CLIENT_CONFIG, overrides or {})
+    validate_client_config(merged, source)
+    return FrozenConfig(merged)
+
+
+def load_client_config(path):
+    """
+    Loads one client YAML as a FrozenConfig.
+    Re-reads the file only when its mtime changes.
+    """
+    path = Path(path).resolve()
+    mtime_ns = path.stat().st_mtime_ns
+
+    cached = _CONFIG_CACHE.get(path)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+
+    with open(path, "r", encoding="utf-8") as f:
+        overrides = yaml.safe_load(f) or {}
+
+    if not isinstance(overrides, dict):
+        raise ValueError(f"{path.name}: client config must be a mapping.")
+
+    config = compile_client_config(overrides, source=path.name)
+    _CONFIG_CACHE[path] = (mtime_ns, config)
+    return config
+
+
+def load_client_configs(clients_dir=CLIENTS_DIR):
+    """
+    Loads every client YAML in clients_dir, keyed by file stem
+    (e.g. "client_acme").
+    """
+    clients_dir = Path(clients_dir)
+    return {
+        path.stem: load_client_config(path)
+        for path in sorted(clients_dir.glob("*.y*ml"))
+    }
+
+
+def get_client_config(name, clients_dir=CLIENTS_DIR):
+    """
+    Returns the FrozenConfig for a client by file stem, with or
+    without the "client_" prefix.
+    """
+    configs = load_client_configs(clients_dir)
+    for key in (name, f"client_{name}"):
+        if key in configs:
+            return configs[key]
+    raise ValueError(f"Unknown client config: {name}")
+
+
+def resolve_client_config(client_config=None):
+    """
+    Returns a FrozenConfig for whatever afap_run was given: an already
+    compiled FrozenConfig is passed through, dicts are compiled.
+    """
+    if isinstance(client_config, FrozenConfig):
+        return client_config
+    if not client_config:
+        return default_client_config()
+    return compile_client_config(client_config)
+
+
+_DEFAULT_CONFIG = None
+
+
+def default_client_config():
+    global _DEFAULT_CONFIG
+    if _DEFAULT_CONFIG is None:
+        _DEFAULT_CONFIG = compile_client_config({}, source="DEFAULT_CLIENT_CONFIG")
+    return _DEFAULT_CONFIG
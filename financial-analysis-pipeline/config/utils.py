@@ -1,8 +1,15 @@
+import copy
+
+
 def merge_config(defaults, overrides):
-    merged = defaults.copy()
+    """
+    Deep-merges overrides into defaults without sharing nested
+    containers with either input.
+    """
+    merged = copy.deepcopy(defaults)
     for k, v in overrides.items():
         if isinstance(v, dict) and isinstance(merged.get(k), dict):
             merged[k] = merge_config(merged[k], v)
         else:
-            merged[k] = v  # replace completely if not both dicts
+            merged[k] = copy.deepcopy(v)  # replace completely if not both dicts
     return merged
@@ -1,10 +1,17 @@
+import numpy as np
 import pandas as pd
-from .schema_validator import validate_engine_output
+from .records import AnomalyRow, finalize_records
+from .period_model import PERIOD_KEY_BASE
 
-def anomaly_efficiency_engine(ratios_list):
+def anomaly_efficiency_engine(ratios_list, compact=False, periods=1):
     """
     AFAP Phase 3 — Locked Efficiency Anomaly Engine
     Detects abnormal ROA changes year-over-year.
+    With compact=True, returns slotted AnomalyRow records instead of dicts.
+
+    periods is the number of rows per year: periods_per_year for TTM
+    windows keyed by period, so each window is compared with the window
+    ending a year earlier (no change if that window is missing).
     """
 
     df = pd.DataFrame(ratios_list)
@@ -21,7 +28,9 @@ def anomaly_efficiency_engine(ratios_list):
 
     for company, grp in df.groupby("Company"):
         grp = grp.sort_values("Year").reset_index(drop=True)
-        grp["roa_yoy"] = grp["roa"].pct_change()
+        grp["roa_yoy"] = grp["roa"].pct_change(periods=periods)
+        if periods > 1:
+            grp.loc[grp["Year"].shift(periods) != grp["Year"] - PERIOD_KEY_BASE, "roa_yoy"] = np.nan
 
         for _, row in grp.iterrows():
             flags = {
@@ -40,23 +49,13 @@ def anomaly_efficiency_engine(ratios_list):
                 else "normal"
             )
 
-            results.append({
-                "engine": "anomaly_efficiency_engine",
-                "Company": row["Company"],
-                "Year": int(row["Year"]),
-                "metrics": {
-                    "roa_yoy": row["roa_yoy"]
-                },
-                "flags": flags,
-                "severity": severity,
-                "explanation": (
-                    "Abnormal efficiency change detected."
-                    if severity != "normal"
-                    else "Efficiency metrics stable."
-                )
-            })
+            results.append(AnomalyRow(
+                row["Company"],
+                int(row["Year"]),
+                (row["roa_yoy"],),
+                (flags["roa_shock"],),
+                severity
+            ))
 
     # ✅ Validation MUST be inside the function
-    validate_engine_output(results, "anomaly_efficiency_engine")
-
-    return results
+    return finalize_records(results, "anomaly_efficiency_engine", compact)
@@ -1,12 +1,13 @@
 import pandas as pd
-from .schema_validator import validate_engine_output
+from .records import CashFlowRow, finalize_records
 from .data_normalizer import normalize_financial_df  # ✅ import normalizer
 
-def cash_flow_engine(financials: pd.DataFrame) -> list:
+def cash_flow_engine(financials: pd.DataFrame, compact: bool = False) -> list:
     """
     AFAP Phase 3 — Cash Flow Health Engine
     Produces top-level severity for composite risk scoring.
     Automatically normalizes raw Amount data.
+    With compact=True, returns slotted CashFlowRow records instead of dicts.
     """
 
     # ✅ Normalize financials at the start
@@ -14,7 +15,7 @@ def cash_flow_engine(financials: pd.DataFrame) -> list:
 
     results = []
 
-    for (company, year), group in financials.groupby(["Company", "Year"]):
+    for (company, year), group in financials.groupby(["Company", "Year"], observed=True):
 
         def get_amount(category, subcategory):
             row = group[
@@ -58,29 +59,14 @@ def cash_flow_engine(financials: pd.DataFrame) -> list:
         else:
             severity = "stable"
 
-        # Explanation
-        explanation = (
-            "Operating activities do not appear to generate sufficient cash to cover financing obligations."
-            if severity == "action"
-            else "Cash generation shows signs of pressure and warrants monitoring."
-            if severity == "watch"
-            else "Operating activities appear sufficient to sustain financing needs."
-        )
-
-        # ✅ Append AFAP Phase-3 compliant row
-        results.append({
-            "engine": "cash_flow_engine",
-            "Company": company,
-            "Year": year,
-            "metrics": {
-                "operating_profit": operating_profit,
-                "coverage_proxy": coverage_proxy
-            },
-            "flags": flags,
-            "severity": severity,
-            "explanation": explanation
-        })
+        # ✅ Append AFAP Phase-3 compliant row (explanation resolved from severity)
+        results.append(CashFlowRow(
+            company,
+            year,
+            (operating_profit, coverage_proxy),
+            (flags["negative_operating_profit"], flags["weak_coverage"]),
+            severity
+        ))
 
     # ✅ Validation inside the function
-    validate_engine_output(results, "cash_flow_engine")
-    return results
+    return finalize_records(results, "cash_flow_engine", compact)
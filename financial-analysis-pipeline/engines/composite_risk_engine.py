@@ -1,17 +1,27 @@
+import json
+
+import numpy as np
+
+
 def composite_risk_engine(
     trend_results,
     cash_results,
     anomaly_results,
     solvency_results,
-    config
+    config,
+    return_matrix=False
 ):
-    def index(results):
-        return {(r["Company"], r["Year"]): r for r in results}
-
-    t = index(trend_results)
-    c = index(cash_results)
-    a = index(anomaly_results)
-    s = index(solvency_results)
+    """
+    AFAP Phase 3 — Composite Risk Engine
+    Weighted sum of the engine severities that count towards risk,
+    banded by config["analysis"]. With return_matrix=True, returns
+    (rows, SeverityMatrix) so the run can be re-scored under other
+    weights / bands without recomputing any engine (see rescore).
+    """
+    t = _index(trend_results)
+    c = _index(cash_results)
+    a = _index(anomaly_results)
+    s = _index(solvency_results)
 
     analysis_cfg = config["analysis"]
     weights = analysis_cfg["risk_weights"]
@@ -48,4 +58,199 @@ def composite_risk_engine(
             "risk_band": band
         })
 
+    if return_matrix:
+        return rows, SeverityMatrix.from_indexes(t, c, a, s, config["analysis"])
     return rows
+
+
+def _index(results):
+    return {(r["Company"], r["Year"]): r for r in results}
+
+
+# ------------------------------------------------------------------
+# Severity Matrix (company-year x engine)
+# ------------------------------------------------------------------
+
+# Matrix columns, in the order composite_risk_engine adds their weights
+MATRIX_ENGINES = ("cash_flow", "anomaly", "solvency", "trend")
+
+# The severity at which each engine counts towards the composite score
+SCORING_SEVERITY = {
+    "cash_flow": "watch",
+    "anomaly": "high",
+    "solvency": "action",
+    "trend": "watch"
+}
+
+SEVERITY_CODES = {"stable": 0, "normal": 1, "watch": 2, "action": 3, "high": 4}
+MISSING_SEVERITY = -1
+
+SEVERITY_MATRIX_FILE = "severity_matrix.npz"
+
+
+class SeverityMatrix:
+    """
+    One row per composite risk company-year, one int8 severity code per
+    engine in MATRIX_ENGINES (MISSING_SEVERITY where the engine has no
+    record), plus the analysis config the run was scored with.
+    """
+
+    def __init__(self, companies, years, codes, analysis_config):
+        self.companies = np.asarray(companies)
+        self.years = np.asarray(years, dtype=np.int64)
+        self.codes = np.asarray(codes, dtype=np.int8)
+        self.analysis_config = {
+            "risk_weights": dict(analysis_config["risk_weights"]),
+            "risk_bands": dict(analysis_config["risk_bands"])
+        }
+        self._patterns = None
+
+    def __len__(self):
+        return len(self.years)
+
+    @classmethod
+    def from_indexes(cls, trend, cash, anomaly, solvency, analysis_config):
+        # Rows follow the trend keys, exactly like composite_risk_engine
+        indexes = {"cash_flow": cash, "anomaly": anomaly, "solvency": solvency, "trend": trend}
+        keys = list(trend)
+        codes = np.full((len(keys), len(MATRIX_ENGINES)), MISSING_SEVERITY, dtype=np.int8)
+        for j, engine in enumerate(MATRIX_ENGINES):
+            index = indexes[engine]
+            for i, key in enumerate(keys):
+                record = index.get(key)
+                if record is not None:
+                    codes[i, j] = SEVERITY_CODES.get(record["severity"], MISSING_SEVERITY)
+        return cls([k[0] for k in keys], [k[1] for k in keys], codes, analysis_config)
+
+    @classmethod
+    def from_outputs(cls, outputs, analysis_config):
+        """
+        Matrix of an AFAP run's outputs, scored with analysis_config.
+        """
+        return cls.from_indexes(
+            _index(outputs.get("trend", [])),
+            _index(outputs.get("cash_flow", [])),
+            _index(outputs.get("anomaly", [])),
+            _index(outputs.get("solvency", [])),
+            analysis_config
+        )
+
+    def triggers(self):
+        """
+        Boolean (rows, engines): engine severity counts towards the score.
+        """
+        scoring = np.array([SEVERITY_CODES[SCORING_SEVERITY[e]] for e in MATRIX_ENGINES], dtype=np.int8)
+        return self.codes == scoring
+
+    def patterns(self):
+        """
+        Trigger pattern per row: bit j set when MATRIX_ENGINES[j] counts.
+        """
+        if self._patterns is None:
+            bits = 1 << np.arange(len(MATRIX_ENGINES), dtype=np.int64)
+            self._patterns = self.triggers() @ bits
+        return self._patterns
+
+    def save(self, path):
+        np.savez_compressed(
+            path,
+            companies=self.companies.astype(str),
+            years=self.years,
+            codes=self.codes,
+            engines=np.array(MATRIX_ENGINES),
+            analysis_config=np.array(json.dumps(self.analysis_config))
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            if tuple(data["engines"].tolist()) != MATRIX_ENGINES:
+                raise ValueError(f"Severity matrix columns {data['engines'].tolist()} do not match {MATRIX_ENGINES}")
+            return cls(data["companies"], data["years"], data["codes"], json.loads(str(data["analysis_config"])))
+
+
+# ------------------------------------------------------------------
+# What-If Re-Scoring
+# ------------------------------------------------------------------
+
+RISK_BANDS = ("low", "medium", "high")
+
+
+def _pattern_table(analysis_config):
+    # Score and band code of each of the 2**len(MATRIX_ENGINES) trigger
+    # patterns, added up exactly as composite_risk_engine does
+    weights = analysis_config["risk_weights"]
+    bands = analysis_config["risk_bands"]
+    scores, codes = [], []
+    for pattern in range(2 ** len(MATRIX_ENGINES)):
+        score = 0
+        for j, engine in enumerate(MATRIX_ENGINES):
+            if pattern >> j & 1:
+                score += weights[engine]
+        scores.append(score)
+        codes.append(2 if score >= bands["high"] else 1 if score >= bands["medium"] else 0)
+    return np.array(scores, dtype=np.float64), np.array(codes, dtype=np.int8)
+
+
+def score_matrix(matrix, analysis_config):
+    """
+    (scores, bands) for every matrix row under analysis_config; the
+    same values composite_risk_engine produces with that config.
+    """
+    scores, codes = _pattern_table(analysis_config)
+    patterns = matrix.patterns()
+    return scores[patterns], np.array(RISK_BANDS)[codes[patterns]]
+
+
+def rescore(matrix, analysis_configs, baseline_config=None, changed_rows=True):
+    """
+    Applies each of analysis_configs (partial "analysis" dicts: missing
+    risk_weights / risk_bands entries fall back to baseline_config,
+    itself defaulting to the config the matrix was scored with).
+
+    Four engines give only 16 trigger patterns, so a config costs one
+    16-entry score table and a table lookup per company-year.
+
+    Returns one result per config:
+      {"analysis": the full config, "band_counts": {band: n},
+       "n_changed": company-years whose band differs from the baseline,
+       "changed": those rows (unless changed_rows=False), each
+       {"Company", "Year", "composite_score", "risk_band",
+        "previous_score", "previous_band"}}
+    """
+    baseline_config = baseline_config or matrix.analysis_config
+    base_scores, base_codes = _pattern_table(baseline_config)
+    patterns = matrix.patterns()
+    pattern_counts = np.bincount(patterns, minlength=len(base_codes))
+
+    results = []
+    for overrides in analysis_configs:
+        config = {
+            "risk_weights": {**baseline_config["risk_weights"], **overrides.get("risk_weights", {})},
+            "risk_bands": {**baseline_config["risk_bands"], **overrides.get("risk_bands", {})}
+        }
+        scores, codes = _pattern_table(config)
+        moved = codes != base_codes
+
+        result = {
+            "analysis": config,
+            "band_counts": {
+                band: int(pattern_counts[codes == code].sum()) for code, band in enumerate(RISK_BANDS)
+            },
+            "n_changed": int(pattern_counts[moved].sum())
+        }
+        if changed_rows:
+            changed = np.flatnonzero(np.isin(patterns, np.flatnonzero(moved)))
+            result["changed"] = [
+                {
+                    "Company": matrix.companies[i].item(),
+                    "Year": int(matrix.years[i]),
+                    "composite_score": scores[p].item(),
+                    "risk_band": RISK_BANDS[codes[p]],
+                    "previous_score": base_scores[p].item(),
+                    "previous_band": RISK_BANDS[base_codes[p]]
+                }
+                for i, p in zip(changed.tolist(), patterns[changed].tolist())
+            ]
+        results.append(result)
+    return results
@@ -1,5 +1,21 @@
-import pandas as pd 
-def normalize_financial_df(df):
+import numpy as np
+import pandas as pd
+
+# Label columns that repeat a handful of values across every row
+CATEGORICAL_COLUMNS = ['Company', 'FS Category', 'FS Subcategory', 'Statement', 'TaxType']
+
+# frame.attrs key marking a frame as already normalized, with the
+# settings it was normalized with; such frames are not normalized again
+NORMALIZED_ATTR = 'afap_normalized'
+
+def normalization_settings(compact=True, float32_amounts=False):
+    return {'compact': bool(compact), 'float32_amounts': bool(float32_amounts)}
+
+def normalize_financial_df(df, compact=True, float32_amounts=False):
+    settings = normalization_settings(compact, float32_amounts)
+    if df.attrs.get(NORMALIZED_ATTR) == settings:
+        return df.copy(deep=False)
+
     df = df.copy()# Clean raw formatting
     df['Amount'] = (
         df['Amount']
@@ -21,4 +37,31 @@ def normalize_financial_df(df):
     ].abs()# Tax logic (credit vs expense)
     df.loc[(df['FS Category'] =='Tax') & (df['Amount'] >0),'TaxType'] ='Expense'
     df.loc[(df['FS Category'] =='Tax') & (df['Amount'] <0),'TaxType'] ='Credit'
-    return df
\ No newline at end of file
+
+    if compact:
+        df = compact_financial_df(df, float32_amounts=float32_amounts)
+    df.attrs[NORMALIZED_ATTR] = settings
+    return df
+
+def compact_financial_df(df, float32_amounts=False, rtol=1e-6):
+    """
+    Shrinks a normalized frame:
+    label columns become categoricals (groupbys then run on the integer
+    codes), Year becomes the smallest integer type that holds it, and
+    Amount is optionally stored as float32 — only if every value
+    round-trips within rtol, otherwise it is left untouched.
+    """
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+
+    if 'Year' in df.columns and pd.api.types.is_integer_dtype(df['Year']):
+        df['Year'] = pd.to_numeric(df['Year'], downcast='integer')
+
+    if float32_amounts and pd.api.types.is_numeric_dtype(df['Amount']):
+        amounts = df['Amount'].to_numpy(dtype=np.float64)
+        narrowed = amounts.astype(np.float32)
+        if np.allclose(narrowed, amounts, rtol=rtol, atol=0, equal_nan=True):
+            df['Amount'] = narrowed
+
+    return df
@@ -42,6 +42,21 @@ ENGINE_SCHEMAS = {
         }
     },
 
+    "indirect_cash_flow_engine": {
+        "required_keys": {
+            "engine", "Company", "Year",
+            "operating_cf", "investing_cf", "financing_cf", "cf_pattern", "cf_risk_flag",
+            "metrics", "flags", "severity", "explanation"
+        },
+        "metrics": {
+            "operating_cf",
+            "investing_cf",
+            "financing_cf",
+            "net_income",
+            "working_capital_change"
+        }
+    },
+
     "anomaly_efficiency_engine": {
         "required_keys": {
             "engine", "Company", "Year",
@@ -0,0 +1,219 @@
+import numpy as np
+import pandas as pd
+
+from .records import RatioRow, RatioEvalRow, TrendRow, AnomalyRow, SolvencyRow, RATIO_METRICS, finalize_records
+from .ratio_matrix import build_line_item_matrix, compute_ratio_arrays
+from .ratio_engine_eval import DEFAULT_CONFIG, SEVERITY_LEVELS, evaluate_ratio_arrays
+from .ratio_validator import check_ratio_bounds
+from .metric_scope import validated_scope
+from .period_model import PERIOD_KEY_BASE, periods_per_year
+from .trend_engine import ttm_trend_rows
+from .solvency_engine import DEFAULT_SOLVENCY_CONFIG
+
+# Same ratio list, in the same order, as trend_engine
+TREND_RATIOS = ["current_ratio", "gross_margin", "net_margin", "asset_turnover", "debt_equity", "roe"]
+
+FUSED_ENGINES = ("ratio", "ratio_eval", "trend", "anomaly", "solvency")
+
+ENGINE_OUTPUT_NAMES = {
+    "ratio": "ratios",
+    "ratio_eval": "ratio_eval",
+    "trend": "trend",
+    "anomaly": "anomaly",
+    "solvency": "solvency"
+}
+
+
+def fused_engine_pass(
+    financials_df: pd.DataFrame,
+    engines=FUSED_ENGINES,
+    compact: bool = False,
+    strict: bool = True,
+    quarantine: list | None = None,
+    eval_config: dict | None = None,
+    solvency_config: dict | None = None,
+    scope: tuple | None = None,
+    frequency: str | None = None
+):
+    """
+    AFAP Phase 3 — Fused Ratio / Evaluation / Trend / Anomaly / Solvency Pass
+    Sorts the line items once by (Company, Year), computes every ratio as
+    an aligned array and derives the downstream engines' flags from those
+    arrays, instead of each engine rebuilding and re-sorting its own
+    DataFrame.
+
+    Records are identical (values and types) to ratio_engine,
+    evaluate_ratios, trend_engine, anomaly_efficiency_engine and
+    solvency_engine run one after another on the flat ratios frame.
+    strict / quarantine / scope behave as in ratio_engine (bound-checked
+    ratios are validated whatever the scope); frequency marks TTM
+    windows, as in trend_engine and anomaly_efficiency_engine.
+
+    Returns (outputs, ratios_df): outputs maps "ratios", "ratio_eval",
+    "trend", "anomaly" and "solvency" to records for the requested
+    engines; ratios_df is the flat ratios frame the orchestrator builds
+    (scoped ratio columns only, when scope is given).
+    """
+    keys, values = build_line_item_matrix(financials_df)
+    ratios = compute_ratio_arrays(values, validated_scope(scope))
+
+    # ------------------------------------------------------------------
+    # Validation gate (one vectorized check instead of one per row)
+    # ------------------------------------------------------------------
+    ratio_frame = pd.DataFrame({
+        "Company": keys["Company"].to_numpy(dtype=object),
+        "Year": keys["Year"].astype(np.int64).to_numpy(),
+        **ratios
+    })
+    valid_mask, rejected = check_ratio_bounds(ratio_frame)
+    if rejected:
+        if strict:
+            first = rejected[0]
+            raise ValueError(f"{first['Company']} {first['Year']}: {first['reasons'][0]}")
+        ratio_frame = ratio_frame[valid_mask].reset_index(drop=True)
+        if quarantine is not None:
+            quarantine.extend(rejected)
+
+    if ratio_frame.empty:
+        return {ENGINE_OUTPUT_NAMES[e]: [] for e in engines}, pd.DataFrame()
+
+    # Validated, so bound-checked ratios outside the scope can go
+    if scope is not None:
+        for m in RATIO_METRICS:
+            if m not in scope:
+                ratio_frame[m] = np.nan
+
+    companies = ratio_frame["Company"].tolist()
+    years = ratio_frame["Year"].tolist()
+    columns = {m: ratio_frame[m].to_numpy() for m in RATIO_METRICS}
+
+    ratios_df = _flat_ratios_frame(ratio_frame)
+
+    outputs = {}
+
+    # ------------------------------------------------------------------
+    # Ratios: np.float64 metrics, None where the scalar engine has None
+    # ------------------------------------------------------------------
+    if "ratio" in engines:
+        metric_rows = zip(*(
+            [None if v != v else v for v in columns[m]] for m in RATIO_METRICS
+        ))
+        outputs["ratios"] = finalize_records(
+            [RatioRow(c, y, row) for c, y, row in zip(companies, years, metric_rows)],
+            "ratio_engine",
+            compact
+        )
+
+    # ------------------------------------------------------------------
+    # Ratio Evaluation
+    # ------------------------------------------------------------------
+    if "ratio_eval" in engines:
+        cfg = DEFAULT_CONFIG.copy()
+        if eval_config:
+            cfg.update(eval_config)
+        flags, severity_codes = evaluate_ratio_arrays(columns, cfg)
+        flag_rows = zip(*(flags[f].tolist() for f in RatioEvalRow.FLAGS))
+        # Row-wise engines read metrics through DataFrame.iterrows, so
+        # they see Python scalars taken from ratios_df
+        metric_rows = zip(*(ratios_df[m].tolist() for m in RATIO_METRICS))
+        outputs["ratio_eval"] = finalize_records(
+            [
+                RatioEvalRow(c, y, metric_row, flag_row, SEVERITY_LEVELS[s])
+                for c, y, metric_row, flag_row, s in zip(companies, years, metric_rows, flag_rows, severity_codes)
+            ],
+            "ratio_engine_eval",
+            compact
+        )
+
+    # ------------------------------------------------------------------
+    # Trend: last minus first year of companies with at least two years
+    # ------------------------------------------------------------------
+    if "trend" in engines:
+        trend_ratios = [r for r in TREND_RATIOS if scope is None or r in scope]
+        first_rows, last_rows = _company_bounds(companies)
+        results = []
+        for first, last in zip(first_rows, last_rows):
+            if last == first:
+                continue
+            for ratio in trend_ratios:
+                trend_value = columns[ratio][last] - columns[ratio][first]
+                deteriorating = trend_value < 0
+                results.append(TrendRow(
+                    companies[last],
+                    years[last],
+                    (ratio, trend_value, years[first], years[last]),
+                    (deteriorating,),
+                    "watch" if deteriorating else "stable"
+                ))
+        if frequency is not None:
+            results = ttm_trend_rows(results, frequency)
+        outputs["trend"] = finalize_records(results, "trend_engine", compact)
+
+    # ------------------------------------------------------------------
+    # Anomaly: ROA year-over-year change within each company
+    # ------------------------------------------------------------------
+    if "anomaly" in engines:
+        periods = periods_per_year(frequency) if frequency is not None else 1
+        by_company = ratios_df.groupby("Company", sort=False)
+        roa_yoy = by_company["roa"].pct_change(periods=periods)
+        if periods > 1:
+            roa_yoy[by_company["Year"].shift(periods) != ratios_df["Year"] - PERIOD_KEY_BASE] = np.nan
+        results = [
+            AnomalyRow(c, y, (change,), (shock,), "watch" if shock else "normal")
+            for c, y, change, shock in zip(companies, years, roa_yoy.tolist(), (roa_yoy < -0.4).tolist())
+        ]
+        outputs["anomaly"] = finalize_records(results, "anomaly_efficiency_engine", compact)
+
+    # ------------------------------------------------------------------
+    # Solvency
+    # ------------------------------------------------------------------
+    if "solvency" in engines:
+        cfg = DEFAULT_SOLVENCY_CONFIG.copy()
+        if solvency_config:
+            cfg.update(solvency_config)
+        results = []
+        for c, y, debt_equity, interest_coverage in zip(
+            companies, years, ratios_df["debt_equity"].tolist(), ratios_df["interest_coverage"].tolist()
+        ):
+            high_leverage = debt_equity is not None and debt_equity > cfg["debt_equity_max"]
+            weak_coverage = interest_coverage is not None and interest_coverage < cfg["interest_coverage_min"]
+            count = high_leverage + weak_coverage
+            results.append(SolvencyRow(
+                c,
+                y,
+                (debt_equity, interest_coverage),
+                (high_leverage, weak_coverage),
+                "action" if count == 2 else "watch" if count == 1 else "stable"
+            ))
+        outputs["solvency"] = finalize_records(results, "solvency_engine", compact)
+
+    if scope is not None:
+        ratios_df = ratios_df[["Company", "Year", *scope]]
+
+    return outputs, ratios_df
+
+
+# ------------------------------------------------------------------
+# Internal Helpers
+# ------------------------------------------------------------------
+
+def _flat_ratios_frame(ratio_frame):
+    """
+    The orchestrator's ratios_df: built from ratio records, so a metric
+    that is None for every row is an object column of None.
+    """
+    flat = ratio_frame
+    for m in RATIO_METRICS:
+        if flat[m].isna().all():
+            flat[m] = pd.Series([None] * len(flat), dtype=object)
+    return flat
+
+
+def _company_bounds(companies):
+    """
+    First and last row positions of each company run in the sorted rows.
+    """
+    n = len(companies)
+    starts = [i for i in range(n) if i == 0 or companies[i] != companies[i - 1]]
+    ends = [s - 1 for s in starts[1:]] + ([n - 1] if n else [])
+    return starts, ends
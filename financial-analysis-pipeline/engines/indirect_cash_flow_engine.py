@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+from .ratio_matrix import build_line_item_matrix, derived_line_items
+from .records import IndirectCashFlowRow, finalize_records
+
+# cf_pattern -> top-level severity. Composite risk only counts cash_flow
+# at "watch" (composite_risk_engine.SCORING_SEVERITY), so burning and
+# strained both map there: a worse pattern never scores below a milder
+# one. cf_pattern keeps the two apart.
+PATTERN_SEVERITY = {
+    "burning": "watch",
+    "strained": "watch",
+    "healthy": "stable",
+    "insufficient_history": "stable"
+}
+
+
+def indirect_cash_flow_engine(financials: pd.DataFrame, compact: bool = False) -> list:
+    """
+    AFAP Phase 3 — Indirect Cash Flow Engine
+    Derives operating, investing and financing cash flow (the
+    CashFlowRecord contract) from year-over-year balance sheet deltas:
+
+      operating_cf = net income - change in working capital
+      investing_cf = -(change in non-current assets)
+      financing_cf = change in non-current liabilities
+                     + (change in equity - net income)
+
+    Working capital is current assets less cash and current liabilities,
+    so the three flows add up to the change in cash. Cash comes from the
+    ("Assets", "Cash") line, part of current assets like inventory. A
+    company-year without it (for itself or the prior year), or without
+    the previous year's balance sheet, has no operating cash flow:
+    holding on to cash would otherwise read as an operating outflow.
+    Its pattern is "insufficient_history".
+
+    One line-item matrix for the whole portfolio, sorted by Company /
+    Year, is lag-joined to itself (row i against row i - 1), so the
+    deltas for every company-year are a handful of array operations.
+    With compact=True, returns slotted IndirectCashFlowRow records.
+    """
+    keys, values = build_line_item_matrix(financials)
+    if keys.empty:
+        return finalize_records([], "indirect_cash_flow_engine", compact)
+
+    d = derived_line_items(values)
+    companies = keys["Company"].to_numpy()
+    years = keys["Year"].to_numpy(dtype=np.int64)
+
+    # Lag-join: the previous row is the prior year of the same company
+    has_prior = np.zeros(len(keys), dtype=bool)
+    has_prior[1:] = (companies[1:] == companies[:-1]) & (years[1:] == years[:-1] + 1)
+
+    def delta(current):
+        change = np.full(len(current), np.nan)
+        change[1:] = current[1:] - current[:-1]
+        return np.where(has_prior, change, np.nan)
+
+    net_income = d["net_income"]
+    working_capital_change = delta(d["current_assets"] - d["cash"] - d["current_liabilities"])
+
+    operating_cf = net_income - working_capital_change
+    investing_cf = -delta(d["non_current_assets"])
+    financing_cf = delta(d["non_current_liabilities"]) + (delta(d["equity"]) - net_income)
+
+    free_cash_flow = operating_cf + investing_cf
+    negative_operating_cf = operating_cf < 0
+    negative_free_cash_flow = free_cash_flow < 0
+    financing_dependent = negative_free_cash_flow & ~negative_operating_cf & (financing_cf > 0)
+
+    metric_columns = [
+        _to_optional(a) for a in (operating_cf, investing_cf, financing_cf, net_income, working_capital_change)
+    ]
+    flag_columns = [a.tolist() for a in (negative_operating_cf, financing_dependent, negative_free_cash_flow)]
+
+    results = []
+    for i, (company, year) in enumerate(zip(companies.tolist(), years.tolist())):
+        record = IndirectCashFlowRow(
+            company,
+            year,
+            [column[i] for column in metric_columns],
+            [column[i] for column in flag_columns],
+            None
+        )
+        record.severity = PATTERN_SEVERITY[record.cf_pattern]
+        results.append(record)
+
+    return finalize_records(results, "indirect_cash_flow_engine", compact)
+
+
+def _to_optional(array):
+    # NaN (missing line item or no prior year) becomes None
+    return [None if v != v else v for v in array.tolist()]
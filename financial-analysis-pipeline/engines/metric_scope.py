@@ -0,0 +1,173 @@
+# engines/metric_scope.py
+
+import pandas as pd
+
+from .ratio_matrix import LINE_ITEMS
+from .ratio_validator import RATIO_BOUND_RULES
+from .records import RATIO_METRICS, RatioRow
+
+# ------------------------------------------------------------------
+# Metric Scope
+# ------------------------------------------------------------------
+# An analysis profile's metrics_scope ("all", "critical_only" or a list
+# of ratio names) is pushed down into the engines: only the scoped
+# ratios are computed (the rest are None), only the line items they
+# read are loaded, and only scoped ratios reach the LLM prompt.
+#
+# The bound-checked ratios are the exception: the ratio engines always
+# compute them, quarantine on the full rule set and only then set the
+# out-of-scope ones to None, so quarantine never depends on the profile.
+# ------------------------------------------------------------------
+
+# Profile metric names -> ratio engine metric names
+METRIC_ALIASES = {
+    "debt_to_equity": "debt_equity"
+}
+
+# Going-concern core: liquidity, leverage, debt service, profitability
+CRITICAL_METRICS = ("current_ratio", "quick_ratio", "net_margin", "debt_equity", "interest_coverage")
+
+# Line items (ratio_matrix.LINE_ITEMS names) each ratio formula reads
+METRIC_LINE_ITEMS = {
+    "current_ratio": ("current_assets", "current_liabilities"),
+    "quick_ratio": ("current_assets", "inventory", "current_liabilities"),
+    "gross_margin": ("revenue", "cogs"),
+    "operating_margin": ("revenue", "cogs", "opex"),
+    "net_margin": ("revenue", "cogs", "opex", "finance_costs", "tax"),
+    "debt_equity": ("current_liabilities", "non_current_liabilities", "equity"),
+    "interest_coverage": ("revenue", "cogs", "opex", "finance_costs"),
+    "asset_turnover": ("revenue", "current_assets", "non_current_assets"),
+    "roa": ("revenue", "cogs", "opex", "finance_costs", "tax", "current_assets", "non_current_assets"),
+    "roe": ("revenue", "cogs", "opex", "finance_costs", "tax", "equity")
+}
+
+# Ratios and raw line items each engine needs whatever the profile's
+# scope. Trend follows the scope: it trends whichever of its ratios
+# are computed.
+ENGINE_REQUIREMENTS = {
+    "ratio": {"metrics": (), "line_items": ()},
+    "trend": {"metrics": (), "line_items": ()},
+    "cash_flow": {"metrics": (), "line_items": ("revenue", "cogs", "opex", "finance_costs")},
+    "cash_flow_indirect": {
+        "metrics": (),
+        "line_items": (
+            "revenue", "cogs", "opex", "finance_costs", "tax",
+            "current_assets", "cash", "current_liabilities", "non_current_assets", "non_current_liabilities", "equity"
+        )
+    },
+    "anomaly": {"metrics": ("roa",), "line_items": ()},
+    "solvency": {"metrics": ("debt_equity", "interest_coverage"), "line_items": ()},
+    "composite_risk": {"metrics": (), "line_items": ()}
+}
+
+# Ratios the validation gate reads (ratio_validator.RATIO_BOUND_RULES)
+VALIDATED_METRICS = tuple(m for m in RATIO_METRICS if m in {rule[0] for rule in RATIO_BOUND_RULES})
+
+# Composite risk reads one trend row per company-year: the last one
+# trend_engine emits, which is roe's. With both engines in a profile roe
+# is always trended, so scoping never changes composite_score.
+COMPOSITE_TREND_METRICS = ("roe",)
+
+
+def resolve_metric_scope(metrics_scope, engines=()):
+    """
+    Ratio metrics to compute for a profile: its metrics_scope plus what
+    its engines require, in RATIO_METRICS order. None means all.
+
+    Names the ratio engine does not compute select nothing.
+    """
+    if metrics_scope is None or metrics_scope == "all":
+        return None
+    if metrics_scope == "critical_only":
+        names = set(CRITICAL_METRICS)
+    elif isinstance(metrics_scope, str):
+        raise ValueError(f"Unknown metrics_scope: {metrics_scope}")
+    else:
+        names = {METRIC_ALIASES.get(name, name) for name in metrics_scope}
+
+    for engine in engines:
+        names.update(ENGINE_REQUIREMENTS.get(engine, {}).get("metrics", ()))
+    if "trend" in engines and "composite_risk" in engines:
+        names.update(COMPOSITE_TREND_METRICS)
+
+    return tuple(m for m in RATIO_METRICS if m in names)
+
+
+def validated_scope(scope):
+    """
+    Ratios the engines compute for a scope: the scope plus
+    VALIDATED_METRICS, in RATIO_METRICS order. None means all.
+    """
+    if scope is None:
+        return None
+    names = set(scope) | set(VALIDATED_METRICS)
+    return tuple(m for m in RATIO_METRICS if m in names)
+
+
+def union_metric_scope(scopes):
+    """
+    Smallest scope covering every scope in scopes (None if any is None).
+    """
+    names = set()
+    for scope in scopes:
+        if scope is None:
+            return None
+        names.update(scope)
+    return tuple(m for m in RATIO_METRICS if m in names)
+
+
+def scope_line_items(metrics, engines=()):
+    """
+    (FS Category, FS Subcategory) pairs the scoped ratios, the
+    bound-checked ratios and the engines read, in LINE_ITEMS order.
+    """
+    names = {item for m in validated_scope(metrics) for item in METRIC_LINE_ITEMS[m]}
+    for engine in engines:
+        names.update(ENGINE_REQUIREMENTS.get(engine, {}).get("line_items", ()))
+    return [line for name, line in LINE_ITEMS.items() if name in names]
+
+
+def project_line_items(financials_df: pd.DataFrame, line_items):
+    """
+    Keeps only the financials rows for line_items, before they are
+    normalized. Company-years with none of them drop out.
+    """
+    lines = pd.MultiIndex.from_arrays([financials_df["FS Category"], financials_df["FS Subcategory"]])
+    return financials_df[lines.isin(line_items)]
+
+
+# ------------------------------------------------------------------
+# Scoped Views of Shared Outputs
+# ------------------------------------------------------------------
+
+def project_ratio_records(records, metrics):
+    """
+    Ratio records with metrics outside the scope set to None (dicts or
+    compact RatioRows, returned in the same form).
+    """
+    scope = set(metrics)
+    projected = []
+    for r in records:
+        if isinstance(r, RatioRow):
+            values = [v if m in scope else None for m, v in zip(RatioRow.METRICS, r.metric_values)]
+            projected.append(RatioRow(r.Company, r.Year, values))
+        else:
+            projected.append({**r, "metrics": {m: v if m in scope else None for m, v in r["metrics"].items()}})
+    return projected
+
+
+def project_quarantine_records(records, metrics):
+    """
+    Quarantine records as a run with this scope reports them: metrics
+    outside validated_scope(metrics) set to None.
+    """
+    computed = set(validated_scope(metrics))
+    return [{**r, "metrics": {m: v if m in computed else None for m, v in r["metrics"].items()}} for r in records]
+
+
+def project_trend_records(records, metrics):
+    """
+    Trend records for ratios in the scope only.
+    """
+    scope = set(metrics)
+    return [r for r in records if r["metrics"]["ratio"] in scope]
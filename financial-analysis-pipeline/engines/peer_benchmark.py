@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+
+from .records import RATIO_METRICS
+
+DEFAULT_PEER_GROUP = "all"
+
+
+class PeerPercentileIndex:
+    """
+    AFAP Phase 3 — Peer Percentile Index
+    Holds one sorted array per (Year, peer group, ratio) built from ratio
+    engine output, so percentile-rank queries are a binary search.
+
+    peer_groups maps Company -> peer group label (a dict or a callable);
+    companies without a mapping fall into DEFAULT_PEER_GROUP.
+
+    Percentile rank is the share of peers strictly below the value plus
+    half of the ties, on a 0–100 scale.
+    """
+
+    def __init__(self, ratios=RATIO_METRICS, peer_groups=None):
+        self.ratios = tuple(ratios)
+        self._peer_groups = peer_groups or {}
+        self._sorted = {}   # (Year, group, ratio) -> sorted float64 array
+        self._rows = {}     # (Company, Year) -> (group, {ratio: value})
+
+    @classmethod
+    def from_ratios(cls, ratio_records, **kwargs):
+        index = cls(**kwargs)
+        index.add(ratio_records)
+        return index
+
+    def peer_group(self, company):
+        if callable(self._peer_groups):
+            return self._peer_groups(company)
+        return self._peer_groups.get(company, DEFAULT_PEER_GROUP)
+
+    # ------------------------------------------------------------------
+    # Incremental Updates
+    # ------------------------------------------------------------------
+
+    def add(self, ratio_records):
+        """
+        Adds (or restates) company-years from ratio engine output: canonical
+        dicts or compact records, anything with Company / Year / metrics.
+        Only the affected (Year, group, ratio) arrays are rebuilt.
+        """
+        removed = {}
+        added = {}
+
+        for record in ratio_records:
+            key = (record["Company"], int(record["Year"]))
+            metrics = record["metrics"]
+            group = self.peer_group(key[0])
+
+            previous = self._rows.get(key)
+            if previous is not None:
+                old_group, old_values = previous
+                for ratio, value in old_values.items():
+                    removed.setdefault((key[1], old_group, ratio), []).append(value)
+
+            values = {}
+            for ratio in self.ratios:
+                value = metrics.get(ratio)
+                if value is not None and not np.isnan(value):
+                    values[ratio] = float(value)
+                    added.setdefault((key[1], group, ratio), []).append(float(value))
+            self._rows[key] = (group, values)
+
+        for bucket in set(removed) | set(added):
+            current = self._sorted.get(bucket, np.empty(0))
+            if bucket in removed:
+                current = _remove_values(current, removed[bucket])
+            if bucket in added:
+                current = np.sort(np.concatenate([current, added[bucket]]))
+            self._sorted[bucket] = current
+
+        return self
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def percentile_rank(self, value, year, ratio, group=DEFAULT_PEER_GROUP):
+        """
+        O(log n) percentile rank of a value among (year, group) peers.
+        """
+        peers = self._sorted.get((int(year), group, ratio))
+        if peers is None or len(peers) == 0 or value is None or np.isnan(value):
+            return None
+        below = np.searchsorted(peers, value, side="left")
+        at_or_below = np.searchsorted(peers, value, side="right")
+        return float(100.0 * (below + 0.5 * (at_or_below - below)) / len(peers))
+
+    def rank_company(self, company, year):
+        """
+        Percentile ranks of every indexed ratio for one company-year.
+        """
+        row = self._rows.get((company, int(year)))
+        if row is None:
+            return {}
+        group, values = row
+        return {
+            ratio: self.percentile_rank(values.get(ratio), year, ratio, group)
+            for ratio in self.ratios
+        }
+
+    def rank_portfolio(self, ratios_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Batch percentile ranks for a flat ratios frame (Company, Year +
+        ratio columns). Returns Company, Year and <ratio>_pct columns.
+        """
+        result = ratios_df[["Company", "Year"]].copy().reset_index(drop=True)
+        groups = np.array([self.peer_group(c) for c in result["Company"]], dtype=object)
+        years = result["Year"].astype(int).to_numpy()
+
+        bucket_frame = pd.DataFrame({"Year": years, "group": groups})
+        bucket_rows = bucket_frame.groupby(["Year", "group"], sort=False).indices
+
+        for ratio in self.ratios:
+            pct = np.full(len(result), np.nan)
+            if ratio in ratios_df.columns:
+                values = pd.to_numeric(ratios_df[ratio], errors="coerce").to_numpy(dtype=np.float64)
+                for (year, group), rows in bucket_rows.items():
+                    peers = self._sorted.get((year, group, ratio))
+                    if peers is None or len(peers) == 0:
+                        continue
+                    v = values[rows]
+                    below = np.searchsorted(peers, v, side="left")
+                    at_or_below = np.searchsorted(peers, v, side="right")
+                    ranks = 100.0 * (below + 0.5 * (at_or_below - below)) / len(peers)
+                    pct[rows] = np.where(np.isnan(v), np.nan, ranks)
+            result[f"{ratio}_pct"] = pct
+
+        return result
+
+
+def _remove_values(sorted_values, values):
+    keep = np.ones(len(sorted_values), dtype=bool)
+    for value in values:
+        position = np.searchsorted(sorted_values, value, side="left")
+        # Skip past ties already removed
+        while position < len(sorted_values) and not keep[position] and sorted_values[position] == value:
+            position += 1
+        if position < len(sorted_values) and sorted_values[position] == value:
+            keep[position] = False
+    return sorted_values[keep]
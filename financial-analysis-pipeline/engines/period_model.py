@@ -0,0 +1,177 @@
+import numpy as np
+import pandas as pd
+
+from .ratio_matrix import LINE_ITEMS, build_line_item_matrix
+
+# ------------------------------------------------------------------
+# Sub-Annual Periods
+# ------------------------------------------------------------------
+# Quarterly (or monthly) filings carry a period: its end date and
+# frequency, or Year plus Quarter / Month. Every period gets an integer
+# key, year * 100 + sub-period (Q3 2023 -> 202303), which sorts
+# chronologically, so it can stand in for "Year" in the engines: they
+# key and order rows on that column and compare consecutive rows.
+#
+# ttm_financials turns such filings into trailing-twelve-month windows
+# in the engines' long format (Year = period key of the window's last
+# period): flows summed over the window, balances as at its end.
+# ------------------------------------------------------------------
+
+FREQUENCIES = {"Q": 4, "M": 12}
+SUB_PERIOD_COLUMNS = {"Q": "Quarter", "M": "Month"}
+PERIOD_KEY_BASE = 100
+
+# Income statement items are flows; everything else is a balance
+FLOW_ITEMS = ("revenue", "cogs", "opex", "finance_costs", "tax")
+
+
+def periods_per_year(frequency):
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"Unknown period frequency: {frequency}. Expected one of {sorted(FREQUENCIES)}.")
+    return FREQUENCIES[frequency]
+
+
+def period_key(year, sub_period):
+    return year * PERIOD_KEY_BASE + sub_period
+
+
+def split_period_key(key):
+    """
+    (year, sub_period) of a period key.
+    """
+    return divmod(key, PERIOD_KEY_BASE)
+
+
+def calendar_year(year_or_key):
+    """
+    The calendar year of a plain Year or a period key.
+    """
+    return year_or_key // PERIOD_KEY_BASE if year_or_key >= PERIOD_KEY_BASE * 1000 else year_or_key
+
+
+def period_bounds(keys, frequency):
+    """
+    (start, end) Timestamps of the periods with the given keys.
+    """
+    per_year = periods_per_year(frequency)
+    year, sub = np.divmod(np.asarray(keys, dtype=np.int64), PERIOD_KEY_BASE)
+    months = 12 // per_year
+    start = pd.to_datetime(pd.DataFrame({"year": year, "month": (sub - 1) * months + 1, "day": 1}))
+    end = start + pd.DateOffset(months=months) - pd.Timedelta(days=1)
+    return start, end
+
+
+def ttm_window_bounds(keys, frequency):
+    """
+    (start, end) Timestamps of the trailing-twelve-month windows ending
+    with the periods with the given keys.
+    """
+    per_year = periods_per_year(frequency)
+    year, sub = np.divmod(np.asarray(keys, dtype=np.int64), PERIOD_KEY_BASE)
+    start_year, start_sub = np.divmod(year * per_year + sub - per_year, per_year)
+    start, _ = period_bounds(period_key(start_year, start_sub + 1), frequency)
+    _, end = period_bounds(keys, frequency)
+    return start, end
+
+
+def assign_periods(financials: pd.DataFrame, frequency="Q") -> pd.DataFrame:
+    """
+    Adds "Period" (period key), "Period Start", "Period End" and
+    "Frequency" to sub-annual filings identified either by a
+    "Period End" date column or by Year plus Quarter / Month.
+    """
+    per_year = periods_per_year(frequency)
+    df = financials.copy()
+
+    if "Period End" in df.columns:
+        period_end = pd.to_datetime(df["Period End"])
+        year = period_end.dt.year.to_numpy(dtype=np.int64)
+        sub = (period_end.dt.month.to_numpy(dtype=np.int64) - 1) // (12 // per_year) + 1
+    elif SUB_PERIOD_COLUMNS[frequency] in df.columns and "Year" in df.columns:
+        year = df["Year"].to_numpy(dtype=np.int64)
+        sub = df[SUB_PERIOD_COLUMNS[frequency]].to_numpy(dtype=np.int64)
+        if ((sub < 1) | (sub > per_year)).any():
+            raise ValueError(f"{SUB_PERIOD_COLUMNS[frequency]} must be between 1 and {per_year}.")
+    else:
+        raise ValueError(
+            f"Sub-annual financials need a 'Period End' column or 'Year' and '{SUB_PERIOD_COLUMNS[frequency]}'."
+        )
+
+    keys = period_key(year, sub)
+    start, end = period_bounds(keys, frequency)
+    df["Period"] = keys
+    df["Period Start"] = start.to_numpy()
+    df["Period End"] = end.to_numpy()
+    df["Frequency"] = frequency
+    return df
+
+
+# ------------------------------------------------------------------
+# Trailing-Twelve-Month Windows
+# ------------------------------------------------------------------
+
+def ttm_financials(financials: pd.DataFrame, frequency="Q") -> pd.DataFrame:
+    """
+    AFAP Phase 3 — TTM Aggregation Stage
+    One row per company, window and line item, in the engines' long
+    format (Company, Year, FS Category, FS Subcategory, Amount) plus the
+    window's Period Start / Period End and Frequency "TTM". Year is the
+    period key of the window's last period.
+
+    Flows are summed over the trailing periods_per_year periods and
+    balances taken at the window end. Only complete windows (that many
+    consecutive periods) are emitted, and a flow missing from any of
+    their periods is left out of the window.
+
+    Every company's windows are computed at once: the line-item matrix
+    is sorted by Company / Period, so a window is that row plus the
+    previous per_year - 1 rows, checked to be the same company and
+    consecutive periods.
+    """
+    per_year = periods_per_year(frequency)
+    df = assign_periods(financials, frequency)
+    df["Year"] = df["Period"]
+
+    keys, values = build_line_item_matrix(df)
+    if keys.empty:
+        return pd.DataFrame(columns=["Company", "Year", "FS Category", "FS Subcategory", "Amount"])
+
+    companies = keys["Company"].to_numpy()
+    period_keys = keys["Year"].to_numpy(dtype=np.int64)
+    year, sub = np.divmod(period_keys, PERIOD_KEY_BASE)
+    ordinal = year * per_year + sub - 1
+
+    # Window start row, and whether it closes a full run of periods
+    n = len(keys)
+    first = np.arange(n) - (per_year - 1)
+    complete = first >= 0
+    first = np.clip(first, 0, None)
+    complete &= (companies[first] == companies) & (ordinal - ordinal[first] == per_year - 1)
+
+    # Grouped rolling sum of the flows: per_year shifted adds
+    flow_columns = [i for i, name in enumerate(LINE_ITEMS) if name in FLOW_ITEMS]
+    flows = values[:, flow_columns]
+    ttm = flows.copy()
+    for lag in range(1, per_year):
+        ttm[lag:] += flows[:-lag]
+
+    windowed = values.copy()
+    windowed[:, flow_columns] = ttm
+    windowed = windowed[complete]
+
+    # Long format: one row per present (window, line item)
+    rows, items = np.nonzero(~np.isnan(windowed))
+    lines = list(LINE_ITEMS.values())
+    window_keys = period_keys[complete]
+    start, end = ttm_window_bounds(window_keys, frequency)
+
+    return pd.DataFrame({
+        "Company": companies[complete][rows],
+        "Year": window_keys[rows],
+        "FS Category": [lines[i][0] for i in items],
+        "FS Subcategory": [lines[i][1] for i in items],
+        "Amount": windowed[rows, items],
+        "Period Start": start.to_numpy()[rows],
+        "Period End": end.to_numpy()[rows],
+        "Frequency": "TTM"
+    })
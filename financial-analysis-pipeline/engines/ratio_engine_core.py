@@ -1,12 +1,30 @@
 import pandas as pd
-from .schema_validator import validate_engine_output
+from .records import RatioRow, RATIO_METRICS, finalize_records
 from engines.data_normalizer import normalize_financial_df
-from engines.ratio_validator import validate_ratios
-
-def ratio_engine(input_df: pd.DataFrame) -> list[dict]:
+from engines.ratio_validator import validate_ratios, check_ratio_bounds
+from engines.metric_scope import project_ratio_records, scope_line_items, validated_scope
+
+def ratio_engine(
+    input_df: pd.DataFrame,
+    compact: bool = False,
+    strict: bool = True,
+    quarantine: list | None = None,
+    scope: tuple | None = None
+) -> list[dict]:
     """
     AFAP Phase 3 — Locked Deterministic Ratio Engine
     Outputs canonical AFAP format with 'metrics', 'flags', 'severity', and 'explanation'.
+    With compact=True, returns slotted RatioRow records instead of dicts.
+
+    strict=True raises on the first out-of-bounds company-year. With
+    strict=False all rows are bound-checked in one vectorized pass and
+    violating rows are dropped from the output and appended (with
+    reason codes) to the quarantine list, if one is given.
+
+    scope limits the engine to those ratios (see engines.metric_scope):
+    the others are None and their line items are never looked up. The
+    bound-checked ratios are computed and validated regardless, then
+    set to None if outside the scope.
     """
 
     required_cols = [
@@ -21,14 +39,19 @@ def ratio_engine(input_df: pd.DataFrame) -> list[dict]:
     if missing:
         raise ValueError(f"Missing columns: {missing}")
 
+    needed_lines = set(scope_line_items(scope)) if scope is not None else None
+    computed = validated_scope(scope)
+
     results = []
 
-    for company, grp in input_df.groupby("Company"):
+    for company, grp in input_df.groupby("Company", observed=True):
         grp = grp.sort_values("Year")
 
         for year, year_grp in grp.groupby("Year"):
 
             def get_amount(category, subcategory):
+                if needed_lines is not None and (category, subcategory) not in needed_lines:
+                    return None
                 row = year_grp[
                     (year_grp["FS Category"] == category) &
                     (year_grp["FS Subcategory"] == subcategory)
@@ -128,18 +151,28 @@ def ratio_engine(input_df: pd.DataFrame) -> list[dict]:
                     else None
                 )
             }
+            if computed is not None:
+                metrics = {m: (v if m in computed else None) for m, v in metrics.items()}
 # Validation gate
-            metrics = validate_ratios(metrics, company, year)
-            results.append({
-                "engine": "ratio_engine",
-                "Company": company,
-                "Year": int(year),
-                "metrics": metrics,
-                "flags": {},           # no flags for ratio engine
-                "severity": "stable",  # base ratios are stable
-                "explanation": "Canonical financial ratios"
-            })
-
-    validate_engine_output(results, "ratio_engine")
-    
-    return results
+            if strict:
+                metrics = validate_ratios(metrics, company, year)
+            results.append(RatioRow(
+                company,
+                int(year),
+                [metrics[m] for m in RATIO_METRICS]
+            ))
+
+    if not strict and results:
+        ratio_frame = pd.DataFrame(
+            [(r.Company, r.Year, *r.metric_values) for r in results],
+            columns=["Company", "Year", *RATIO_METRICS]
+        )
+        valid_mask, rejected = check_ratio_bounds(ratio_frame)
+        results = [r for r, valid in zip(results, valid_mask) if valid]
+        if quarantine is not None:
+            quarantine.extend(rejected)
+
+    if scope is not None and computed != scope:
+        results = project_ratio_records(results, scope)
+
+    return finalize_records(results, "ratio_engine", compact)
@@ -1,5 +1,6 @@
+import numpy as np
 import pandas as pd
-from .schema_validator import validate_engine_output
+from .records import RatioEvalRow, RATIO_METRICS, finalize_records
 DEFAULT_CONFIG = {
     # Liquidity
     "liquidity_min": 1.2,
@@ -18,9 +19,11 @@ DEFAULT_CONFIG = {
 }
 
 
-def evaluate_ratios(input_df: pd.DataFrame, config: dict | None = None) -> list[dict]:
+def evaluate_ratios(input_df: pd.DataFrame, config: dict | None = None, compact: bool = False) -> list[dict]:
     """
     AFAP Phase 3 — Locked Ratio Evaluation Engine
+    With compact=True, returns slotted RatioEvalRow records (each metric
+    stored once) instead of dicts.
     """
 
     required_cols = [
@@ -73,63 +76,51 @@ def evaluate_ratios(input_df: pd.DataFrame, config: dict | None = None) -> list[
             risk_count = sum(flags.values())
             severity = "action" if risk_count >= 3 else "watch" if risk_count >= 1 else "stable"
 
-            explanation_parts = []
-            if flags["liquidity_risk"]:
-                explanation_parts.append("Liquidity metrics fall below acceptable thresholds.")
-            if flags["profitability_risk"]:
-                explanation_parts.append("Profitability margins are under pressure.")
-            if flags["leverage_risk"]:
-                explanation_parts.append("Leverage levels exceed the preferred range.")
-            if flags["coverage_risk"]:
-                explanation_parts.append("Interest coverage is weak relative to financing costs.")
-            if flags["efficiency_risk"]:
-                explanation_parts.append("Asset utilization appears inefficient.")
-            if flags["return_risk"]:
-                explanation_parts.append("Returns on assets or equity are below expectations.")
-
-            explanation = (
-                " ".join(explanation_parts)
-                if explanation_parts
-                else "All core financial ratios are within configured thresholds."
-            )
-
-            results.append({
-    "engine": "ratio_engine",
-    "Company": company,
-    "Year": int(row["Year"]),
-
-    # 🔹 expose ratios as real columns
-    "current_ratio": row["current_ratio"],
-    "quick_ratio": row["quick_ratio"],
-    "gross_margin": row["gross_margin"],
-    "operating_margin": row["operating_margin"],
-    "net_margin": row["net_margin"],
-    "debt_equity": row["debt_equity"],
-    "interest_coverage": row["interest_coverage"],
-    "asset_turnover": row["asset_turnover"],
-    "roa": row["roa"],
-    "roe": row["roe"],
-
-    # 🔹 keep metrics dict for schema validation
-    "metrics": {
-        "current_ratio": row["current_ratio"],
-        "quick_ratio": row["quick_ratio"],
-        "gross_margin": row["gross_margin"],
-        "operating_margin": row["operating_margin"],
-        "net_margin": row["net_margin"],
-        "debt_equity": row["debt_equity"],
-        "interest_coverage": row["interest_coverage"],
-        "asset_turnover": row["asset_turnover"],
-        "roa": row["roa"],
-        "roe": row["roe"]
-    },
-
-    "flags": {**flags, "severity": severity},
-    "explanation": explanation
-})
-
-
-
-    validate_engine_output(results, "ratio_engine_eval")
-    return results
+            # Explanation text is resolved lazily from the flags
+            results.append(RatioEvalRow(
+                company,
+                int(row["Year"]),
+                [row[m] for m in RATIO_METRICS],
+                [flags[f] for f in RatioEvalRow.FLAGS],
+                severity
+            ))
+
+    return finalize_records(results, "ratio_engine_eval", compact)
+
+
+SEVERITY_LEVELS = ("stable", "watch", "action")
+
+
+def evaluate_ratio_arrays(ratios, cfg):
+    """
+    Vectorized form of the evaluate_ratios flag rules.
+
+    ratios maps ratio name -> float array (NaN where missing); cfg maps
+    threshold name -> scalar, or a (n_configs, 1) array to evaluate many
+    configs at once by broadcasting. Returns (flags, severity_codes)
+    where severity_codes index SEVERITY_LEVELS.
+    """
+    flags = {
+        "liquidity_risk": (
+            (ratios["current_ratio"] < cfg["liquidity_min"])
+            | (ratios["quick_ratio"] < cfg["quick_ratio_min"])
+        ),
+        "profitability_risk": (
+            (ratios["gross_margin"] < cfg["gross_margin_min"])
+            | (ratios["operating_margin"] < cfg["operating_margin_min"])
+            | (ratios["net_margin"] < cfg["net_margin_min"])
+        ),
+        "leverage_risk": ratios["debt_equity"] > cfg["debt_equity_max"],
+        "coverage_risk": ratios["interest_coverage"] < cfg["interest_coverage_min"],
+        "efficiency_risk": ratios["asset_turnover"] < cfg["asset_turnover_min"],
+        "return_risk": (
+            (ratios["roa"] < cfg["roa_min"])
+            | (ratios["roe"] < cfg["roe_min"])
+        )
+    }
+
+    risk_count = sum(f.astype(np.int8) for f in flags.values())
+    severity_codes = (risk_count >= 1).astype(np.int8) + (risk_count >= 3)
+
+    return flags, severity_codes
 
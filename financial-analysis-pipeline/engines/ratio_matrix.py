@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+
+from .data_normalizer import normalize_financial_df
+
+# ------------------------------------------------------------------
+# Line-Item Matrix
+# ------------------------------------------------------------------
+# Array form of the get_amount lookups in ratio_engine_core and
+# cash_flow_engine: one row per (Company, Year), one column per line
+# item, NaN where the company-year has no such line (get_amount -> None).
+# ------------------------------------------------------------------
+
+LINE_ITEMS = {
+    "current_assets": ("Assets", "Current Assets"),
+    "non_current_assets": ("Assets", "Non-Current Assets"),
+    "inventory": ("Assets", "Inventory"),
+    "cash": ("Assets", "Cash"),
+    "current_liabilities": ("Liabilities", "Current Liabilities"),
+    "non_current_liabilities": ("Liabilities", "Non-Current Liabilities"),
+    "revenue": ("Revenue", "Revenue"),
+    "cogs": ("Expenses", "COGS"),
+    "opex": ("Expenses", "Operating Expenses"),
+    "finance_costs": ("Expenses", "Finance Costs"),
+    "tax": ("Expenses", "Tax"),
+    "equity": ("Equity", "Equity")
+}
+
+LINE_ITEM_INDEX = {name: i for i, name in enumerate(LINE_ITEMS)}
+
+
+def build_line_item_matrix(financials_df: pd.DataFrame):
+    """
+    Returns (keys, values): keys is a DataFrame of Company / Year sorted
+    the way the engines iterate, values a float64 (n_rows, n_items)
+    array aligned with LINE_ITEMS.
+    """
+    df = normalize_financial_df(financials_df)
+
+    required_cols = ["Company", "Year", "FS Category", "FS Subcategory", "Amount"]
+    missing = [c for c in required_cols if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+
+    # Company-year of every line, numbered in first-appearance order, then
+    # renumbered so keys sort the way the engines iterate
+    groups = df.groupby(["Company", "Year"], observed=True, sort=False)
+    group_ids = groups.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+    keys = groups.size().index.to_frame(index=False).astype({"Company": str})
+    order = np.lexsort((keys["Year"].to_numpy(), keys["Company"].to_numpy()))
+    position = np.empty(len(order), dtype=np.int64)
+    position[order] = np.arange(len(order))
+    keys = keys.iloc[order].reset_index(drop=True)
+
+    # Line item of every line (-1 if it feeds no ratio), matched on the
+    # category codes rather than on materialized label strings
+    lines = pd.MultiIndex.from_arrays([df["FS Category"], df["FS Subcategory"]])
+    items = pd.MultiIndex.from_tuples(list(LINE_ITEMS.values())).get_indexer(lines)
+    matched = (items >= 0) & (group_ids >= 0)
+
+    rows = position[group_ids[matched]]
+    cols = items[matched]
+    amounts = df["Amount"].to_numpy(dtype=np.float64)[matched]
+
+    # Present-but-NaN amounts sum to 0, exactly like get_amount
+    values = np.full((len(keys), len(LINE_ITEMS)), np.nan)
+    values[rows, cols] = 0.0
+    np.add.at(values, (rows, cols), np.nan_to_num(amounts))
+
+    return keys, values
+
+
+# ------------------------------------------------------------------
+# Vectorized Ratios
+# ------------------------------------------------------------------
+
+def _divide(num, den):
+    # NaN stands for None: it propagates, and zero denominators give None
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den != 0, num / den, np.nan)
+
+
+def derived_line_items(values):
+    """
+    Operating profit, net income and balance sheet totals over the last
+    axis of values (works for (n_rows, n_items) and stacked scenarios).
+    """
+    item = {name: values[..., i] for name, i in LINE_ITEM_INDEX.items()}
+
+    ca, nca = item["current_assets"], item["non_current_assets"]
+    cl, ncl = item["current_liabilities"], item["non_current_liabilities"]
+
+    total_assets = np.where(
+        np.isnan(ca) & np.isnan(nca), np.nan, np.nan_to_num(ca) + np.nan_to_num(nca)
+    )
+    total_liabilities = np.where(
+        np.isnan(cl) & np.isnan(ncl), np.nan, np.nan_to_num(cl) + np.nan_to_num(ncl)
+    )
+
+    operating_profit = item["revenue"] - item["cogs"] - item["opex"]
+    net_income = operating_profit - item["finance_costs"] - item["tax"]
+
+    return {
+        **item,
+        "total_assets": total_assets,
+        "total_liabilities": total_liabilities,
+        "operating_profit": operating_profit,
+        "net_income": net_income
+    }
+
+
+# Vectorized ratio_engine_core formulas over derived_line_items output
+RATIO_FORMULAS = {
+    "current_ratio": lambda d: _divide(d["current_assets"], d["current_liabilities"]),
+    "quick_ratio": lambda d: _divide(d["current_assets"] - np.nan_to_num(d["inventory"]), d["current_liabilities"]),
+    "gross_margin": lambda d: _divide(d["revenue"] - d["cogs"], d["revenue"]),
+    "operating_margin": lambda d: _divide(d["operating_profit"], d["revenue"]),
+    "net_margin": lambda d: _divide(d["net_income"], d["revenue"]),
+    "debt_equity": lambda d: _divide(d["total_liabilities"], d["equity"]),
+    "interest_coverage": lambda d: _divide(d["operating_profit"], d["finance_costs"]),
+    "asset_turnover": lambda d: _divide(d["revenue"], d["total_assets"]),
+    "roa": lambda d: _divide(d["net_income"], d["total_assets"]),
+    "roe": lambda d: _divide(d["net_income"], d["equity"])
+}
+
+
+def compute_ratio_arrays(values, scope=None):
+    """
+    Vectorized ratio_engine_core formulas. Returns ratio name -> array
+    (NaN where the scalar engine returns None). Ratios outside scope,
+    if given, are all NaN and not computed.
+    """
+    d = derived_line_items(values)
+
+    return {
+        name: formula(d) if scope is None or name in scope else np.full(values.shape[:-1], np.nan)
+        for name, formula in RATIO_FORMULAS.items()
+    }
@@ -1,21 +1,77 @@
+import numpy as np
+import pandas as pd
+
+# (metric, lower, upper, reason_code, message) — checked in this order
+RATIO_BOUND_RULES = [
+    ("operating_margin", -1, 1, "operating_margin_out_of_bounds", "Operating margin outside logical bounds."),
+    ("gross_margin", -1, 1, "gross_margin_out_of_bounds", "Gross margin outside logical bounds."),
+    ("current_ratio", 0, np.inf, "negative_current_ratio", "Current ratio cannot be negative.")
+]
+
+
 def validate_ratios(metrics: dict, company: str, year: int):
+    """
+    Strict per-row gate: raises ValueError on the first violated rule.
+    """
 
     def out_of_bounds(value, lower, upper):
-        return value is not None and not (lower <= value <= upper)
+        return value is not None and not np.isnan(value) and not (lower <= value <= upper)
 
-    if out_of_bounds(metrics.get("operating_margin"), -1, 1):
-        raise ValueError(
-            f"{company} {year}: Operating margin outside logical bounds."
-        )
+    for metric, lower, upper, _, message in RATIO_BOUND_RULES:
+        if out_of_bounds(metrics.get(metric), lower, upper):
+            raise ValueError(
+                f"{company} {year}: {message}"
+            )
 
-    if out_of_bounds(metrics.get("gross_margin"), -1, 1):
-        raise ValueError(
-            f"{company} {year}: Gross margin outside logical bounds."
-        )
+    return metrics
 
-    if metrics.get("current_ratio") is not None and metrics["current_ratio"] < 0:
-        raise ValueError(
-            f"{company} {year}: Current ratio cannot be negative."
-        )
 
-    return metrics
+def check_ratio_bounds(ratios_df: pd.DataFrame):
+    """
+    Vectorized gate: evaluates every rule over the whole ratio matrix at
+    once. Missing values (None / NaN) never violate a rule.
+
+    Returns (valid_mask, quarantine) where valid_mask is a boolean array
+    aligned with ratios_df and quarantine is one record per violating
+    row carrying all of its reason codes.
+    """
+    n_rows = len(ratios_df)
+    violations = {}
+
+    for metric, lower, upper, code, message in RATIO_BOUND_RULES:
+        if metric not in ratios_df.columns:
+            continue
+        values = pd.to_numeric(ratios_df[metric], errors="coerce").to_numpy(dtype=np.float64)
+        violated = ~np.isnan(values) & ((values < lower) | (values > upper))
+        if violated.any():
+            violations[(code, message)] = violated
+
+    if not violations:
+        return np.ones(n_rows, dtype=bool), []
+
+    any_violation = np.logical_or.reduce(list(violations.values()))
+    metric_cols = [c for c in ratios_df.columns if c not in ("Company", "Year")]
+
+    quarantine = []
+    for i in np.flatnonzero(any_violation):
+        row = ratios_df.iloc[i]
+        rules = [(code, message) for (code, message), violated in violations.items() if violated[i]]
+        quarantine.append({
+            "engine": "ratio_validator",
+            "Company": row["Company"],
+            "Year": int(row["Year"]),
+            # None, never NaN, for a missing ratio (as in ratio records)
+            "metrics": {c: None if pd.isna(row[c]) else row[c] for c in metric_cols},
+            "reason_codes": [code for code, _ in rules],
+            "reasons": [message for _, message in rules]
+        })
+
+    return ~any_violation, quarantine
+
+
+def validate_ratio_frame(ratios_df: pd.DataFrame):
+    """
+    Splits a flat ratios frame into (clean_df, quarantine).
+    """
+    valid_mask, quarantine = check_ratio_bounds(ratios_df)
+    return ratios_df[valid_mask].reset_index(drop=True), quarantine
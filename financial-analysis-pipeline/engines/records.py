@@ -0,0 +1,327 @@
+# engines/records.py
+
+import sys
+
+from .schema_validator import validate_engine_output
+
+# ------------------------------------------------------------------
+# Compact Engine Records
+# ------------------------------------------------------------------
+# Slotted alternatives to the per-row dicts the engines emit. Field
+# names, metric names and flag names live on the class, values live in
+# tuples, and explanation text is resolved lazily from the record's
+# severity / flags instead of being stored per row.
+#
+# to_dict() reproduces the canonical engine dict exactly, so records
+# only need converting at the API boundary (see records_to_dicts).
+# ------------------------------------------------------------------
+
+EXPLANATIONS = {
+    ("ratio_engine", "canonical"): "Canonical financial ratios",
+
+    ("ratio_engine_eval", "liquidity_risk"): "Liquidity metrics fall below acceptable thresholds.",
+    ("ratio_engine_eval", "profitability_risk"): "Profitability margins are under pressure.",
+    ("ratio_engine_eval", "leverage_risk"): "Leverage levels exceed the preferred range.",
+    ("ratio_engine_eval", "coverage_risk"): "Interest coverage is weak relative to financing costs.",
+    ("ratio_engine_eval", "efficiency_risk"): "Asset utilization appears inefficient.",
+    ("ratio_engine_eval", "return_risk"): "Returns on assets or equity are below expectations.",
+    ("ratio_engine_eval", "stable"): "All core financial ratios are within configured thresholds.",
+
+    ("trend_engine", "watch"): "Negative trend observed in {ratio}.",
+    ("trend_engine", "stable"): "{ratio} trend stable or improving.",
+
+    ("cash_flow_engine", "action"): "Operating activities do not appear to generate sufficient cash to cover financing obligations.",
+    ("cash_flow_engine", "watch"): "Cash generation shows signs of pressure and warrants monitoring.",
+    ("cash_flow_engine", "stable"): "Operating activities appear sufficient to sustain financing needs.",
+
+    ("indirect_cash_flow_engine", "burning"): "Operating activities consumed cash over the year.",
+    ("indirect_cash_flow_engine", "strained"): "Operating cash flow does not cover investing outflows.",
+    ("indirect_cash_flow_engine", "healthy"): "Operating cash flow covers investing activity.",
+    ("indirect_cash_flow_engine", "insufficient_history"): "No prior-year balance sheet or cash line to derive cash flows from.",
+
+    ("anomaly_efficiency_engine", "flagged"): "Abnormal efficiency change detected.",
+    ("anomaly_efficiency_engine", "normal"): "Efficiency metrics stable.",
+
+    ("solvency_engine", "flagged"): "Capital structure shows solvency risk.",
+    ("solvency_engine", "stable"): "Solvency position acceptable."
+}
+
+
+def explain(schema, code, **fields):
+    return EXPLANATIONS[(schema, code)].format(**fields)
+
+
+class EngineRecord:
+    """
+    Base slotted record. Subclasses declare ENGINE (the "engine" value),
+    SCHEMA (the ENGINE_SCHEMAS key), METRICS and FLAGS.
+    """
+
+    __slots__ = ("Company", "Year", "metric_values", "flag_values", "severity")
+
+    ENGINE = None
+    SCHEMA = None
+    METRICS = ()
+    FLAGS = ()
+
+    def __init__(self, company, year, metric_values, flag_values, severity):
+        self.Company = sys.intern(company) if type(company) is str else company
+        self.Year = year
+        self.metric_values = tuple(metric_values)
+        self.flag_values = tuple(flag_values)
+        self.severity = severity
+
+    @property
+    def metrics(self):
+        return dict(zip(self.METRICS, self.metric_values))
+
+    @property
+    def flags(self):
+        return dict(zip(self.FLAGS, self.flag_values))
+
+    @property
+    def explanation(self):
+        return explain(self.SCHEMA, self.severity)
+
+    def to_dict(self):
+        return {
+            "engine": self.ENGINE,
+            "Company": self.Company,
+            "Year": self.Year,
+            "metrics": self.metrics,
+            "flags": self.flags,
+            "severity": self.severity,
+            "explanation": self.explanation
+        }
+
+    # Read-only dict-style access so records can flow through code that
+    # expects engine dicts (composite risk indexing, payload extraction)
+
+    def __getitem__(self, key):
+        if key in ("Company", "Year", "severity", "metrics", "flags", "explanation"):
+            return getattr(self, key)
+        if key == "engine":
+            return self.ENGINE
+        return self.to_dict()[key]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    def items(self):
+        return self.to_dict().items()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+# ------------------------------------------------------------------
+# Engine Record Types
+# ------------------------------------------------------------------
+
+RATIO_METRICS = (
+    "current_ratio",
+    "quick_ratio",
+    "gross_margin",
+    "operating_margin",
+    "net_margin",
+    "debt_equity",
+    "interest_coverage",
+    "asset_turnover",
+    "roa",
+    "roe"
+)
+
+
+class RatioRow(EngineRecord):
+    __slots__ = ()
+    ENGINE = "ratio_engine"
+    SCHEMA = "ratio_engine"
+    METRICS = RATIO_METRICS
+
+    def __init__(self, company, year, metric_values):
+        super().__init__(company, year, metric_values, (), "stable")
+
+    @property
+    def explanation(self):
+        return explain(self.SCHEMA, "canonical")
+
+
+class RatioEvalRow(EngineRecord):
+    __slots__ = ()
+    ENGINE = "ratio_engine"
+    SCHEMA = "ratio_engine_eval"
+    METRICS = RATIO_METRICS
+    FLAGS = (
+        "liquidity_risk",
+        "profitability_risk",
+        "leverage_risk",
+        "coverage_risk",
+        "efficiency_risk",
+        "return_risk"
+    )
+
+    @property
+    def explanation(self):
+        parts = [
+            explain(self.SCHEMA, name)
+            for name, raised in zip(self.FLAGS, self.flag_values) if raised
+        ]
+        return " ".join(parts) if parts else explain(self.SCHEMA, "stable")
+
+    # The evaluated severity travels inside the flags dict
+    @property
+    def flags(self):
+        return {**dict(zip(self.FLAGS, self.flag_values)), "severity": self.severity}
+
+    def to_dict(self):
+        metrics = self.metrics
+        return {
+            "engine": self.ENGINE,
+            "Company": self.Company,
+            "Year": self.Year,
+            **metrics,
+            "metrics": dict(metrics),
+            "flags": self.flags,
+            "explanation": self.explanation
+        }
+
+
+class TrendRow(EngineRecord):
+    __slots__ = ()
+    ENGINE = "trend_engine"
+    SCHEMA = "trend_engine"
+    METRICS = ("ratio", "trend_value", "from_year", "to_year")
+    FLAGS = ("deteriorating_trend",)
+
+    @property
+    def explanation(self):
+        return explain(self.SCHEMA, self.severity, ratio=self.metric_values[0])
+
+
+class TTMTrendRow(TrendRow):
+    """
+    Trend over trailing-twelve-month windows: from_year / to_year are
+    period keys (see engines.period_model), so the record also carries
+    the first window's start, the last window's end (ISO dates) and the
+    sub-annual frequency the windows were built from.
+    """
+    __slots__ = ()
+    METRICS = TrendRow.METRICS + ("period_start", "period_end", "frequency")
+
+
+class CashFlowRow(EngineRecord):
+    __slots__ = ()
+    ENGINE = "cash_flow_engine"
+    SCHEMA = "cash_flow_engine"
+    METRICS = ("operating_profit", "coverage_proxy")
+    FLAGS = ("negative_operating_profit", "weak_coverage")
+
+
+class IndirectCashFlowRow(EngineRecord):
+    __slots__ = ()
+    ENGINE = "indirect_cash_flow_engine"
+    SCHEMA = "indirect_cash_flow_engine"
+    METRICS = ("operating_cf", "investing_cf", "financing_cf", "net_income", "working_capital_change")
+    FLAGS = ("negative_operating_cf", "financing_dependent", "negative_free_cash_flow")
+
+    # CashFlowRecord contract fields, derived from metrics and flags
+
+    @property
+    def cf_pattern(self):
+        operating_cf = self.metric_values[0]
+        if operating_cf is None:
+            return "insufficient_history"
+        negative_operating_cf, _, negative_free_cash_flow = self.flag_values
+        if negative_operating_cf:
+            return "burning"
+        return "strained" if negative_free_cash_flow else "healthy"
+
+    @property
+    def cf_risk_flag(self):
+        for name, raised in zip(self.FLAGS, self.flag_values):
+            if raised:
+                return name
+        return None
+
+    @property
+    def explanation(self):
+        return explain(self.SCHEMA, self.cf_pattern)
+
+    def to_dict(self):
+        operating_cf, investing_cf, financing_cf = self.metric_values[:3]
+        return {
+            "engine": self.ENGINE,
+            "Company": self.Company,
+            "Year": self.Year,
+            "operating_cf": operating_cf,
+            "investing_cf": investing_cf,
+            "financing_cf": financing_cf,
+            "cf_pattern": self.cf_pattern,
+            "cf_risk_flag": self.cf_risk_flag,
+            "metrics": self.metrics,
+            "flags": self.flags,
+            "severity": self.severity,
+            "explanation": self.explanation
+        }
+
+    def __getitem__(self, key):
+        if key in ("cf_pattern", "cf_risk_flag"):
+            return getattr(self, key)
+        return super().__getitem__(key)
+
+
+class AnomalyRow(EngineRecord):
+    __slots__ = ()
+    ENGINE = "anomaly_efficiency_engine"
+    SCHEMA = "anomaly_efficiency_engine"
+    METRICS = ("roa_yoy",)
+    FLAGS = ("roa_shock",)
+
+    @property
+    def explanation(self):
+        return explain(self.SCHEMA, "normal" if self.severity == "normal" else "flagged")
+
+
+class SolvencyRow(EngineRecord):
+    __slots__ = ()
+    ENGINE = "solvency_engine"
+    SCHEMA = "solvency_engine"
+    METRICS = ("debt_equity", "interest_coverage")
+    FLAGS = ("high_leverage", "weak_coverage")
+
+    @property
+    def explanation(self):
+        return explain(self.SCHEMA, "stable" if self.severity == "stable" else "flagged")
+
+
+# ------------------------------------------------------------------
+# Engine Output Finalization
+# ------------------------------------------------------------------
+
+def finalize_records(records, engine_name, compact=False):
+    """
+    Validates engine records against ENGINE_SCHEMAS and returns them in
+    the requested form: compact records, or canonical dicts.
+    """
+    if compact:
+        # Validate one dict at a time without materializing the output
+        validate_engine_output((r.to_dict() for r in records), engine_name)
+        return records
+
+    results = [r.to_dict() for r in records]
+    validate_engine_output(results, engine_name)
+    return results
+
+
+def records_to_dicts(records):
+    """
+    API-boundary conversion: compact records become canonical dicts,
+    anything already dict-shaped passes through unchanged.
+    """
+    return [r.to_dict() if isinstance(r, EngineRecord) else r for r in records]
@@ -0,0 +1,301 @@
+import math
+
+DEFAULT_SECTOR = "unassigned"
+RISK_BANDS = ("low", "medium", "high")
+SOLVENCY_SEVERITIES = ("stable", "watch", "action")
+
+
+# ------------------------------------------------------------------
+# Mergeable Quantile Sketch
+# ------------------------------------------------------------------
+
+class QuantileSketch:
+    """
+    DDSketch-style quantile sketch: values fall into logarithmic buckets
+    of ratio gamma = (1 + a) / (1 - a), so every quantile it returns is
+    within relative accuracy a of the exact one. State is bucket counts,
+    so two sketches merge by adding counts and a value can be removed
+    again by decrementing its bucket.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1.")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = {}  # bucket index -> count
+        self.negative = {}  # bucket index of -value -> count
+        self.zero = 0
+        self.count = 0
+
+    def _index(self, magnitude):
+        return math.ceil(math.log(magnitude) / self._log_gamma)
+
+    def _bucket_value(self, index):
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def add(self, value, count=1):
+        """
+        Adds value count times (a negative count removes it).
+        """
+        if value is None or value != value:
+            return
+        if abs(value) < 1e-12:
+            self.zero += count
+        else:
+            buckets = self.positive if value > 0 else self.negative
+            index = self._index(abs(value))
+            buckets[index] = buckets.get(index, 0) + count
+            if buckets[index] == 0:
+                del buckets[index]
+        self.count += count
+
+    def remove(self, value):
+        self.add(value, -1)
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy.")
+        for mine, theirs in ((self.positive, other.positive), (self.negative, other.negative)):
+            for index, count in theirs.items():
+                mine[index] = mine.get(index, 0) + count
+        self.zero += other.zero
+        self.count += other.count
+        return self
+
+    def quantile(self, q):
+        """
+        Approximate q-quantile (0 <= q <= 1), None if empty.
+        """
+        if self.count <= 0:
+            return None
+        rank = q * (self.count - 1)
+
+        seen = 0
+        for index in sorted(self.negative, reverse=True):
+            seen += self.negative[index]
+            if seen > rank:
+                return -self._bucket_value(index)
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+        for index in sorted(self.positive):
+            seen += self.positive[index]
+            if seen > rank:
+                return self._bucket_value(index)
+        return self._bucket_value(max(self.positive)) if self.positive else 0.0
+
+
+# ------------------------------------------------------------------
+# Portfolio / Sector Rollup
+# ------------------------------------------------------------------
+
+class PortfolioRollup:
+    """
+    AFAP Phase 3 — Incremental Portfolio & Sector Rollup
+    Aggregates composite risk and solvency output per (Year, sector):
+    risk band counts and score sums, solvency severity counts, weighted
+    average debt / equity and a debt / equity quantile sketch.
+
+    Every company-year's contribution is remembered, so adding a new or
+    restated company-year subtracts its previous contribution and adds
+    the new one: an update costs O(changed rows), not O(portfolio).
+    Rollups over disjoint company sets (shards) combine with merge().
+
+    sectors and weights map Company -> sector label / leverage weight
+    (dicts or callables); unmapped companies fall into DEFAULT_SECTOR
+    with weight 1.
+    """
+
+    def __init__(self, sectors=None, weights=None, relative_accuracy=0.01):
+        self._sectors = sectors or {}
+        self._weights = weights or {}
+        self.relative_accuracy = relative_accuracy
+
+        self.band_counts = {}       # (Year, sector, band) -> count
+        self.score_sums = {}        # (Year, sector) -> [count, sum]
+        self.severity_counts = {}   # (Year, sector, severity) -> count
+        self.leverage_sums = {}     # (Year, sector) -> [count, sum of weights, weighted sum]
+        self.leverage_sketches = {} # (Year, sector) -> QuantileSketch
+
+        self._composite = {}        # (Company, Year) -> (sector, band, score)
+        self._solvency = {}         # (Company, Year) -> (sector, severity, debt_equity, weight)
+
+    def sector(self, company):
+        if callable(self._sectors):
+            return self._sectors(company)
+        return self._sectors.get(company, DEFAULT_SECTOR)
+
+    def weight(self, company):
+        if callable(self._weights):
+            return self._weights(company)
+        return self._weights.get(company, 1.0)
+
+    # ------------------------------------------------------------------
+    # Incremental Updates
+    # ------------------------------------------------------------------
+
+    def add(self, composite_results=(), solvency_results=()):
+        """
+        Adds (or restates) company-years from composite_risk_engine and
+        solvency_engine output (canonical dicts or compact records).
+        """
+        for record in composite_results:
+            key = (record["Company"], int(record["Year"]))
+            self._apply_composite(key, self._composite.get(key), -1)
+            contribution = (self.sector(key[0]), record["risk_band"], record["composite_score"])
+            self._composite[key] = contribution
+            self._apply_composite(key, contribution, 1)
+
+        for record in solvency_results:
+            key = (record["Company"], int(record["Year"]))
+            self._apply_solvency(key, self._solvency.get(key), -1)
+            debt_equity = record["metrics"]["debt_equity"]
+            if debt_equity is not None and debt_equity != debt_equity:
+                debt_equity = None
+            contribution = (
+                self.sector(key[0]),
+                record["severity"],
+                None if debt_equity is None else float(debt_equity),
+                float(self.weight(key[0]))
+            )
+            self._solvency[key] = contribution
+            self._apply_solvency(key, contribution, 1)
+
+        return self
+
+    def remove(self, keys):
+        """
+        Drops (Company, Year) keys from every aggregate.
+        """
+        for company, year in keys:
+            key = (company, int(year))
+            self._apply_composite(key, self._composite.pop(key, None), -1)
+            self._apply_solvency(key, self._solvency.pop(key, None), -1)
+        return self
+
+    def merge(self, other):
+        """
+        Folds in a rollup built over a disjoint set of company-years.
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge rollups with different relative accuracy.")
+        overlap = (self._composite.keys() & other._composite.keys()) | (self._solvency.keys() & other._solvency.keys())
+        if overlap:
+            raise ValueError(f"Rollups overlap on {len(overlap)} company-years, e.g. {sorted(overlap)[0]}")
+
+        for key, count in other.band_counts.items():
+            _bump(self.band_counts, key, count)
+        for key, count in other.severity_counts.items():
+            _bump(self.severity_counts, key, count)
+        for key, sums in other.score_sums.items():
+            _bump_sums(self.score_sums, key, *sums)
+        for key, sums in other.leverage_sums.items():
+            _bump_sums(self.leverage_sums, key, *sums)
+        for key, sketch in other.leverage_sketches.items():
+            mine = self.leverage_sketches.setdefault(key, QuantileSketch(self.relative_accuracy))
+            mine.merge(sketch)
+
+        self._composite.update(other._composite)
+        self._solvency.update(other._solvency)
+        return self
+
+    def _apply_composite(self, key, contribution, sign):
+        if contribution is None:
+            return
+        sector, band, score = contribution
+        year = key[1]
+        _bump(self.band_counts, (year, sector, band), sign)
+        _bump_sums(self.score_sums, (year, sector), sign, sign * score)
+
+    def _apply_solvency(self, key, contribution, sign):
+        if contribution is None:
+            return
+        sector, severity, debt_equity, weight = contribution
+        year = key[1]
+        _bump(self.severity_counts, (year, sector, severity), sign)
+        if debt_equity is None:
+            return
+        _bump_sums(self.leverage_sums, (year, sector), sign, sign * weight, sign * weight * debt_equity)
+        sketch = self.leverage_sketches.setdefault((year, sector), QuantileSketch(self.relative_accuracy))
+        sketch.add(debt_equity, sign)
+        if sketch.count == 0:
+            del self.leverage_sketches[(year, sector)]
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def band_distribution(self, year=None):
+        """
+        {Year: {band: count}} across sectors (one year if given).
+        """
+        result = {}
+        for (y, _, band), count in self.band_counts.items():
+            if year is None or y == year:
+                counts = result.setdefault(y, dict.fromkeys(RISK_BANDS, 0))
+                counts[band] = counts.get(band, 0) + count
+        return dict(sorted(result.items()))
+
+    def severity_count(self, severity="action", year=None, sector=None):
+        return sum(
+            count for (y, s, sev), count in self.severity_counts.items()
+            if sev == severity and (year is None or y == year) and (sector is None or s == sector)
+        )
+
+    def weighted_leverage(self, year, sector):
+        """
+        Weighted average debt / equity of a (Year, sector), None if empty.
+        """
+        _, weight, total = self.leverage_sums.get((year, sector), (0, 0.0, 0.0))
+        return total / weight if weight else None
+
+    def leverage_quantile(self, year, sector, q):
+        sketch = self.leverage_sketches.get((year, sector))
+        return sketch.quantile(q) if sketch is not None else None
+
+    def rollup_rows(self, quantiles=(0.5, 0.9)):
+        """
+        One dashboard row per (Year, sector), sorted.
+        """
+        keys = (
+            {k[:2] for k in self.band_counts}
+            | {k[:2] for k in self.severity_counts}
+            | set(self.leverage_sums)
+        )
+        rows = []
+        for year, sector in sorted(keys, key=lambda k: (k[0], str(k[1]))):
+            n, score_total = self.score_sums.get((year, sector), (0, 0.0))
+            row = {
+                "Year": year,
+                "sector": sector,
+                **{f"band_{b}": self.band_counts.get((year, sector, b), 0) for b in RISK_BANDS},
+                "mean_composite_score": score_total / n if n else None,
+                **{f"solvency_{s}": self.severity_counts.get((year, sector, s), 0) for s in SOLVENCY_SEVERITIES},
+                "weighted_debt_equity": self.weighted_leverage(year, sector)
+            }
+            for q in quantiles:
+                row[f"debt_equity_p{round(q * 100)}"] = self.leverage_quantile(year, sector, q)
+            rows.append(row)
+        return rows
+
+
+def _bump(counts, key, delta):
+    value = counts.get(key, 0) + delta
+    if value:
+        counts[key] = value
+    else:
+        counts.pop(key, None)
+
+
+def _bump_sums(sums, key, delta_count, *deltas):
+    # [count, sum, ...]; the entry goes once its count is back to zero
+    current = sums.get(key)
+    count = (current[0] if current else 0) + delta_count
+    if not count:
+        sums.pop(key, None)
+    elif current:
+        sums[key] = [count, *(total + delta for total, delta in zip(current[1:], deltas))]
+    else:
+        sums[key] = [count, *deltas]
@@ -0,0 +1,233 @@
+import os
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from .ratio_matrix import compute_ratio_arrays
+from .ratio_engine_eval import DEFAULT_CONFIG, evaluate_ratio_arrays
+from .records import RATIO_METRICS
+
+# ------------------------------------------------------------------
+# Shared Arrays
+# ------------------------------------------------------------------
+# A worker process receives a descriptor (a few dozen bytes: buffer
+# name or file path, shape, dtype) instead of a pickled copy of the
+# data, and attaches a numpy view of the same memory.
+# ------------------------------------------------------------------
+
+BACKINGS = ("shm", "mmap")
+
+_untracked_lock = threading.Lock()
+
+
+class SharedArray:
+    """
+    A numpy array in multiprocessing.shared_memory (backing="shm") or a
+    memory-mapped .npy file (backing="mmap", in directory or a temp dir).
+    The creating process owns it and frees it on close().
+    """
+
+    def __init__(self, shape, dtype=np.float64, backing="shm", directory=None):
+        if backing not in BACKINGS:
+            raise ValueError(f"Unknown backing: {backing}")
+
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.backing = backing
+        nbytes = max(int(np.prod(self.shape)) * self.dtype.itemsize, 1)
+
+        if backing == "shm":
+            self._shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            self._path = None
+            self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self._shm.buf)
+        else:
+            self._shm = None
+            self._path = os.path.join(directory or tempfile.gettempdir(), f"afap-{uuid.uuid4().hex}.npy")
+            self.array = np.lib.format.open_memmap(self._path, mode="w+", dtype=self.dtype, shape=self.shape)
+
+    @classmethod
+    def from_array(cls, array, backing="shm", directory=None):
+        array = np.asarray(array)
+        shared = cls(array.shape, array.dtype, backing, directory)
+        shared.array[...] = array
+        return shared
+
+    @property
+    def descriptor(self):
+        return {
+            "backing": self.backing,
+            "name": self._shm.name if self._shm is not None else None,
+            "path": self._path,
+            "shape": self.shape,
+            "dtype": self.dtype.str
+        }
+
+    def close(self):
+        self.array = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+        if self._path is not None:
+            os.remove(self._path)
+            self._path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach_array(descriptor):
+    """
+    Attaches to a SharedArray from its descriptor without copying.
+    Returns (handle, array); call handle.close() (or del the array for
+    mmap) once done. The owner, not the attaching process, frees it.
+    """
+    shape, dtype = tuple(descriptor["shape"]), np.dtype(descriptor["dtype"])
+
+    if descriptor["backing"] == "shm":
+        shm = _open_untracked(descriptor["name"])
+        return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    array = np.load(descriptor["path"], mmap_mode="r+")
+    return _MemmapHandle(), array
+
+
+def _open_untracked(name):
+    # An attaching process must not register the segment with a resource
+    # tracker of its own, which would unlink it when that process exits
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13: no track argument
+        pass
+
+    # Unregistering after the fact is not an option: workers share the
+    # owner's tracker, so that would drop the owner's registration too.
+    # Instead skip registering this one segment; every other register
+    # call, from any thread, still reaches the tracker.
+    with _untracked_lock:
+        register = resource_tracker.register
+
+        def register_others(resource_name, rtype):
+            if rtype != "shared_memory" or resource_name.lstrip("/") != name.lstrip("/"):
+                register(resource_name, rtype)
+
+        resource_tracker.register = register_others
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class _MemmapHandle:
+    def close(self):
+        pass
+
+
+# ------------------------------------------------------------------
+# Shared Ratio Workspace
+# ------------------------------------------------------------------
+
+class SharedRatioWorkspace:
+    """
+    AFAP Phase 3 — Shared Ratio Workspace
+    Line-item matrix (see engines.ratio_matrix) as input, plus
+    preallocated outputs: the ratio matrix (columns in RATIO_METRICS
+    order) and evaluate_ratios severity codes. Workers attach through
+    the workspace descriptor and fill their row range in place.
+    """
+
+    def __init__(self, values, backing="shm", directory=None):
+        values = np.asarray(values, dtype=np.float64)
+        n_rows = len(values)
+
+        self.line_items = SharedArray.from_array(values, backing, directory)
+        self.ratios = SharedArray((n_rows, len(RATIO_METRICS)), np.float64, backing, directory)
+        self.severity_codes = SharedArray((n_rows,), np.int8, backing, directory)
+
+    def __len__(self):
+        return self.line_items.shape[0]
+
+    @property
+    def descriptor(self):
+        return {
+            "line_items": self.line_items.descriptor,
+            "ratios": self.ratios.descriptor,
+            "severity_codes": self.severity_codes.descriptor
+        }
+
+    def close(self):
+        for shared in (self.line_items, self.ratios, self.severity_codes):
+            shared.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def compute_ratio_block(descriptor, start, stop, eval_config=None):
+    """
+    Worker task: ratios and evaluation severity for rows [start, stop)
+    of a SharedRatioWorkspace, written straight into its outputs.
+    """
+    cfg = DEFAULT_CONFIG.copy()
+    if eval_config:
+        cfg.update(eval_config)
+
+    handles = {}
+    arrays = {}
+    for key, array_descriptor in descriptor.items():
+        handles[key], arrays[key] = attach_array(array_descriptor)
+
+    try:
+        ratios = compute_ratio_arrays(arrays["line_items"][start:stop])
+        for j, metric in enumerate(RATIO_METRICS):
+            arrays["ratios"][start:stop, j] = ratios[metric]
+        _, severity_codes = evaluate_ratio_arrays(ratios, cfg)
+        arrays["severity_codes"][start:stop] = severity_codes
+    finally:
+        arrays.clear()
+        for handle in handles.values():
+            handle.close()
+
+    return stop - start
+
+
+def parallel_ratio_arrays(values, n_workers=None, chunk_size=65_536, backing="shm", eval_config=None, executor=None):
+    """
+    Process-pool form of compute_ratio_arrays + evaluate_ratio_arrays
+    over a line-item matrix. Only descriptors and row ranges cross the
+    process boundary; results are copied out of shared memory once.
+
+    Returns (ratios, severity_codes): ratio name -> float64 array, and
+    int8 codes indexing SEVERITY_LEVELS.
+    """
+    with SharedRatioWorkspace(values, backing) as workspace:
+        descriptor = workspace.descriptor
+        bounds = [(start, min(start + chunk_size, len(workspace))) for start in range(0, len(workspace), chunk_size)]
+
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(max_workers=n_workers)
+        try:
+            futures = [executor.submit(compute_ratio_block, descriptor, start, stop, eval_config) for start, stop in bounds]
+            for future in futures:
+                future.result()
+        finally:
+            if own_executor:
+                executor.shutdown()
+
+        ratio_matrix = workspace.ratios.array
+        ratios = {metric: ratio_matrix[:, j].copy() for j, metric in enumerate(RATIO_METRICS)}
+        severity_codes = workspace.severity_codes.array.copy()
+        del ratio_matrix
+
+    return ratios, severity_codes
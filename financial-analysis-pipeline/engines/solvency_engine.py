@@ -1,12 +1,23 @@
 import pandas as pd
-from .schema_validator import validate_engine_output
+from .records import SolvencyRow, finalize_records
 
-def solvency_engine(ratios_list):
+DEFAULT_SOLVENCY_CONFIG = {
+    "debt_equity_max": 1.5,
+    "interest_coverage_min": 1.5
+}
+
+def solvency_engine(ratios_list, compact=False, config=None):
     """
     AFAP Phase 3 — Locked Solvency Engine
     Evaluates capital structure and coverage metrics.
+    With compact=True, returns slotted SolvencyRow records instead of dicts.
+    config overrides DEFAULT_SOLVENCY_CONFIG thresholds.
     """
 
+    cfg = DEFAULT_SOLVENCY_CONFIG.copy()
+    if config:
+        cfg.update(config)
+
     # Convert input to DataFrame
     df = pd.DataFrame(ratios_list)
 
@@ -29,8 +40,8 @@ def solvency_engine(ratios_list):
             interest_coverage = row.get("interest_coverage")
 
             flags = {
-                "high_leverage": debt_equity is not None and debt_equity > 1.5,
-                "weak_coverage": interest_coverage is not None and interest_coverage < 1.5
+                "high_leverage": debt_equity is not None and debt_equity > cfg["debt_equity_max"],
+                "weak_coverage": interest_coverage is not None and interest_coverage < cfg["interest_coverage_min"]
             }
 
             count = sum(flags.values())
@@ -41,24 +52,13 @@ def solvency_engine(ratios_list):
                 else "stable"
             )
 
-            results.append({
-                "engine": "solvency_engine",
-                "Company": company,
-                "Year": int(row["Year"]),
-                "metrics": {
-                    "debt_equity": debt_equity,
-                    "interest_coverage": interest_coverage
-                },
-                "flags": flags,
-                "severity": severity,
-                "explanation": (
-                    "Capital structure shows solvency risk."
-                    if severity != "stable"
-                    else "Solvency position acceptable."
-                )
-            })
+            results.append(SolvencyRow(
+                company,
+                int(row["Year"]),
+                (debt_equity, interest_coverage),
+                (flags["high_leverage"], flags["weak_coverage"]),
+                severity
+            ))
 
     # ✅ Schema validation stays INSIDE the engine
-    validate_engine_output(results, "solvency_engine")
-
-    return results
+    return finalize_records(results, "solvency_engine", compact)
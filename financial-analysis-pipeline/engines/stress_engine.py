@@ -0,0 +1,205 @@
+import numpy as np
+import pandas as pd
+
+from config.defaults import DEFAULT_CLIENT_CONFIG
+from config.utils import merge_config
+from .ratio_matrix import LINE_ITEMS, LINE_ITEM_INDEX, build_line_item_matrix, compute_ratio_arrays, derived_line_items
+from .solvency_engine import DEFAULT_SOLVENCY_CONFIG
+
+RISK_BANDS = ("low", "medium", "high")
+
+# ------------------------------------------------------------------
+# Shock Vectors
+# ------------------------------------------------------------------
+# A shock matrix has shape (n_scenarios, n_line_items) and holds
+# multipliers applied to every company-year: 0.8 on revenue is a -20%
+# revenue shock, 1.3 on finance_costs a +30% finance cost shock.
+# ------------------------------------------------------------------
+
+def build_shock_matrix(scenarios: list[dict]) -> np.ndarray:
+    """
+    Converts named scenarios, e.g. {"revenue": -0.2, "finance_costs": 0.3},
+    (relative changes per line item) into a multiplier matrix.
+    """
+    shocks = np.ones((len(scenarios), len(LINE_ITEMS)))
+    for s, scenario in enumerate(scenarios):
+        for item, change in scenario.items():
+            if item not in LINE_ITEM_INDEX:
+                raise ValueError(f"Unknown line item: {item}")
+            shocks[s, LINE_ITEM_INDEX[item]] = 1 + change
+    return shocks
+
+
+def random_shock_matrix(n_scenarios: int, volatility: dict, correlation=None, seed=None) -> np.ndarray:
+    """
+    Draws correlated normal shocks. volatility maps line item -> standard
+    deviation of its relative change; correlation is an optional
+    (n_shocked, n_shocked) matrix ordered like volatility.
+    """
+    items = list(volatility)
+    unknown = [i for i in items if i not in LINE_ITEM_INDEX]
+    if unknown:
+        raise ValueError(f"Unknown line items: {unknown}")
+
+    sigma = np.array([volatility[i] for i in items], dtype=np.float64)
+    corr = np.eye(len(items)) if correlation is None else np.asarray(correlation, dtype=np.float64)
+    cov = corr * np.outer(sigma, sigma)
+
+    rng = np.random.default_rng(seed)
+    draws = rng.multivariate_normal(np.zeros(len(items)), cov, size=n_scenarios)
+
+    shocks = np.ones((n_scenarios, len(LINE_ITEMS)))
+    for j, item in enumerate(items):
+        shocks[:, LINE_ITEM_INDEX[item]] = 1 + draws[:, j]
+    return shocks
+
+
+# ------------------------------------------------------------------
+# Stress Engine
+# ------------------------------------------------------------------
+
+def stress_engine(financials_df: pd.DataFrame, shocks: np.ndarray, config: dict | None = None, chunk_size: int = 256) -> dict:
+    """
+    AFAP Phase 3 — Monte Carlo Stress Engine
+    Applies every shock vector to the line items behind ratio_engine_core
+    and cash_flow_engine, recomputes ratios, cash flow / anomaly /
+    solvency / trend severities and the composite score as batched
+    (scenarios x company-years) array operations, and reports how
+    composite risk bands migrate relative to the unshocked baseline.
+
+    Scenarios are processed chunk_size at a time to bound memory.
+
+    Returns:
+        {
+          "band_probabilities": DataFrame — per composite company-year,
+              baseline band/score and P(band) under stress,
+          "transition_matrix": DataFrame — portfolio P(to_band | from_band),
+          "n_scenarios": int
+        }
+    """
+    shocks = np.atleast_2d(np.asarray(shocks, dtype=np.float64))
+    if shocks.shape[1] != len(LINE_ITEMS):
+        raise ValueError(f"Shock vectors must have {len(LINE_ITEMS)} line items.")
+    if len(shocks) == 0:
+        raise ValueError("At least one shock scenario is required.")
+
+    # Same defaults composite_risk_engine gets from the client config
+    analysis_cfg = merge_config(DEFAULT_CLIENT_CONFIG["analysis"], (config or {}).get("analysis", {}))
+    weights = analysis_cfg["risk_weights"]
+    bands = analysis_cfg["risk_bands"]
+    solvency_cfg = {**DEFAULT_SOLVENCY_CONFIG, **(config or {}).get("solvency", {})}
+
+    keys, values = build_line_item_matrix(financials_df)
+    layout = _company_layout(keys)
+
+    baseline_scores, baseline_bands = _composite_bands(values[None], layout, weights, bands, solvency_cfg)
+    baseline_scores, baseline_bands = baseline_scores[0], baseline_bands[0]
+
+    n_composite = len(layout["composite_rows"])
+    band_counts = np.zeros((n_composite, len(RISK_BANDS)), dtype=np.int64)
+
+    for start in range(0, len(shocks), chunk_size):
+        chunk = shocks[start:start + chunk_size]
+        _, chunk_bands = _composite_bands(values[None] * chunk[:, None, :], layout, weights, bands, solvency_cfg)
+        for b in range(len(RISK_BANDS)):
+            band_counts[:, b] += (chunk_bands == b).sum(axis=0)
+
+    n_scenarios = len(shocks)
+    probabilities = band_counts / n_scenarios
+
+    composite_keys = keys.iloc[layout["composite_rows"]].reset_index(drop=True)
+    band_probabilities = pd.DataFrame({
+        "Company": composite_keys["Company"],
+        "Year": composite_keys["Year"].astype(int),
+        "baseline_score": baseline_scores,
+        "baseline_band": [RISK_BANDS[b] for b in baseline_bands],
+        **{f"p_{band}": probabilities[:, b] for b, band in enumerate(RISK_BANDS)}
+    })
+
+    transitions = np.zeros((len(RISK_BANDS), len(RISK_BANDS)))
+    for b in range(len(RISK_BANDS)):
+        rows = baseline_bands == b
+        if rows.any():
+            transitions[b] = band_counts[rows].sum(axis=0) / (rows.sum() * n_scenarios)
+    transition_matrix = pd.DataFrame(
+        transitions,
+        index=pd.Index(RISK_BANDS, name="from_band"),
+        columns=pd.Index(RISK_BANDS, name="to_band")
+    )
+
+    return {
+        "band_probabilities": band_probabilities,
+        "transition_matrix": transition_matrix,
+        "n_scenarios": n_scenarios
+    }
+
+
+# ------------------------------------------------------------------
+# Internal Helpers
+# ------------------------------------------------------------------
+
+def _company_layout(keys):
+    """
+    Row positions the per-company engines need: previous row of the
+    same company (anomaly YoY) and first/last rows of companies with at
+    least two years (trend anchors, which are also the composite rows).
+    """
+    companies = keys["Company"].to_numpy()
+    n = len(companies)
+
+    same_as_prev = np.zeros(n, dtype=bool)
+    same_as_prev[1:] = companies[1:] == companies[:-1]
+
+    starts = np.flatnonzero(~same_as_prev)
+    ends = np.append(starts[1:], n) - 1
+    multi_year = ends > starts
+
+    return {
+        "has_prev": same_as_prev,
+        "first_rows": starts[multi_year],
+        "composite_rows": ends[multi_year]
+    }
+
+
+def _composite_bands(values, layout, weights, bands, solvency_cfg):
+    """
+    values: (n_scenarios, n_rows, n_items). Returns composite scores and
+    band codes (index into RISK_BANDS) for the composite rows.
+    """
+    ratios = compute_ratio_arrays(values)
+    d = derived_line_items(values)
+    rows = layout["composite_rows"]
+
+    # Cash flow engine: "watch" when exactly one flag is raised
+    with np.errstate(divide="ignore", invalid="ignore"):
+        coverage_proxy = np.where(d["finance_costs"] != 0, d["operating_profit"] / d["finance_costs"], np.nan)
+    cash_flags = (d["operating_profit"] < 0).astype(np.int8) + (coverage_proxy < 1)
+    cash_watch = cash_flags[:, rows] == 1
+
+    # Anomaly engine: "high" needs two flags but only roa_shock exists
+    roa = ratios["roa"]
+    prev_roa = np.roll(roa, 1, axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roa_yoy = np.where(layout["has_prev"], roa / prev_roa - 1, np.nan)
+    anomaly_high = ((roa_yoy < -0.4).astype(np.int8) >= 2)[:, rows]
+
+    # Solvency engine: "action" when both flags are raised
+    solvency_action = (
+        (ratios["debt_equity"] > solvency_cfg["debt_equity_max"])
+        & (ratios["interest_coverage"] < solvency_cfg["interest_coverage_min"])
+    )[:, rows]
+
+    # Trend engine: composite indexes the last trend row per company,
+    # which is the roe trend anchored at the company's final year
+    roe = ratios["roe"]
+    trend_watch = (roe[:, rows] - roe[:, layout["first_rows"]]) < 0
+
+    # Same accumulation order as composite_risk_engine
+    score = np.zeros(cash_watch.shape)
+    score = score + np.where(cash_watch, weights["cash_flow"], 0)
+    score = score + np.where(anomaly_high, weights["anomaly"], 0)
+    score = score + np.where(solvency_action, weights["solvency"], 0)
+    score = score + np.where(trend_watch, weights["trend"], 0)
+
+    band_codes = np.where(score >= bands["high"], 2, np.where(score >= bands["medium"], 1, 0))
+    return score, band_codes
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+from .ratio_engine_eval import DEFAULT_CONFIG, SEVERITY_LEVELS, evaluate_ratio_arrays
+from .records import RATIO_METRICS
+from .solvency_engine import DEFAULT_SOLVENCY_CONFIG
+
+SOLVENCY_SEVERITY_LEVELS = ("stable", "watch", "action")
+
+
+def sweep_thresholds(ratios_df: pd.DataFrame, configs: list[dict], chunk_size: int = 64) -> pd.DataFrame:
+    """
+    AFAP Phase 3 — Threshold Calibration Sweep
+    Evaluates every threshold config against the ratio matrix in one
+    broadcasted computation per chunk of configs.
+
+    Each config overrides DEFAULT_CONFIG (evaluate_ratios thresholds);
+    an optional "solvency" key overrides DEFAULT_SOLVENCY_CONFIG.
+
+    Returns one row per config: the resolved thresholds, the rate of
+    each evaluation / solvency flag, and the share of company-years in
+    each severity level.
+    """
+    ratios = _ratio_arrays(ratios_df)
+    n_rows = len(ratios_df)
+
+    summaries = []
+
+    for offset, eval_cfg, solv_cfg in _config_chunks(configs, chunk_size):
+        eval_flags, eval_sev = evaluate_ratio_arrays(ratios, eval_cfg)
+        solv_flags, solv_sev = _solvency_arrays(ratios, solv_cfg)
+
+        n_chunk = eval_sev.shape[0]
+        chunk = {"config_id": np.arange(offset, offset + n_chunk)}
+
+        for name, values in eval_cfg.items():
+            chunk[name] = values[:, 0]
+        for name, values in solv_cfg.items():
+            chunk[f"solvency_{name}"] = values[:, 0]
+
+        for name, flag in eval_flags.items():
+            chunk[f"{name}_rate"] = flag.mean(axis=1) if n_rows else np.nan
+        for name, flag in solv_flags.items():
+            chunk[f"solvency_{name}_rate"] = flag.mean(axis=1) if n_rows else np.nan
+
+        for code, level in enumerate(SEVERITY_LEVELS):
+            chunk[f"eval_{level}_share"] = (eval_sev == code).mean(axis=1) if n_rows else np.nan
+        for code, level in enumerate(SOLVENCY_SEVERITY_LEVELS):
+            chunk[f"solvency_{level}_share"] = (solv_sev == code).mean(axis=1) if n_rows else np.nan
+
+        summaries.append(pd.DataFrame(chunk))
+
+    if not summaries:
+        return pd.DataFrame()
+
+    return pd.concat(summaries, ignore_index=True)
+
+
+def iter_sweep_rows(ratios_df: pd.DataFrame, configs: list[dict], chunk_size: int = 64):
+    """
+    Streams per-row sweep results (one dict per config x company-year)
+    without materializing the full grid.
+    """
+    ratios = _ratio_arrays(ratios_df)
+    companies = ratios_df["Company"].to_numpy()
+    years = ratios_df["Year"].to_numpy()
+
+    for offset, eval_cfg, solv_cfg in _config_chunks(configs, chunk_size):
+        eval_flags, eval_sev = evaluate_ratio_arrays(ratios, eval_cfg)
+        solv_flags, solv_sev = _solvency_arrays(ratios, solv_cfg)
+
+        for c in range(eval_sev.shape[0]):
+            for i in range(len(companies)):
+                yield {
+                    "config_id": offset + c,
+                    "Company": companies[i],
+                    "Year": int(years[i]),
+                    "flags": {name: bool(flag[c, i]) for name, flag in eval_flags.items()},
+                    "severity": SEVERITY_LEVELS[eval_sev[c, i]],
+                    "solvency_flags": {name: bool(flag[c, i]) for name, flag in solv_flags.items()},
+                    "solvency_severity": SOLVENCY_SEVERITY_LEVELS[solv_sev[c, i]]
+                }
+
+
+# ------------------------------------------------------------------
+# Internal Helpers
+# ------------------------------------------------------------------
+
+def _ratio_arrays(ratios_df):
+    missing = [c for c in ("Company", "Year", *RATIO_METRICS) if c not in ratios_df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+
+    return {
+        m: pd.to_numeric(ratios_df[m], errors="coerce").to_numpy(dtype=np.float64)
+        for m in RATIO_METRICS
+    }
+
+
+def _config_chunks(configs, chunk_size):
+    """
+    Yields (offset, eval_cfg, solvency_cfg) with every threshold as a
+    (n_chunk, 1) column so it broadcasts against (n_rows,) ratios.
+    """
+    for offset in range(0, len(configs), chunk_size):
+        chunk = configs[offset:offset + chunk_size]
+
+        eval_rows = []
+        solv_rows = []
+        for config in chunk:
+            unknown = set(config) - set(DEFAULT_CONFIG) - {"solvency"}
+            if unknown:
+                raise ValueError(f"Unknown threshold keys: {sorted(unknown)}")
+            eval_rows.append({**DEFAULT_CONFIG, **{k: v for k, v in config.items() if k != "solvency"}})
+            solv_rows.append({**DEFAULT_SOLVENCY_CONFIG, **config.get("solvency", {})})
+
+        eval_cfg = {k: np.array([[r[k]] for r in eval_rows], dtype=np.float64) for k in DEFAULT_CONFIG}
+        solv_cfg = {k: np.array([[r[k]] for r in solv_rows], dtype=np.float64) for k in DEFAULT_SOLVENCY_CONFIG}
+
+        yield offset, eval_cfg, solv_cfg
+
+
+def _solvency_arrays(ratios, cfg):
+    """
+    Vectorized form of the solvency_engine flag rules.
+    """
+    flags = {
+        "high_leverage": ratios["debt_equity"] > cfg["debt_equity_max"],
+        "weak_coverage": ratios["interest_coverage"] < cfg["interest_coverage_min"]
+    }
+    severity_codes = flags["high_leverage"].astype(np.int8) + flags["weak_coverage"]
+    return flags, severity_codes
@@ -1,10 +1,15 @@
 import pandas as pd
-from .schema_validator import validate_engine_output
+from .records import TrendRow, TTMTrendRow, finalize_records
+from .period_model import ttm_window_bounds
 
-def trend_engine(ratios_list):
+def trend_engine(ratios_list, compact=False, frequency=None):
     """
     AFAP Phase 3 — Locked Trend Engine
     Evaluates directional trends in key financial ratios.
+    With compact=True, returns slotted TrendRow records instead of dicts.
+
+    frequency ("Q" or "M") marks Year as TTM window period keys; records
+    then also carry the windows' period_start / period_end and frequency.
     """
 
     df = pd.DataFrame(ratios_list)
@@ -46,24 +51,30 @@ def trend_engine(ratios_list):
                 "watch" if trend_value < 0 else "stable"
             )
 
-            results.append({
-                "engine": "trend_engine",
-                "Company": company,
-                "Year": end_year,  # 🔑 anchor to most recent year
-                "metrics": {
-                    "ratio": ratio,
-                    "trend_value": trend_value,
-                    "from_year": start_year,
-                    "to_year": end_year
-                },
-                "flags": flags,
-                "severity": severity,
-                "explanation": (
-                    f"Negative trend observed in {ratio}."
-                    if severity == "watch"
-                    else f"{ratio} trend stable or improving."
-                )
-            })
-
-    validate_engine_output(results, "trend_engine")
-    return results
+            results.append(TrendRow(
+                company,
+                end_year,  # 🔑 anchor to most recent year
+                (ratio, trend_value, start_year, end_year),
+                (flags["deteriorating_trend"],),
+                severity
+            ))
+
+    if frequency is not None:
+        results = ttm_trend_rows(results, frequency)
+
+    return finalize_records(results, "trend_engine", compact)
+
+
+def ttm_trend_rows(rows, frequency):
+    """
+    TrendRows over TTM windows as TTMTrendRows, dated from the first
+    window's start to the last window's end.
+    """
+    if not rows:
+        return rows
+    start, _ = ttm_window_bounds([r.metric_values[2] for r in rows], frequency)
+    _, end = ttm_window_bounds([r.metric_values[3] for r in rows], frequency)
+    return [
+        TTMTrendRow(r.Company, r.Year, (*r.metric_values, s, e, frequency), r.flag_values, r.severity)
+        for r, s, e in zip(rows, start.dt.strftime("%Y-%m-%d").tolist(), end.dt.strftime("%Y-%m-%d").tolist())
+    ]
@@ -13,41 +13,15 @@ AFAP_OUTPUT_KEYS = [
     "ai_interpretation"
 ]
 
+import os
+import queue
+import threading
+import time
 from datetime import datetime
+import numpy as np
 import pandas as pd
-from config.defaults import DEFAULT_CLIENT_CONFIG
-from config.utils import merge_config
-
-# ------------------------------------------------------------------
-# Analysis Profiles (AIFs – AFAP Interpretation Frameworks)
-# ------------------------------------------------------------------
-
-ANALYSIS_PROFILES = {
-    "full_diagnostic": {
-        "engines": ["ratio", "trend", "cash_flow", "anomaly", "solvency", "composite_risk"],
-        "metrics_scope": "all"
-    },
-    "solvency_focus": {
-        "engines": ["ratio", "solvency", "composite_risk"],
-        "metrics_scope": ["debt_to_equity", "interest_coverage", "equity_ratio"]
-    },
-    "liquidity_focus": {
-        "engines": ["ratio", "trend", "cash_flow", "composite_risk"],
-        "metrics_scope": ["current_ratio", "quick_ratio", "cash_ratio"]
-    },
-    "performance_focus": {
-        "engines": ["ratio", "trend"],
-        "metrics_scope": ["operating_margin", "net_margin", "asset_turnover"]
-    },
-    "risk_scan": {
-        "engines": ["ratio", "solvency", "anomaly", "composite_risk"],
-        "metrics_scope": "all"
-    },
-    "going_concern_screen": {
-        "engines": ["ratio", "trend", "solvency", "composite_risk"],
-        "metrics_scope": "critical_only"
-    }
-}
+from config.defaults import ANALYSIS_PROFILES
+from config.loader import resolve_client_config
 
 # ------------------------------------------------------------------
 # Safe engine payload extractor (schema-agnostic)
@@ -63,34 +37,98 @@ def extract_engine_payload(engine_outputs, company, year):
     return {}
 
 # ------------------------------------------------------------------
-# AFAP Orchestrator
+# Engine Stage
 # ------------------------------------------------------------------
 
-def afap_run(
-    financials_df,
-    client_config=None,
-    analysis_profile="full_diagnostic",
-    external_context=None,
-    use_mock_ai=False
-):
-    """
-    Runs AFAP analysis for a given financials DataFrame and profile.
-    """
+# Profile engine names -> AFAP output keys (the proxy and indirect cash
+# flow engines fill the same output; a profile runs one or the other)
+ENGINE_OUTPUT_KEYS = {
+    "ratio": "ratios",
+    "trend": "trend",
+    "cash_flow": "cash_flow",
+    "cash_flow_indirect": "cash_flow",
+    "anomaly": "anomaly",
+    "solvency": "solvency",
+    "composite_risk": "composite_risk"
+}
 
-    # ------------------------------------------------------------------
-    # Merge client config with defaults
-    # ------------------------------------------------------------------
-    merged_config = merge_config(DEFAULT_CLIENT_CONFIG, client_config or {})
-    analysis_config = merged_config.get("analysis", {})
 
-    # ------------------------------------------------------------------
-    # Validate profile
-    # ------------------------------------------------------------------
+def resolve_profile(analysis_profile):
     profile = ANALYSIS_PROFILES.get(analysis_profile)
     if not profile:
         raise ValueError(f"Unknown analysis profile: {analysis_profile}")
+    _check_cash_flow_engines(profile["engines"])
+    return profile
 
-    engines_to_run = profile["engines"]
+
+def _check_cash_flow_engines(engines_to_run):
+    if "cash_flow" in engines_to_run and "cash_flow_indirect" in engines_to_run:
+        raise ValueError("Run either the cash_flow or the cash_flow_indirect engine, not both.")
+
+
+def resolve_financials(financials, dataset_cache=None):
+    """
+    A path to a financials CSV is loaded through the normalized dataset
+    cache (storage.dataset_cache, in dataset_cache or next to the file);
+    DataFrames pass through.
+    """
+    if isinstance(financials, (str, os.PathLike)):
+        from storage.dataset_cache import load_financials
+        return load_financials(financials, cache_dir=dataset_cache)
+    return financials
+
+
+def resolve_period_financials(financials_df, ttm_frequency, engines_to_run):
+    """
+    Sub-annual filings (ttm_frequency "Q" or "M") become trailing-twelve-
+    month windows keyed by period in "Year" (see engines.period_model);
+    annual filings pass through.
+    """
+    if ttm_frequency is None:
+        return financials_df
+    if "cash_flow_indirect" in engines_to_run:
+        raise ValueError("The cash_flow_indirect engine needs annual financials; it cannot run on TTM windows.")
+    from engines.period_model import ttm_financials
+    return ttm_financials(financials_df, ttm_frequency)
+
+
+def resolve_profile_scope(profile):
+    """
+    Ratio metrics a profile computes (None for all): its metrics_scope
+    plus whatever its engines require (see engines.metric_scope).
+    """
+    from engines.metric_scope import resolve_metric_scope
+    return resolve_metric_scope(profile.get("metrics_scope", "all"), profile["engines"])
+
+
+def run_base_engines(
+    financials_df, engines_to_run, compact_records=False, strict_validation=False, fused=False, scope=None,
+    ttm_frequency=None
+):
+    """
+    Runs the deterministic engines (everything except composite risk).
+    Returns (outputs, ratios_df). Company-years failing ratio bound
+    checks are routed to outputs["quarantine"] unless strict_validation.
+
+    fused=True computes ratio, trend, anomaly and solvency in a single
+    pass over aligned arrays (engines.fused_engine); outputs are identical.
+
+    scope (a resolved metric scope) drops line items no scoped ratio or
+    engine reads before anything is normalized, computes only the
+    scoped ratios and keeps only their columns in ratios_df.
+
+    ttm_frequency marks financials_df as TTM windows (see
+    resolve_period_financials): trend records carry the windows' dates
+    and anomaly compares each window with the one a year earlier.
+    """
+    _check_cash_flow_engines(engines_to_run)
+
+    if scope is not None:
+        from engines.metric_scope import project_line_items, scope_line_items
+        financials_df = project_line_items(financials_df, scope_line_items(scope, engines_to_run))
+
+    if fused and "ratio" in engines_to_run:
+        return _run_fused_engines(financials_df, engines_to_run, compact_records, strict_validation, scope, ttm_frequency)
 
     # ------------------------------------------------------------------
     # Import Engines
@@ -98,58 +136,124 @@ def afap_run(
     from engines.ratio_engine_core import ratio_engine
     from engines.trend_engine import trend_engine
     from engines.cash_flow_engine import cash_flow_engine
+    from engines.indirect_cash_flow_engine import indirect_cash_flow_engine
     from engines.anomaly_efficiency_engine import anomaly_efficiency_engine
     from engines.solvency_engine import solvency_engine
-    from engines.composite_risk_engine import composite_risk_engine
+    from engines.period_model import periods_per_year
 
-    # ------------------------------------------------------------------
-    # Import AI Interpreter
-    # ------------------------------------------------------------------
-    from afap_ai_engine.ai_interpreter import afap_llm_interpretation
-
-    # ------------------------------------------------------------------
-    # Initialize Outputs
-    # ------------------------------------------------------------------
     outputs = {k: [] for k in AFAP_OUTPUT_KEYS if k != "profile_used"}
+    outputs["quarantine"] = []
 
     # ------------------------------------------------------------------
     # Ratio Engine (Canonical Base)
     # ------------------------------------------------------------------
-    ratios_list = ratio_engine(financials_df) if "ratio" in engines_to_run else []
+    ratios_list = ratio_engine(
+        financials_df,
+        compact=compact_records,
+        strict=strict_validation,
+        quarantine=outputs["quarantine"],
+        scope=scope
+    ) if "ratio" in engines_to_run else []
     outputs["ratios"] = ratios_list
 
     ratios_df = pd.DataFrame([{"Company": r["Company"], "Year": r["Year"], **r["metrics"]} for r in ratios_list]) if ratios_list else pd.DataFrame()
+    if scope is not None and not ratios_df.empty:
+        ratios_df = ratios_df[["Company", "Year", *scope]]
     ratios_flat = ratios_df.copy()
 
     # ------------------------------------------------------------------
     # Conditional Engines
     # ------------------------------------------------------------------
     if "trend" in engines_to_run:
-        outputs["trend"] = trend_engine(ratios_flat)
+        outputs["trend"] = trend_engine(ratios_flat, compact=compact_records, frequency=ttm_frequency)
 
     if "cash_flow" in engines_to_run:
-        outputs["cash_flow"] = cash_flow_engine(financials_df)
+        outputs["cash_flow"] = cash_flow_engine(financials_df, compact=compact_records)
+
+    if "cash_flow_indirect" in engines_to_run:
+        outputs["cash_flow"] = indirect_cash_flow_engine(financials_df, compact=compact_records)
 
     if "anomaly" in engines_to_run:
-        outputs["anomaly"] = anomaly_efficiency_engine(ratios_flat)
+        periods = periods_per_year(ttm_frequency) if ttm_frequency is not None else 1
+        outputs["anomaly"] = anomaly_efficiency_engine(ratios_flat, compact=compact_records, periods=periods)
 
     if "solvency" in engines_to_run:
-        outputs["solvency"] = solvency_engine(ratios_flat)
-
-    if "composite_risk" in engines_to_run:
-        outputs["composite_risk"] = composite_risk_engine(
-            outputs.get("trend", []),
-            outputs.get("cash_flow", []),
-            outputs.get("anomaly", []),
-            outputs.get("solvency", []),
-            {"analysis": analysis_config}
-        )
+        outputs["solvency"] = solvency_engine(ratios_flat, compact=compact_records)
 
-    # ------------------------------------------------------------------
-    # Structured Records for LLM (Profile + Temporal + Context Aware)
-    # ------------------------------------------------------------------
+    _drop_quarantined(outputs)
+    return outputs, ratios_df
+
+
+def _run_fused_engines(financials_df, engines_to_run, compact_records, strict_validation, scope=None, ttm_frequency=None):
+    from engines.fused_engine import fused_engine_pass
+    from engines.cash_flow_engine import cash_flow_engine
+    from engines.indirect_cash_flow_engine import indirect_cash_flow_engine
+
+    outputs = {k: [] for k in AFAP_OUTPUT_KEYS if k != "profile_used"}
+    outputs["quarantine"] = []
+
+    fused_outputs, ratios_df = fused_engine_pass(
+        financials_df,
+        engines=[e for e in ("ratio", "trend", "anomaly", "solvency") if e in engines_to_run],
+        compact=compact_records,
+        strict=strict_validation,
+        quarantine=outputs["quarantine"],
+        scope=scope,
+        frequency=ttm_frequency
+    )
+    outputs.update(fused_outputs)
+
+    # Cash flow reads raw line items, not ratios
+    if "cash_flow" in engines_to_run:
+        outputs["cash_flow"] = cash_flow_engine(financials_df, compact=compact_records)
+
+    if "cash_flow_indirect" in engines_to_run:
+        outputs["cash_flow"] = indirect_cash_flow_engine(financials_df, compact=compact_records)
+
+    _drop_quarantined(outputs)
+    return outputs, ratios_df
+
+
+def _without_quarantined(records, quarantine):
+    keys = {(q["Company"], q["Year"]) for q in quarantine}
+    if not keys:
+        return records
+    return [r for r in records if (r["Company"], r["Year"]) not in keys]
+
+
+def _drop_quarantined(outputs):
+    """
+    Removes quarantined company-years from every engine output. The
+    ratio-derived engines never see them, but cash flow reads the raw
+    line items and would otherwise report (and stream) them.
+    """
+    for key in set(ENGINE_OUTPUT_KEYS.values()) & outputs.keys():
+        outputs[key] = _without_quarantined(outputs[key], outputs["quarantine"])
+
+
+def run_composite(outputs, engines_to_run, analysis_config):
+    from engines.composite_risk_engine import composite_risk_engine
+
+    if "composite_risk" not in engines_to_run:
+        return []
+
+    return composite_risk_engine(
+        outputs.get("trend", []),
+        outputs.get("cash_flow", []),
+        outputs.get("anomaly", []),
+        outputs.get("solvency", []),
+        {"analysis": analysis_config}
+    )
+
+
+# ------------------------------------------------------------------
+# Structured Records for LLM (Profile + Temporal + Context Aware)
+# ------------------------------------------------------------------
+
+def build_structured_records(ratios_df, outputs, analysis_profile, external_context=None, peer_index=None, ttm_frequency=None):
     structured_records = []
     current_year = datetime.now().year
+    from engines.period_model import calendar_year
 
     # Wrap flat external_context under "global" for LLM
     external_context = {"global": external_context or {}}
@@ -157,7 +261,7 @@ def afap_run(
     for _, row in ratios_df.iterrows():
         company = row["Company"]
         year = row["Year"]
-        temporal_mode = "real_time" if year == current_year else "retrospective"
+        temporal_mode = "real_time" if calendar_year(year) == current_year else "retrospective"
 
         # Resolve contextual layer (priority: Company+Year > Year > global)
         context_payload = {}
@@ -182,31 +286,843 @@ def afap_run(
             "composite_risk": extract_engine_payload(outputs.get("composite_risk", []), company, year)
         }
 
+        if peer_index is not None:
+            record["peer_percentiles"] = peer_index.rank_company(company, year)
+
+        # "Year" holds a period key; the prompt renders it as a TTM label
+        if ttm_frequency is not None:
+            record["ttm_frequency"] = ttm_frequency
+
         structured_records.append(record)
 
+    return structured_records
+
+
+# ------------------------------------------------------------------
+# LLM Interpretation Stage
+# ------------------------------------------------------------------
+
+def _interpret(
+    records, use_mock_ai=False, on_result=None, stream_llm=False, on_section=None, llm_client=None, telemetry=None,
+    scheduler=None
+):
+    """
+    Interprets records in order, passing each interpretation to
+    on_result as soon as it exists. With a scheduler, records go in
+    risk-priority order under its budgets instead (see _interpret_scheduled).
+    """
+    if scheduler is not None:
+        return _interpret_scheduled(
+            records, scheduler, use_mock_ai, on_result, stream_llm, on_section, llm_client, telemetry
+        )
+
+    if not use_mock_ai:
+        from afap_ai_engine.ai_interpreter import afap_llm_interpretation
+        return afap_llm_interpretation(
+            records,
+            model="gpt-5-mini",
+            on_result=on_result,
+            stream=stream_llm,
+            on_section=on_section,
+            client=llm_client,
+            telemetry=telemetry
+        )
+
+    interpretations = []
+    for r in records:
+        interpretation = {
+            "Company": r["Company"],
+            "Year": r["Year"],
+            "analysis_profile": r["analysis_profile"],
+            "temporal_mode": r["temporal_mode"],
+            "interpretation": "MOCK"
+        }
+        interpretations.append(interpretation)
+        if on_result is not None:
+            on_result(interpretation)
+    return interpretations
+
+
+def _interpret_scheduled(
+    records, scheduler, use_mock_ai, on_result, stream_llm, on_section, llm_client, telemetry, route=None
+):
+    """
+    One record at a time in the scheduler's priority order, until its
+    token budget or deadline stops the stage; the rest come back as
+    skipped entries (never passed to on_result, so a resumed run picks
+    them up again).
+
+    route(record), if given, returns the (on_result, on_section) pair
+    for that record instead.
+    """
+    interpretations = []
+    for record, estimate in scheduler.order(records):
+        if not scheduler.admit(estimate):
+            interpretations.append(scheduler.skip(record))
+            continue
+
+        record_on_result, record_on_section = route(record) if route is not None else (on_result, on_section)
+        seen = len(telemetry.spans) if telemetry is not None else 0
+        start = time.perf_counter()
+        interpretations.extend(_interpret(
+            [record], use_mock_ai, record_on_result, stream_llm, record_on_section, llm_client, telemetry
+        ))
+
+        # Book reported usage when the call had any, else the estimate
+        spans = telemetry.spans[seen:] if telemetry is not None else []
+        actual = None
+        if spans and all(s["input_tokens"] is not None for s in spans):
+            actual = sum(s["input_tokens"] + (s["output_tokens"] or 0) for s in spans)
+        scheduler.charge(estimate, actual, time.perf_counter() - start)
+
+    return interpretations
+
+
+def _section_emitter(sink, on_section):
+    callbacks = [cb for cb in (sink.append_section if sink is not None else None, on_section) if cb is not None]
+    if not callbacks:
+        return None
+
+    def emit_section(section):
+        for callback in callbacks:
+            callback(section)
+
+    return emit_section
+
+
+def interpret_records(
+    structured_records, use_mock_ai=False, sink=None, stream_llm=False, on_section=None, llm_client=None, telemetry=None,
+    scheduler=None
+):
+    """
+    Interprets structured records, skipping any already completed in
+    the sink, and returns interpretations in record order. Each LLM call
+    is reported to telemetry (an LLMTelemetry), if given.
+
+    scheduler (an afap_ai_engine.scheduler.InterpretationScheduler)
+    interprets the riskiest records first under token / time budgets;
+    records it does not reach are marked {"interpretation": None,
+    "skipped": <stop reason>}, and the sink's run is closed as
+    "partial" so resume=True interprets them.
+
+    With stream_llm, completed sections go to the sink's section stream
+    and to on_section as soon as they are parsed.
+    """
+    completed = sink.completed_interpretations() if sink is not None else {}
+
+    pending_records = [
+        r for r in structured_records
+        if (r["Company"], r["Year"]) not in completed
+    ]
+    on_result = sink.append_interpretation if sink is not None else None
+
+    try:
+        new_interpretations = _interpret(
+            pending_records,
+            use_mock_ai,
+            on_result,
+            stream_llm,
+            _section_emitter(sink, on_section),
+            llm_client,
+            telemetry,
+            scheduler
+        )
+    except BaseException:
+        # Everything interpreted so far is already on disk
+        if sink is not None:
+            sink.close(complete=False)
+        raise
+
+    if sink is not None:
+        # Records a budget-stopped stage never reached are not on disk
+        stop_reason = scheduler.stop_reason if scheduler is not None else None
+        sink.close(complete=stop_reason is None, stop_reason=stop_reason)
+
+    # Restore record order across resumed and newly interpreted rows
+    for interpretation in new_interpretations:
+        completed[(interpretation["Company"], interpretation["Year"])] = interpretation
+
+    return [completed[(r["Company"], r["Year"])] for r in structured_records]
+
+
+def interpret_profile_records(
+    profile_records, use_mock_ai=False, stream_llm=False, on_section=None, llm_client=None, telemetry=None,
+    scheduler=None
+):
+    """
+    interpret_records for several profiles sharing one scheduler.
+    profile_records maps profile name -> (structured_records, sink).
+    Every profile's pending records are ranked together, so the riskiest
+    company-years of any profile are interpreted first; each result
+    goes to its own profile's sink. Returns profile name ->
+    interpretations in record order.
+    """
+    completed = {
+        name: sink.completed_interpretations() if sink is not None else {}
+        for name, (_, sink) in profile_records.items()
+    }
+    pending = [
+        r for name, (records, _) in profile_records.items() for r in records
+        if (r["Company"], r["Year"]) not in completed[name]
+    ]
+    callbacks = {
+        name: (sink.append_interpretation if sink is not None else None, _section_emitter(sink, on_section))
+        for name, (_, sink) in profile_records.items()
+    }
+    sinks = [sink for _, sink in profile_records.values() if sink is not None]
+
+    try:
+        new_interpretations = _interpret_scheduled(
+            pending, scheduler, use_mock_ai, None, stream_llm, None, llm_client, telemetry,
+            route=lambda record: callbacks[record["analysis_profile"]]
+        )
+    except BaseException:
+        for sink in sinks:
+            sink.close(complete=False)
+        raise
+
+    for sink in sinks:
+        sink.close(complete=scheduler.stop_reason is None, stop_reason=scheduler.stop_reason)
+
+    for interpretation in new_interpretations:
+        completed[interpretation["analysis_profile"]][(interpretation["Company"], interpretation["Year"])] = interpretation
+
+    return {
+        name: [completed[name][(r["Company"], r["Year"])] for r in records]
+        for name, (records, _) in profile_records.items()
+    }
+
+
+def finalize_outputs(outputs, analysis_profile, compact_records=False):
     # ------------------------------------------------------------------
-    # LLM Interpretation
+    # API Boundary: compact records become canonical dicts
     # ------------------------------------------------------------------
-    if use_mock_ai:
-        outputs["ai_interpretation"] = [
-            {
-                "Company": r["Company"],
-                "Year": r["Year"],
-                "analysis_profile": r["analysis_profile"],
-                "temporal_mode": r["temporal_mode"],
-                "interpretation": "MOCK"
-            }
-            for r in structured_records
-        ]
-    else:
-        outputs["ai_interpretation"] = afap_llm_interpretation(
-            structured_records,
-            model="gpt-5-mini"
-        )
+    if compact_records:
+        from engines.records import records_to_dicts
+        for key in ("ratios", "trend", "cash_flow", "anomaly", "solvency"):
+            outputs[key] = records_to_dicts(outputs[key])
 
     # ------------------------------------------------------------------
     # Profile Used
     # ------------------------------------------------------------------
     outputs["profile_used"] = analysis_profile
 
-    return outputs
\ No newline at end of file
+    return outputs
+
+
+def _resolve_telemetry(llm_telemetry):
+    if llm_telemetry is not None:
+        return llm_telemetry
+    from afap_ai_engine.telemetry import LLMTelemetry
+    return LLMTelemetry()
+
+
+def _resolve_scheduler(llm_token_budget, llm_deadline_seconds):
+    if llm_token_budget is None and llm_deadline_seconds is None:
+        return None
+    from afap_ai_engine.scheduler import InterpretationScheduler
+    return InterpretationScheduler(max_tokens=llm_token_budget, deadline_seconds=llm_deadline_seconds)
+
+
+def _open_sink(run_dir, analysis_profile, run_format, resume):
+    if run_dir is None:
+        return None
+    from storage.run_sink import RunSink
+    return RunSink(run_dir, analysis_profile, fmt=run_format, resume=resume)
+
+
+def _resolve_peer_index(peer_index, ratios_list):
+    if peer_index is True:
+        from engines.peer_benchmark import PeerPercentileIndex
+        return PeerPercentileIndex.from_ratios(ratios_list)
+    return peer_index or None
+
+
+def _close_interrupted(sink):
+    """
+    Marks a run that failed before its interpretation stage closed the
+    sink as interrupted, releasing its file handles.
+    """
+    if sink is not None and not sink.closed:
+        sink.close(complete=False)
+
+
+def _write_engine_stages(sink, outputs):
+    if sink is None:
+        return
+    for key in AFAP_OUTPUT_KEYS:
+        if key not in ("profile_used", "ai_interpretation"):
+            sink.write_stage(key, outputs[key])
+    sink.write_stage("quarantine", outputs.get("quarantine", []))
+
+
+def _write_severity_matrix(sink, outputs, engines_to_run, analysis_config):
+    # Company-year x engine severities next to the stage files, so the
+    # run can be re-scored under other weights / bands (composite rescore)
+    if sink is None or "composite_risk" not in engines_to_run:
+        return
+    from engines.composite_risk_engine import SEVERITY_MATRIX_FILE, SeverityMatrix
+    SeverityMatrix.from_outputs(outputs, analysis_config).save(sink.run_dir / SEVERITY_MATRIX_FILE)
+
+
+# ------------------------------------------------------------------
+# Pipelined Engine + Interpretation Stages
+# ------------------------------------------------------------------
+# The main thread runs the engines one shard of companies at a time and
+# queues each shard's structured records; interpretation workers drain
+# the bounded queue concurrently, so LLM I/O for one shard overlaps the
+# engine compute of the next. Engines are per company, so shard outputs
+# concatenated in company order equal the single-pass outputs.
+# ------------------------------------------------------------------
+
+def _company_shards(financials_df, shard_size):
+    financials_df = financials_df[financials_df["Company"].notna()]
+    labels = financials_df["Company"].astype(str)
+    positions = labels.groupby(labels, sort=True).indices
+    companies = sorted(positions)
+
+    for start in range(0, len(companies), shard_size):
+        rows = np.concatenate([positions[c] for c in companies[start:start + shard_size]])
+        yield financials_df.iloc[rows]
+
+
+def run_pipelined(
+    financials_df,
+    engines_to_run,
+    analysis_config,
+    analysis_profile,
+    external_context=None,
+    use_mock_ai=False,
+    sink=None,
+    compact_records=False,
+    peer_index=None,
+    strict_validation=False,
+    fused_engines=False,
+    stream_llm=False,
+    on_section=None,
+    shard_size=25,
+    llm_workers=4,
+    queue_size=None,
+    scope=None,
+    llm_client=None,
+    telemetry=None,
+    ttm_frequency=None
+):
+    """
+    Engine and interpretation stages with shards of shard_size companies
+    flowing through a queue of at most queue_size records (default about
+    two shards' worth of company-years) to llm_workers interpretation
+    threads. The bound keeps engines from running far ahead of the LLM.
+
+    Returns (outputs, ratios_df) with ai_interpretation filled in.
+    """
+    if peer_index is True:
+        raise ValueError("peer_index=True needs every company's ratios; pass a prebuilt PeerPercentileIndex when pipelining.")
+
+    outputs = {k: [] for k in AFAP_OUTPUT_KEYS if k != "profile_used"}
+    outputs["quarantine"] = []
+    ratio_frames = []
+    structured_records = []
+
+    completed = sink.completed_interpretations() if sink is not None else {}
+    interpretations = {}
+    failures = []
+    stop = threading.Event()
+
+    # Sink writes (and section callbacks) come from several threads
+    sink_lock = threading.Lock()
+
+    def locked(fn):
+        if fn is None:
+            return None
+
+        def call(*args):
+            with sink_lock:
+                return fn(*args)
+        return call
+
+    on_result = locked(sink.append_interpretation if sink is not None else None)
+    emit_section = locked(_section_emitter(sink, on_section))
+
+    if queue_size is None:
+        queue_size = max(2 * shard_size * max(financials_df["Year"].nunique(), 1), 2 * llm_workers)
+    work = queue.Queue(maxsize=queue_size)
+
+    def interpretation_worker():
+        while True:
+            record = work.get()
+            if record is None:
+                return
+            if stop.is_set():
+                continue  # drain without calling the LLM after a failure
+            try:
+                for interpretation in _interpret([record], use_mock_ai, on_result, stream_llm, emit_section, llm_client, telemetry):
+                    interpretations[(interpretation["Company"], interpretation["Year"])] = interpretation
+            except BaseException as exc:
+                failures.append(exc)
+                stop.set()
+
+    workers = [threading.Thread(target=interpretation_worker, daemon=True) for _ in range(llm_workers)]
+    for worker in workers:
+        worker.start()
+
+    try:
+        for shard_df in _company_shards(financials_df, shard_size):
+            if stop.is_set():
+                break
+
+            shard_outputs, shard_ratios_df = run_base_engines(
+                shard_df, engines_to_run, compact_records, strict_validation, fused_engines, scope, ttm_frequency
+            )
+            shard_outputs["composite_risk"] = run_composite(shard_outputs, engines_to_run, analysis_config)
+
+            for key in outputs:
+                outputs[key].extend(shard_outputs[key])
+            ratio_frames.append(shard_ratios_df)
+
+            for record in build_structured_records(
+                shard_ratios_df, shard_outputs, analysis_profile, external_context, peer_index, ttm_frequency
+            ):
+                structured_records.append(record)
+                if (record["Company"], record["Year"]) not in completed:
+                    work.put(record)
+
+        with sink_lock:
+            _write_engine_stages(sink, outputs)
+            _write_severity_matrix(sink, outputs, engines_to_run, analysis_config)
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for _ in workers:
+            work.put(None)
+        for worker in workers:
+            worker.join()
+
+        # Everything interpreted so far is already on disk
+        if sink is not None:
+            sink.close(complete=not stop.is_set())
+
+    if failures:
+        raise failures[0]
+
+    completed.update(interpretations)
+    outputs["ai_interpretation"] = [completed[(r["Company"], r["Year"])] for r in structured_records]
+
+    non_empty = [f for f in ratio_frames if not f.empty]
+    ratios_df = pd.concat(non_empty, ignore_index=True) if non_empty else pd.DataFrame()
+    return outputs, ratios_df
+
+
+# ------------------------------------------------------------------
+# AFAP Orchestrator
+# ------------------------------------------------------------------
+
+def afap_run(
+    financials_df,
+    client_config=None,
+    analysis_profile="full_diagnostic",
+    external_context=None,
+    use_mock_ai=False,
+    run_dir=None,
+    run_format="jsonl",
+    resume=False,
+    compact_records=False,
+    peer_index=None,
+    result_store=None,
+    run_id=None,
+    strict_validation=False,
+    fused_engines=False,
+    stream_llm=False,
+    on_section=None,
+    pipeline_shard_size=None,
+    llm_workers=4,
+    llm_client=None,
+    llm_telemetry=None,
+    llm_token_budget=None,
+    llm_deadline_seconds=None,
+    ttm_frequency=None,
+    dataset_cache=None
+):
+    """
+    Runs AFAP analysis for a given financials DataFrame and profile.
+
+    financials_df may also be the path of a financials CSV: it is then
+    parsed and normalized once and reused from the normalized dataset
+    cache (dataset_cache, default .afap_cache next to the file) until
+    the file or the normalizer changes (see storage.dataset_cache).
+
+    client_config may be a plain dict of overrides or a FrozenConfig
+    from config.loader, which is used as-is without re-merging.
+
+    If run_dir is given, engine outputs and AI interpretations are
+    streamed to that directory as they are produced (see
+    storage.run_sink). With resume=True an interrupted run continues
+    from its checkpoint and skips company-years already interpreted.
+
+    With compact_records=True engines emit slotted records
+    (engines.records) for the duration of the run; they are converted
+    to the canonical dicts only when the outputs are returned.
+
+    peer_index (engines.peer_benchmark.PeerPercentileIndex, or True to
+    index this run's own ratios) adds peer_percentiles to the LLM
+    structured records.
+
+    result_store is an optional SQLite path; the finished outputs are
+    bulk-inserted there under run_id (see storage.result_store).
+
+    Company-years whose ratios fail bound checks are quarantined into
+    outputs["quarantine"] (with reason codes) and the run continues;
+    strict_validation=True restores the raise-on-first-violation gate.
+
+    fused_engines=True runs the ratio-derived engines in one fused pass
+    (see engines.fused_engine) instead of engine by engine.
+
+    stream_llm=True streams LLM responses and parses them into sections
+    as tokens arrive; each completed section is passed to on_section
+    (and streamed to run_dir) before its record's interpretation ends.
+
+    pipeline_shard_size=N pipelines the run: engines process N companies
+    at a time and each shard's records are interpreted by llm_workers
+    threads while the next shard computes (see run_pipelined). Outputs
+    are the same as an unpipelined run.
+
+    The profile's metrics_scope is pushed down into the engines: ratios
+    outside it (and outside what the profile's engines need) are None,
+    are not trended and are left out of the LLM prompt.
+
+    llm_client replaces the default OpenAI client for the interpretation
+    stage (see afap_ai_engine.ai_interpreter.get_client).
+
+    Every LLM call's tokens, latency and retries are collected and
+    summarized (totals, percentiles, histograms, per-profile totals) in
+    outputs["llm_telemetry"]. Pass llm_telemetry (an
+    afap_ai_engine.telemetry.LLMTelemetry, e.g. with an exporter) to
+    export spans as calls end or to accumulate across runs.
+
+    llm_token_budget (prompt + completion tokens) and llm_deadline_seconds
+    (wall clock for the interpretation stage) bound the LLM stage: records
+    are interpreted highest composite risk first and the stage stops once
+    a limit would be exceeded. Records not reached are marked "skipped"
+    in ai_interpretation, and outputs["llm_schedule"] reports what was
+    spent and why the stage stopped. Budgets need every record up front,
+    so they cannot be combined with pipeline_shard_size.
+
+    ttm_frequency ("Q" or "M") takes quarterly or monthly filings
+    (a "Period End" column, or Year plus Quarter / Month) and analyses
+    their trailing-twelve-month windows: output "Year" values are then
+    period keys (year * 100 + quarter / month; see engines.period_model)
+    and trend / anomaly compare consecutive windows.
+    """
+
+    # ------------------------------------------------------------------
+    # Merge client config with defaults (FrozenConfigs pass straight through)
+    # ------------------------------------------------------------------
+    merged_config = resolve_client_config(client_config)
+    analysis_config = merged_config.get("analysis", {})
+    scheduler = _resolve_scheduler(llm_token_budget, llm_deadline_seconds)
+    if scheduler is not None and pipeline_shard_size:
+        raise ValueError("LLM token / deadline budgets cannot be combined with pipeline_shard_size.")
+
+    # ------------------------------------------------------------------
+    # Validate profile
+    # ------------------------------------------------------------------
+    profile = resolve_profile(analysis_profile)
+    engines_to_run = profile["engines"]
+    scope = resolve_profile_scope(profile)
+    financials_df = resolve_financials(financials_df, dataset_cache)
+    financials_df = resolve_period_financials(financials_df, ttm_frequency, engines_to_run)
+
+    # ------------------------------------------------------------------
+    # Incremental Run Sink (optional)
+    # ------------------------------------------------------------------
+    sink = _open_sink(run_dir, analysis_profile, run_format, resume)
+    telemetry = _resolve_telemetry(llm_telemetry)
+
+    if pipeline_shard_size:
+        # ------------------------------------------------------------------
+        # Engines and LLM Interpretation, overlapped shard by shard
+        # ------------------------------------------------------------------
+        outputs, ratios_df = run_pipelined(
+            financials_df, engines_to_run, analysis_config, analysis_profile,
+            external_context, use_mock_ai, sink, compact_records, peer_index,
+            strict_validation, fused_engines, stream_llm, on_section,
+            shard_size=pipeline_shard_size, llm_workers=llm_workers, scope=scope,
+            llm_client=llm_client, telemetry=telemetry, ttm_frequency=ttm_frequency
+        )
+    else:
+        try:
+            # ------------------------------------------------------------------
+            # Engines
+            # ------------------------------------------------------------------
+            outputs, ratios_df = run_base_engines(
+                financials_df, engines_to_run, compact_records, strict_validation, fused_engines, scope, ttm_frequency
+            )
+            outputs["composite_risk"] = run_composite(outputs, engines_to_run, analysis_config)
+            _write_engine_stages(sink, outputs)
+            _write_severity_matrix(sink, outputs, engines_to_run, analysis_config)
+
+            # ------------------------------------------------------------------
+            # LLM Interpretation
+            # ------------------------------------------------------------------
+            peer_index = _resolve_peer_index(peer_index, outputs["ratios"])
+            structured_records = build_structured_records(
+                ratios_df, outputs, analysis_profile, external_context, peer_index, ttm_frequency
+            )
+            outputs["ai_interpretation"] = interpret_records(
+                structured_records, use_mock_ai, sink, stream_llm, on_section, llm_client, telemetry, scheduler
+            )
+        except BaseException:
+            _close_interrupted(sink)
+            raise
+
+    outputs = finalize_outputs(outputs, analysis_profile, compact_records)
+    outputs["llm_telemetry"] = telemetry.summary(analysis_profile)
+    if scheduler is not None:
+        outputs["llm_schedule"] = scheduler.report()
+
+    # ------------------------------------------------------------------
+    # Persist to Local Result Store (optional)
+    # ------------------------------------------------------------------
+    if result_store is not None:
+        from storage.result_store import persist_run
+        persist_run(outputs, result_store, run_id=run_id)
+
+    return outputs
+
+
+# ------------------------------------------------------------------
+# Per-Company Streaming Orchestrator
+# ------------------------------------------------------------------
+
+# Keys of a per-company afap_iter bundle, besides Company / profile_used
+COMPANY_BUNDLE_KEYS = [k for k in AFAP_OUTPUT_KEYS if k != "profile_used"] + ["quarantine"]
+
+
+def afap_iter(
+    financials_df,
+    client_config=None,
+    analysis_profile="full_diagnostic",
+    external_context=None,
+    use_mock_ai=False,
+    compact_records=False,
+    peer_index=None,
+    strict_validation=False,
+    fused_engines=False,
+    stream_llm=False,
+    on_section=None,
+    shard_size=25,
+    llm_client=None,
+    llm_telemetry=None,
+    ttm_frequency=None,
+    dataset_cache=None
+):
+    """
+    Generator form of afap_run: yields one bundle per company, in
+    company order, as soon as that company's engines and interpretations
+    are done:
+
+        {"Company", "profile_used", "ratios", "trend", "cash_flow",
+         "anomaly", "solvency", "composite_risk", "ai_interpretation",
+         "quarantine"}
+
+    Engines run shard_size companies at a time (see run_pipelined);
+    interpretation then goes company by company. Only the current shard
+    is held in memory, and concatenating the bundles gives afap_run's
+    outputs. peer_index must be a prebuilt PeerPercentileIndex (or None).
+    """
+    if peer_index is True:
+        raise ValueError("peer_index=True needs every company's ratios; pass a prebuilt PeerPercentileIndex to afap_iter.")
+
+    merged_config = resolve_client_config(client_config)
+    analysis_config = merged_config.get("analysis", {})
+
+    profile = resolve_profile(analysis_profile)
+    engines_to_run = profile["engines"]
+    scope = resolve_profile_scope(profile)
+    telemetry = _resolve_telemetry(llm_telemetry)
+    financials_df = resolve_financials(financials_df, dataset_cache)
+    financials_df = resolve_period_financials(financials_df, ttm_frequency, engines_to_run)
+
+    for shard_df in _company_shards(financials_df, shard_size):
+        shard_outputs, shard_ratios_df = run_base_engines(
+            shard_df, engines_to_run, compact_records, strict_validation, fused_engines, scope, ttm_frequency
+        )
+        shard_outputs["composite_risk"] = run_composite(shard_outputs, engines_to_run, analysis_config)
+        if compact_records:
+            shard_outputs = finalize_outputs(shard_outputs, analysis_profile, compact_records)
+
+        by_company = {}
+        for key in COMPANY_BUNDLE_KEYS:
+            for record in shard_outputs.get(key, []):
+                by_company.setdefault(record["Company"], {k: [] for k in COMPANY_BUNDLE_KEYS})[key].append(record)
+
+        records_by_company = {}
+        for record in build_structured_records(
+            shard_ratios_df, shard_outputs, analysis_profile, external_context, peer_index, ttm_frequency
+        ):
+            records_by_company.setdefault(record["Company"], []).append(record)
+
+        for company, bundle in by_company.items():
+            bundle["ai_interpretation"] = interpret_records(
+                records_by_company.get(company, []), use_mock_ai, None, stream_llm, on_section, llm_client, telemetry
+            )
+            yield {"Company": company, "profile_used": analysis_profile, **bundle}
+
+
+# ------------------------------------------------------------------
+# Multi-Profile Orchestrator
+# ------------------------------------------------------------------
+
+def afap_run_profiles(
+    financials_df,
+    analysis_profiles,
+    client_config=None,
+    external_context=None,
+    use_mock_ai=False,
+    run_dir=None,
+    run_format="jsonl",
+    resume=False,
+    compact_records=False,
+    peer_index=None,
+    strict_validation=False,
+    fused_engines=False,
+    stream_llm=False,
+    on_section=None,
+    llm_client=None,
+    llm_telemetry=None,
+    llm_token_budget=None,
+    llm_deadline_seconds=None,
+    dataset_cache=None
+):
+    """
+    Runs several analysis profiles over the same data in one shared pass.
+
+    Each deterministic engine in the union of the profiles' engines is
+    computed once; every profile then gets its own AFAP_OUTPUT_KEYS view
+    of those shared outputs, its own composite risk (which depends on
+    the profile's engine set) and its own AI interpretation (prompts are
+    profile-specific). With run_dir, each profile streams to
+    run_dir/<profile>.
+
+    Engines run over the union of the profiles' metric scopes; each
+    profile's ratios, trend and prompt are then narrowed to its own.
+
+    Each profile's outputs["llm_telemetry"] summarizes its own LLM calls;
+    llm_telemetry.summary() (if passed) covers the whole run, with
+    per-profile totals under "by_profile".
+
+    llm_token_budget / llm_deadline_seconds (see afap_run) are shared by
+    all profiles: their records are ranked together, so the riskiest
+    company-years of any profile are interpreted first, and every
+    profile's outputs["llm_schedule"] reports the shared budget.
+
+    financials_df may be a CSV path, loaded as in afap_run.
+
+    Returns:
+        dict — profile name -> AFAP outputs
+    """
+    merged_config = resolve_client_config(client_config)
+    analysis_config = merged_config.get("analysis", {})
+    telemetry = _resolve_telemetry(llm_telemetry)
+    scheduler = _resolve_scheduler(llm_token_budget, llm_deadline_seconds)
+    financials_df = resolve_financials(financials_df, dataset_cache)
+
+    from engines.metric_scope import (
+        union_metric_scope, project_quarantine_records, project_ratio_records, project_trend_records
+    )
+
+    profiles = {name: resolve_profile(name) for name in analysis_profiles}
+    all_engines = {e for p in profiles.values() for e in p["engines"]}
+    scopes = {name: resolve_profile_scope(profile) for name, profile in profiles.items()}
+    shared_scope = union_metric_scope(scopes.values())
+
+    # Both cash flow engines fill "cash_flow": when the profiles use both,
+    # the indirect engine runs on its own
+    indirect_cash_flow = None
+    if {"cash_flow", "cash_flow_indirect"} <= all_engines:
+        all_engines.discard("cash_flow_indirect")
+        indirect_cash_flow = run_base_engines(
+            financials_df, ["cash_flow_indirect"], compact_records, strict_validation, scope=shared_scope
+        )[0]["cash_flow"]
+
+    shared, ratios_df = run_base_engines(financials_df, all_engines, compact_records, strict_validation, fused_engines, shared_scope)
+    peer_index = _resolve_peer_index(peer_index, shared["ratios"])
+    if indirect_cash_flow is not None:
+        indirect_cash_flow = _without_quarantined(indirect_cash_flow, shared["quarantine"])
+
+    results = {}
+    profile_records = {}
+    for name, profile in profiles.items():
+        engines_to_run = profile["engines"]
+
+        # Profile view: shared lists for the profile's engines only
+        outputs = {k: [] for k in AFAP_OUTPUT_KEYS if k != "profile_used"}
+        outputs["quarantine"] = shared["quarantine"]
+        for engine in engines_to_run:
+            key = ENGINE_OUTPUT_KEYS[engine]
+            if engine == "cash_flow_indirect" and indirect_cash_flow is not None:
+                outputs[key] = indirect_cash_flow
+            elif key in shared:
+                outputs[key] = shared[key]
+
+        # Narrow the shared (union-scoped) ratios and trends to this profile
+        scope = scopes[name]
+        profile_ratios_df = ratios_df if "ratio" in engines_to_run else pd.DataFrame()
+        if scope != shared_scope:
+            outputs["ratios"] = project_ratio_records(outputs["ratios"], scope)
+            outputs["trend"] = project_trend_records(outputs["trend"], scope)
+            outputs["quarantine"] = project_quarantine_records(outputs["quarantine"], scope)
+            if not profile_ratios_df.empty:
+                profile_ratios_df = profile_ratios_df[["Company", "Year", *scope]]
+
+        outputs["composite_risk"] = run_composite(outputs, engines_to_run, analysis_config)
+
+        sink = _open_sink(
+            None if run_dir is None else os.path.join(run_dir, name),
+            name, run_format, resume
+        )
+        try:
+            _write_engine_stages(sink, outputs)
+            _write_severity_matrix(sink, outputs, engines_to_run, analysis_config)
+            structured_records = build_structured_records(profile_ratios_df, outputs, name, external_context, peer_index)
+            if scheduler is None:
+                outputs["ai_interpretation"] = interpret_records(
+                    structured_records, use_mock_ai, sink, stream_llm, on_section, llm_client, telemetry
+                )
+        except BaseException:
+            _close_interrupted(sink)
+            for _, opened in profile_records.values():
+                _close_interrupted(opened)
+            raise
+
+        profile_records[name] = (structured_records, sink)
+        results[name] = outputs
+
+    # One budget for every profile: interpretation waits until all
+    # profiles' records can be ranked together
+    if scheduler is not None:
+        interpretations = interpret_profile_records(
+            profile_records, use_mock_ai, stream_llm, on_section, llm_client, telemetry, scheduler
+        )
+        for name, outputs in results.items():
+            outputs["ai_interpretation"] = interpretations[name]
+
+    # Convert shared compact records once, then point every view at them
+    if compact_records:
+        from engines.records import records_to_dicts
+        converted = {key: records_to_dicts(shared[key]) for key in ("ratios", "trend", "cash_flow", "anomaly", "solvency")}
+        for outputs in results.values():
+            for key, records in converted.items():
+                if outputs[key] is shared[key]:
+                    outputs[key] = records
+                elif outputs[key]:
+                    outputs[key] = records_to_dicts(outputs[key])
+
+    for name, outputs in results.items():
+        finalize_outputs(outputs, name)
+        outputs["llm_telemetry"] = telemetry.summary(name)
+        if scheduler is not None:
+            outputs["llm_schedule"] = scheduler.report()
+
+    return results
@@ -0,0 +1,203 @@
+# storage/dataset_cache.py
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from engines import data_normalizer
+from engines.data_normalizer import NORMALIZED_ATTR, normalization_settings, normalize_financial_df
+
+# ------------------------------------------------------------------
+# Normalized Dataset Cache
+# ------------------------------------------------------------------
+# Source financials (CSV) are parsed and normalized once; the normalized
+# frame is kept on disk and memory-mapped on later loads. An entry's
+# fingerprint hashes the source file's bytes, the normalizer module's
+# source and the normalization settings, so editing either the file or
+# the normalizer logic misses the cache and rebuilds the entry.
+#
+#   <cache_dir>/<fingerprint>/manifest.json   columns, dtypes, categories
+#   <cache_dir>/<fingerprint>/<i>.npy         column i's values (numeric,
+#                                             bool, datetime) or codes
+#                                             (categorical / string)
+#
+# Frames loaded from the cache carry the normalizer's marker in .attrs,
+# so the engines use them as they are instead of normalizing again.
+# ------------------------------------------------------------------
+
+CACHE_FORMAT_VERSION = 1
+CACHE_MANIFEST = "manifest.json"
+DEFAULT_CACHE_DIRNAME = ".afap_cache"
+FINGERPRINT_ATTR = "afap_dataset_fingerprint"
+
+_HASH_CHUNK = 1 << 20
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def normalizer_version():
+    """
+    Hash of the normalizer module's source: any change to the
+    normalization logic gives new fingerprints.
+    """
+    return hashlib.sha256(inspect.getsource(data_normalizer).encode("utf-8")).hexdigest()
+
+
+def dataset_fingerprint(path, compact=True, float32_amounts=False, read_options=None):
+    payload = json.dumps({
+        "format": CACHE_FORMAT_VERSION,
+        "source": file_digest(path),
+        "normalizer": normalizer_version(),
+        "settings": normalization_settings(compact, float32_amounts),
+        "read_options": read_options or {}
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def load_financials(path, cache_dir=None, compact=True, float32_amounts=False, **read_options):
+    """
+    The normalized financials of a CSV file, from the cache when the
+    file and normalizer are unchanged (memory-mapped, read-only arrays),
+    else parsed, normalized and cached. read_options go to pd.read_csv.
+
+    cache_dir defaults to a .afap_cache directory next to the file.
+    Writing an entry removes older entries for the same source path.
+    """
+    path = Path(path)
+    cache_dir = Path(cache_dir) if cache_dir is not None else path.parent / DEFAULT_CACHE_DIRNAME
+    fingerprint = dataset_fingerprint(path, compact, float32_amounts, read_options)
+    entry = cache_dir / fingerprint
+
+    if (entry / CACHE_MANIFEST).exists():
+        return _read_entry(entry, fingerprint)
+
+    df = normalize_financial_df(pd.read_csv(path, **read_options), compact=compact, float32_amounts=float32_amounts)
+    _write_entry(cache_dir, fingerprint, df, path)
+    df.attrs[FINGERPRINT_ATTR] = fingerprint
+    return df
+
+
+def clear_dataset_cache(cache_dir):
+    """
+    Removes every entry in cache_dir. Returns how many were removed.
+    """
+    cache_dir = Path(cache_dir)
+    if not cache_dir.exists():
+        return 0
+    entries = [p for p in cache_dir.iterdir() if (p / CACHE_MANIFEST).exists()]
+    for entry in entries:
+        shutil.rmtree(entry, ignore_errors=True)
+    return len(entries)
+
+
+# ------------------------------------------------------------------
+# Entry Layout
+# ------------------------------------------------------------------
+
+def _column_kind(dtype):
+    if isinstance(dtype, pd.CategoricalDtype):
+        return "categorical"
+    if isinstance(dtype, np.dtype) and dtype.kind in "biufcmM":
+        return "array"
+    # Strings and anything else non-numeric are stored dictionary-encoded
+    return "encoded"
+
+
+def _json_value(value):
+    if hasattr(value, "item"):
+        return value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+def _write_entry(cache_dir, fingerprint, df, source_path):
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = cache_dir / f".{fingerprint}.{uuid.uuid4().hex[:8]}.tmp"
+    tmp.mkdir()
+
+    columns = []
+    for i, name in enumerate(df.columns):
+        series = df[name]
+        kind = _column_kind(series.dtype)
+        column = {"name": name, "kind": kind, "dtype": str(series.dtype)}
+
+        if kind == "array":
+            values = series.to_numpy()
+        else:
+            categorical = series.array if kind == "categorical" else pd.Categorical(series)
+            values = categorical.codes
+            column["categories"] = [_json_value(v) for v in categorical.categories.tolist()]
+            column["categories_dtype"] = str(categorical.categories.dtype)
+            column["ordered"] = bool(categorical.ordered)
+        np.save(tmp / f"{i}.npy", np.ascontiguousarray(values), allow_pickle=False)
+        columns.append(column)
+
+    manifest = {
+        "format": CACHE_FORMAT_VERSION,
+        "fingerprint": fingerprint,
+        "source": str(Path(source_path).resolve()),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "rows": len(df),
+        "attrs": df.attrs.get(NORMALIZED_ATTR),
+        "columns": columns
+    }
+    with open(tmp / CACHE_MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+    try:
+        os.replace(tmp, cache_dir / fingerprint)
+    except OSError:
+        # Another process cached the same fingerprint first
+        shutil.rmtree(tmp, ignore_errors=True)
+        return
+
+    _remove_stale_entries(cache_dir, fingerprint, manifest["source"])
+
+
+def _remove_stale_entries(cache_dir, fingerprint, source):
+    for entry in cache_dir.iterdir():
+        manifest_path = entry / CACHE_MANIFEST
+        if entry.name == fingerprint or not manifest_path.exists():
+            continue
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            if json.load(f).get("source") == source:
+                shutil.rmtree(entry, ignore_errors=True)
+
+
+def _read_entry(entry, fingerprint):
+    with open(entry / CACHE_MANIFEST, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    data = {}
+    for i, column in enumerate(manifest["columns"]):
+        values = np.load(entry / f"{i}.npy", mmap_mode="r", allow_pickle=False)
+        if column["kind"] == "array":
+            data[column["name"]] = values
+            continue
+
+        categories = pd.Index(column["categories"], dtype=column["categories_dtype"])
+        categorical = pd.Categorical.from_codes(values, categories=categories, ordered=column["ordered"])
+        data[column["name"]] = (
+            categorical if column["kind"] == "categorical"
+            else pd.Series(categorical).astype(column["dtype"]).to_numpy()
+        )
+
+    df = pd.DataFrame(data, copy=False)
+    df.attrs[NORMALIZED_ATTR] = manifest["attrs"]
+    df.attrs[FINGERPRINT_ATTR] = fingerprint
+    return df
@@ -0,0 +1,278 @@
+# storage/report_export.py
+
+import csv
+import math
+import os
+from pathlib import Path
+
+from afap_ai_engine.stream_parser import SECTION_NAMES
+
+# ------------------------------------------------------------------
+# Bulk Report Export
+# ------------------------------------------------------------------
+# Flattens engine and interpretation records into one fixed-schema
+# sheet per AFAP output key and writes them in row batches, so memory
+# is bounded by batch_size rather than by the size of the run:
+#
+#   csv      <path>/<sheet>.csv                 (path is a directory)
+#   xlsx     <path>, one worksheet per sheet    (openpyxl write-only)
+#   parquet  <path>/<sheet>.parquet             (pyarrow ParquetWriter,
+#                                                one row group per batch)
+#
+# Records can be fed from afap_run outputs, afap_iter bundles or a run
+# directory's streams (export_run_dir), one batch at a time.
+# ------------------------------------------------------------------
+
+SUPPORTED_EXPORT_FORMATS = ("csv", "xlsx", "parquet")
+
+SEVERITY_COLUMNS = [("severity", "TEXT"), ("explanation", "TEXT")]
+
+# Columns after Company / Year. Values are looked up on the record, then
+# its metrics, flags and (interpretations) sections; absent ones are empty.
+EXPORT_SHEETS = {
+    "ratios": [
+        (c, "REAL") for c in (
+            "current_ratio", "quick_ratio", "gross_margin", "operating_margin",
+            "net_margin", "debt_equity", "interest_coverage", "asset_turnover",
+            "roa", "roe"
+        )
+    ] + SEVERITY_COLUMNS,
+    "trend": [
+        ("ratio", "TEXT"), ("trend_value", "REAL"), ("from_year", "INTEGER"), ("to_year", "INTEGER"),
+        ("deteriorating_trend", "BOOLEAN"),
+        # TTM runs only (see engines.records.TTMTrendRow)
+        ("period_start", "TEXT"), ("period_end", "TEXT"), ("frequency", "TEXT")
+    ] + SEVERITY_COLUMNS,
+    # Operating-profit proxy and indirect-method engines share the sheet
+    "cash_flow": [
+        ("operating_profit", "REAL"), ("coverage_proxy", "REAL"),
+        ("negative_operating_profit", "BOOLEAN"), ("weak_coverage", "BOOLEAN"),
+        ("operating_cf", "REAL"), ("investing_cf", "REAL"), ("financing_cf", "REAL"),
+        ("net_income", "REAL"), ("working_capital_change", "REAL"),
+        ("cf_pattern", "TEXT"), ("cf_risk_flag", "TEXT"),
+        ("negative_operating_cf", "BOOLEAN"), ("financing_dependent", "BOOLEAN"),
+        ("negative_free_cash_flow", "BOOLEAN")
+    ] + SEVERITY_COLUMNS,
+    "anomaly": [("roa_yoy", "REAL"), ("roa_shock", "BOOLEAN")] + SEVERITY_COLUMNS,
+    "solvency": [
+        ("debt_equity", "REAL"), ("interest_coverage", "REAL"),
+        ("high_leverage", "BOOLEAN"), ("weak_coverage", "BOOLEAN")
+    ] + SEVERITY_COLUMNS,
+    "composite_risk": [("composite_score", "REAL"), ("risk_band", "TEXT")],
+    "ai_interpretation": [
+        ("analysis_profile", "TEXT"), ("temporal_mode", "TEXT"), ("skipped", "TEXT")
+    ] + [(name, "TEXT") for name in SECTION_NAMES] + [("interpretation", "TEXT")],
+    "quarantine": [("reason_codes", "TEXT"), ("reasons", "TEXT")]
+}
+
+KEY_COLUMNS = [("Company", "TEXT"), ("Year", "INTEGER")]
+
+# Rows per worksheet Excel can hold, header included
+XLSX_MAX_ROWS = 1_048_576
+
+
+def sheet_columns(sheet):
+    if sheet not in EXPORT_SHEETS:
+        raise ValueError(f"Unknown export sheet: {sheet}")
+    return KEY_COLUMNS + EXPORT_SHEETS[sheet]
+
+
+def _cell(value, col_type):
+    if isinstance(value, list):
+        value = ",".join(str(v) for v in value)
+    if hasattr(value, "item"):
+        value = value.item()
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if col_type == "REAL":
+        return float(value)
+    if col_type == "INTEGER":
+        return int(value)
+    if col_type == "BOOLEAN":
+        return bool(value)
+    return str(value)
+
+
+def flatten_record(record, columns):
+    """
+    One record (engine dict, compact record or interpretation) as a row
+    tuple aligned with columns.
+    """
+    if hasattr(record, "to_dict"):
+        record = record.to_dict()
+    nested = [record.get("metrics") or {}, record.get("flags") or {}, record.get("sections") or {}]
+
+    row = []
+    for name, col_type in columns:
+        value = record.get(name)
+        if value is None:
+            value = next((layer[name] for layer in nested if name in layer), None)
+        row.append(_cell(value, col_type))
+    return tuple(row)
+
+
+# ------------------------------------------------------------------
+# Exporter
+# ------------------------------------------------------------------
+
+class ReportExporter:
+    """
+    Streaming writer for fixed-schema report sheets.
+
+    write(sheet, records) flattens records into the sheet's buffer and
+    flushes it every batch_size rows; close() flushes the rest and
+    finalizes the files. Every sheet is created up front, so sheets
+    with no records still carry their header.
+    """
+
+    def __init__(self, path, fmt="xlsx", sheets=None, batch_size=1000):
+        if fmt not in SUPPORTED_EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive.")
+
+        self.path = Path(path)
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self.sheets = list(sheets) if sheets is not None else list(EXPORT_SHEETS)
+        self.columns = {sheet: sheet_columns(sheet) for sheet in self.sheets}
+        self.rows_written = {sheet: 0 for sheet in self.sheets}
+        self._buffers = {sheet: [] for sheet in self.sheets}
+        self._writers = {}
+        self._closed = False
+
+        if fmt == "xlsx":
+            from openpyxl import Workbook
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._workbook = Workbook(write_only=True)
+        else:
+            self.path.mkdir(parents=True, exist_ok=True)
+
+        for sheet in self.sheets:
+            self._open(sheet)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, sheet, records):
+        if sheet not in self._buffers:
+            raise ValueError(f"Sheet {sheet} is not being exported.")
+        columns = self.columns[sheet]
+        buffer = self._buffers[sheet]
+        for record in records:
+            buffer.append(flatten_record(record, columns))
+            if len(buffer) >= self.batch_size:
+                self._flush(sheet)
+
+    def write_outputs(self, outputs):
+        """
+        Writes every exported sheet present in an afap_run output dict
+        or an afap_iter bundle.
+        """
+        for sheet in self.sheets:
+            self.write(sheet, outputs.get(sheet) or [])
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for sheet in self.sheets:
+            self._flush(sheet)
+
+        if self.fmt == "xlsx":
+            tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+            self._workbook.save(tmp_path)
+            os.replace(tmp_path, self.path)
+        else:
+            for writer in self._writers.values():
+                writer.close()
+
+    # ------------------------------------------------------------------
+    # Format Backends
+    # ------------------------------------------------------------------
+
+    def _header(self, sheet):
+        return [name for name, _ in self.columns[sheet]]
+
+    def _open(self, sheet):
+        if self.fmt == "csv":
+            handle = open(self.path / f"{sheet}.csv", "w", newline="", encoding="utf-8")
+            csv.writer(handle).writerow(self._header(sheet))
+            self._writers[sheet] = handle
+        elif self.fmt == "xlsx":
+            self._writers[sheet] = [self._new_worksheet(sheet, 1)]
+        else:
+            import pyarrow.parquet as pq
+
+            self._writers[sheet] = pq.ParquetWriter(self.path / f"{sheet}.parquet", _arrow_schema(self.columns[sheet]))
+
+    def _new_worksheet(self, sheet, part):
+        worksheet = self._workbook.create_sheet(sheet if part == 1 else f"{sheet} ({part})")
+        worksheet.append(self._header(sheet))
+        return worksheet
+
+    def _flush(self, sheet):
+        rows = self._buffers[sheet]
+        if not rows:
+            return
+
+        if self.fmt == "csv":
+            csv.writer(self._writers[sheet]).writerows(rows)
+        elif self.fmt == "xlsx":
+            # A sheet that outgrows Excel's row limit continues in "<sheet> (2)", ...
+            worksheets = self._writers[sheet]
+            per_sheet = XLSX_MAX_ROWS - 1
+            for i, row in enumerate(rows, start=self.rows_written[sheet]):
+                part = i // per_sheet + 1
+                if part > len(worksheets):
+                    worksheets.append(self._new_worksheet(sheet, part))
+                worksheets[-1].append(row)
+        else:
+            import pyarrow as pa
+
+            names = self._header(sheet)
+            batch = pa.Table.from_pydict(
+                {name: list(values) for name, values in zip(names, zip(*rows))},
+                schema=self._writers[sheet].schema
+            )
+            self._writers[sheet].write_table(batch)
+
+        self.rows_written[sheet] += len(rows)
+        rows.clear()
+
+
+def _arrow_schema(columns):
+    import pyarrow as pa
+
+    types = {"TEXT": pa.string(), "REAL": pa.float64(), "INTEGER": pa.int64(), "BOOLEAN": pa.bool_()}
+    return pa.schema([(name, types[col_type]) for name, col_type in columns])
+
+
+# ------------------------------------------------------------------
+# Entry Points
+# ------------------------------------------------------------------
+
+def export_outputs(outputs, path, fmt="xlsx", sheets=None, batch_size=1000):
+    """
+    Exports an afap_run output dict. Returns rows written per sheet.
+    """
+    with ReportExporter(path, fmt, sheets, batch_size) as exporter:
+        exporter.write_outputs(outputs)
+    return exporter.rows_written
+
+
+def export_run_dir(run_dir, path, fmt="xlsx", run_format="jsonl", sheets=None, batch_size=1000):
+    """
+    Exports a run directory (see storage.run_sink) straight from its
+    streams, one record at a time. Returns rows written per sheet.
+    """
+    from storage.run_sink import read_stream
+
+    with ReportExporter(path, fmt, sheets, batch_size) as exporter:
+        for sheet in exporter.sheets:
+            exporter.write(sheet, read_stream(run_dir, sheet, run_format))
+    return exporter.rows_written
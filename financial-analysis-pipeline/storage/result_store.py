@@ -0,0 +1,225 @@
+# storage/result_store.py
+
+import json
+import math
+import sqlite3
+import uuid
+from contextlib import closing
+from datetime import datetime
+
+import pandas as pd
+
+from storage.run_sink import json_default
+
+# ------------------------------------------------------------------
+# Local Result Store (SQLite, no external service)
+# ------------------------------------------------------------------
+# One table per AFAP output key. Every table carries run_id / Company /
+# Year, the engine's queryable fields as real columns, and the full
+# record as JSON so rows can be reconstructed losslessly.
+# ------------------------------------------------------------------
+
+RATIO_COLUMNS = [
+    "current_ratio", "quick_ratio", "gross_margin", "operating_margin",
+    "net_margin", "debt_equity", "interest_coverage", "asset_turnover",
+    "roa", "roe"
+]
+
+ENGINE_TABLES = {
+    "ratios": [(c, "REAL") for c in RATIO_COLUMNS],
+    "trend": [("ratio", "TEXT"), ("trend_value", "REAL"), ("from_year", "INTEGER"), ("to_year", "INTEGER"), ("severity", "TEXT")],
+    "cash_flow": [("operating_profit", "REAL"), ("coverage_proxy", "REAL"), ("severity", "TEXT")],
+    "anomaly": [("roa_yoy", "REAL"), ("severity", "TEXT")],
+    "solvency": [("debt_equity", "REAL"), ("interest_coverage", "REAL"), ("severity", "TEXT")],
+    "composite_risk": [("composite_score", "REAL"), ("risk_band", "TEXT")],
+    "ai_interpretation": [("analysis_profile", "TEXT"), ("temporal_mode", "TEXT"), ("interpretation", "TEXT")],
+    "quarantine": [("reason_codes", "TEXT")]
+}
+
+INDEXED_COLUMNS = ("severity", "risk_band")
+
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    _create_schema(conn)
+    return conn
+
+
+def _create_schema(conn):
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS runs ("
+        "run_id TEXT PRIMARY KEY, analysis_profile TEXT, created_at TEXT, seq INTEGER)"
+    )
+
+    for table, columns in ENGINE_TABLES.items():
+        column_sql = ", ".join(f'"{name}" {sql_type}' for name, sql_type in columns)
+        conn.execute(
+            f'CREATE TABLE IF NOT EXISTS "{table}" ('
+            f'run_id TEXT NOT NULL, "Company" TEXT NOT NULL, "Year" INTEGER NOT NULL, '
+            f'{column_sql}, record TEXT)'
+        )
+        conn.execute(f'CREATE INDEX IF NOT EXISTS "ix_{table}_run" ON "{table}" (run_id)')
+        conn.execute(f'CREATE INDEX IF NOT EXISTS "ix_{table}_company_year" ON "{table}" ("Company", "Year")')
+        for name, _ in columns:
+            if name in INDEXED_COLUMNS:
+                conn.execute(f'CREATE INDEX IF NOT EXISTS "ix_{table}_{name}" ON "{table}" ("{name}")')
+
+    conn.commit()
+
+
+# ------------------------------------------------------------------
+# Ingestion
+# ------------------------------------------------------------------
+
+def _sql_value(value):
+    if isinstance(value, list):
+        return ",".join(str(v) for v in value)
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def _row_values(record, columns):
+    metrics = record.get("metrics", {})
+    values = []
+    for name, _ in columns:
+        value = record[name] if name in record.keys() else metrics.get(name)
+        values.append(_sql_value(value))
+    return values
+
+
+def persist_run(outputs, db_path, run_id=None, batch_size=5000):
+    """
+    Bulk-inserts an afap_run output dict in a single transaction.
+    Returns the run_id.
+    """
+    run_id = run_id or f"{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+    with closing(connect(db_path)) as conn:
+        with conn:
+            seq = conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM runs").fetchone()[0]
+            conn.execute(
+                "INSERT INTO runs (run_id, analysis_profile, created_at, seq) VALUES (?, ?, ?, ?)",
+                (run_id, outputs.get("profile_used"), datetime.now().isoformat(timespec="seconds"), seq)
+            )
+
+            for table, columns in ENGINE_TABLES.items():
+                placeholders = ", ".join("?" * (len(columns) + 4))
+                sql = f'INSERT INTO "{table}" VALUES ({placeholders})'
+
+                batch = []
+                for record in outputs.get(table, []):
+                    batch.append((
+                        run_id,
+                        str(record["Company"]),
+                        int(record["Year"]),
+                        *_row_values(record, columns),
+                        json.dumps(record, default=json_default)
+                    ))
+                    if len(batch) >= batch_size:
+                        conn.executemany(sql, batch)
+                        batch = []
+                if batch:
+                    conn.executemany(sql, batch)
+
+    return run_id
+
+
+# ------------------------------------------------------------------
+# Query API
+# ------------------------------------------------------------------
+
+def _in_clause(column, values, params):
+    params.extend(values)
+    return f'{column} IN ({", ".join("?" * len(values))})'
+
+
+def _run_filter(run_ids, last_runs, params, column="run_id"):
+    clauses = []
+    if run_ids:
+        clauses.append(_in_clause(column, list(run_ids), params))
+    if last_runs:
+        params.append(int(last_runs))
+        clauses.append(f"{column} IN (SELECT run_id FROM runs ORDER BY seq DESC LIMIT ?)")
+    return clauses
+
+
+def query_results(
+    db_path,
+    engine,
+    companies=None,
+    years=None,
+    run_ids=None,
+    last_runs=None,
+    severity=None,
+    risk_band=None,
+    include_record=False
+):
+    """
+    Returns rows of one engine table as a DataFrame, filtered on any of
+    Company, Year, run id (explicit or the last N runs), severity and
+    risk band.
+    """
+    if engine not in ENGINE_TABLES:
+        raise ValueError(f"Unknown engine table: {engine}")
+
+    column_names = [name for name, _ in ENGINE_TABLES[engine]]
+    params = []
+    clauses = _run_filter(run_ids, last_runs, params)
+
+    if companies:
+        clauses.append(_in_clause('"Company"', list(companies), params))
+    if years:
+        clauses.append(_in_clause('"Year"', [int(y) for y in years], params))
+    if severity is not None:
+        if "severity" not in column_names:
+            raise ValueError(f"{engine} has no severity column.")
+        clauses.append(_in_clause("severity", [severity] if isinstance(severity, str) else list(severity), params))
+    if risk_band is not None:
+        if "risk_band" not in column_names:
+            raise ValueError(f"{engine} has no risk_band column.")
+        clauses.append(_in_clause("risk_band", [risk_band] if isinstance(risk_band, str) else list(risk_band), params))
+
+    selected = ["run_id", '"Company"', '"Year"'] + [f'"{c}"' for c in column_names]
+    if include_record:
+        selected.append("record")
+
+    sql = f'SELECT {", ".join(selected)} FROM "{engine}"'
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += ' ORDER BY run_id, "Company", "Year"'
+
+    with closing(connect(db_path)) as conn:
+        return pd.read_sql_query(sql, conn, params=params)
+
+
+def query_risk_company_years(db_path, solvency_severity="action", risk_band="high", last_runs=None, run_ids=None):
+    """
+    Company-years whose solvency severity and composite risk band match,
+    within the same run, e.g. severity 'action' + band 'high' in the
+    last 5 runs.
+    """
+    params = [solvency_severity, risk_band]
+    clauses = ["s.severity = ?", "c.risk_band = ?"]
+    clauses += _run_filter(run_ids, last_runs, params, column="s.run_id")
+
+    sql = (
+        'SELECT s.run_id, s."Company", s."Year", s.severity AS solvency_severity, '
+        's.debt_equity, s.interest_coverage, c.composite_score, c.risk_band '
+        'FROM solvency s JOIN composite_risk c '
+        'ON c.run_id = s.run_id AND c."Company" = s."Company" AND c."Year" = s."Year" '
+        f'WHERE {" AND ".join(clauses)} '
+        'ORDER BY s.run_id, s."Company", s."Year"'
+    )
+
+    with closing(connect(db_path)) as conn:
+        return pd.read_sql_query(sql, conn, params=params)
+
+
+def list_runs(db_path):
+    with closing(connect(db_path)) as conn:
+        return pd.read_sql_query("SELECT run_id, analysis_profile, created_at FROM runs ORDER BY seq", conn)
@@ -0,0 +1,329 @@
+# storage/run_sink.py
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+# ------------------------------------------------------------------
+# Run Directory Layout
+# ------------------------------------------------------------------
+#   <run_dir>/manifest.json              checkpoint manifest
+#   <run_dir>/<stream>.jsonl             one record per line (jsonl)
+#   <run_dir>/<stream>/part-00000.parquet  one part per flushed batch (parquet)
+#   <run_dir>/severity_matrix.npz        composite risk inputs (composite_risk_engine.SeverityMatrix)
+#
+# Streams are the AFAP output keys ("ratios", "trend", ...,
+# "ai_interpretation", plus "ai_sections" when interpretations are
+# streamed section by section). Streams are append-only: a record that made it
+# to disk is complete, so resume state is read back from the streams
+# themselves and the manifest only tracks stage completion.
+# ------------------------------------------------------------------
+
+RUN_MANIFEST = "manifest.json"
+SUPPORTED_FORMATS = ("jsonl", "parquet")
+INTERPRETATION_STREAM = "ai_interpretation"
+SECTION_STREAM = "ai_sections"
+
+
+def json_default(value):
+    """
+    Converts numpy scalars, compact engine records (and anything else
+    non-native) for json.dumps.
+    """
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def _dumps(record):
+    return json.dumps(record, default=json_default)
+
+
+class RunSink:
+    """
+    Append-only writer for a single AFAP run directory.
+
+    Engine outputs are written once per stage, AI interpretations are
+    appended one at a time as they are produced, and the manifest is
+    rewritten atomically at every checkpoint.
+    """
+
+    def __init__(self, run_dir, analysis_profile, fmt="jsonl", resume=False, checkpoint_every=25):
+        if fmt not in SUPPORTED_FORMATS:
+            raise ValueError(f"Unsupported run format: {fmt}")
+
+        self.run_dir = Path(run_dir)
+        self.fmt = fmt
+        self.checkpoint_every = checkpoint_every
+        self._since_checkpoint = 0
+        self._handles = {}
+        self.closed = False
+
+        # parquet: appended records are buffered per stream and written as
+        # one part per batch (at every checkpoint, or checkpoint_every records)
+        self._parquet_buffers = {}
+        self._part_index = {}
+
+        existing = load_manifest(self.run_dir)
+
+        if existing and not resume:
+            raise ValueError(
+                f"Run directory already contains a run: {self.run_dir}. "
+                "Pass resume=True to continue it."
+            )
+
+        if existing:
+            if existing["analysis_profile"] != analysis_profile:
+                raise ValueError(
+                    f"Cannot resume run for profile '{existing['analysis_profile']}' "
+                    f"as '{analysis_profile}'."
+                )
+            if existing["format"] != fmt:
+                raise ValueError(
+                    f"Cannot resume {existing['format']} run as {fmt}."
+                )
+            self.manifest = existing
+            self.manifest["status"] = "running"
+        else:
+            self.run_dir.mkdir(parents=True, exist_ok=True)
+            now = datetime.now().isoformat(timespec="seconds")
+            self.manifest = {
+                "run_id": self.run_dir.name,
+                "analysis_profile": analysis_profile,
+                "format": fmt,
+                "status": "running",
+                "created_at": now,
+                "updated_at": now,
+                "stages_completed": [],
+                "record_counts": {}
+            }
+
+        self.checkpoint()
+
+    # ------------------------------------------------------------------
+    # Stage Streams
+    # ------------------------------------------------------------------
+
+    def stage_completed(self, stream):
+        return stream in self.manifest["stages_completed"]
+
+    def write_stage(self, stream, records):
+        """
+        Writes a full engine output and marks the stage complete.
+        Completed stages are left untouched on resume.
+        """
+        if self.stage_completed(stream):
+            return
+
+        # A stage that crashed mid-write is rewritten from scratch
+        _remove_stream(self.run_dir, stream, self.fmt)
+        self._part_index.pop(stream, None)
+        self._write(stream, records)
+        self._flush_parquet(stream)
+
+        self.manifest["stages_completed"].append(stream)
+        self.manifest["record_counts"][stream] = len(records)
+        self.checkpoint()
+
+    # ------------------------------------------------------------------
+    # Interpretation Stream
+    # ------------------------------------------------------------------
+
+    def completed_interpretations(self):
+        """
+        Returns interpretations already on disk, keyed by (Company, Year).
+        """
+        return {
+            (r["Company"], r["Year"]): r
+            for r in read_stream(self.run_dir, INTERPRETATION_STREAM, self.fmt)
+        }
+
+    def append_interpretation(self, record):
+        self._write(INTERPRETATION_STREAM, [record])
+
+        counts = self.manifest["record_counts"]
+        counts[INTERPRETATION_STREAM] = counts.get(INTERPRETATION_STREAM, 0) + 1
+
+        self._since_checkpoint += 1
+        if self._since_checkpoint >= self.checkpoint_every:
+            self.checkpoint()
+
+    def append_section(self, record):
+        """
+        Appends one completed interpretation section as soon as it is
+        parsed, ahead of its full interpretation record.
+        """
+        self._write(SECTION_STREAM, [record])
+
+        counts = self.manifest["record_counts"]
+        counts[SECTION_STREAM] = counts.get(SECTION_STREAM, 0) + 1
+
+    # ------------------------------------------------------------------
+    # Manifest
+    # ------------------------------------------------------------------
+
+    def checkpoint(self):
+        # Buffered parquet records reach disk before the manifest counts them
+        for stream in list(self._parquet_buffers):
+            self._flush_parquet(stream)
+
+        self._since_checkpoint = 0
+        self.manifest["updated_at"] = datetime.now().isoformat(timespec="seconds")
+
+        tmp_path = self.run_dir / (RUN_MANIFEST + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.run_dir / RUN_MANIFEST)
+
+    def close(self, complete=True, stop_reason=None):
+        """
+        Closes the streams and records how the run ended: "complete", or
+        with complete=False "interrupted" (crash, cancellation) or
+        "partial" when the interpretation stage stopped on stop_reason
+        (a token / deadline budget). Unfinished runs list the stages
+        still to do under "incomplete_stages"; resume picks them up.
+        """
+        for handle in self._handles.values():
+            handle.close()
+        self._handles = {}
+        self.closed = True
+
+        if complete:
+            if not self.stage_completed(INTERPRETATION_STREAM):
+                self.manifest["stages_completed"].append(INTERPRETATION_STREAM)
+            self.manifest["status"] = "complete"
+            self.manifest.pop("incomplete_stages", None)
+            self.manifest.pop("stop_reason", None)
+        else:
+            self.manifest["status"] = "partial" if stop_reason is not None else "interrupted"
+            self.manifest["incomplete_stages"] = [INTERPRETATION_STREAM]
+            self.manifest["stop_reason"] = stop_reason
+        self.checkpoint()
+
+    # ------------------------------------------------------------------
+    # Format Writers
+    # ------------------------------------------------------------------
+
+    def _write(self, stream, records):
+        if not records:
+            return
+
+        if self.fmt == "jsonl":
+            handle = self._handles.get(stream)
+            if handle is None:
+                path = self.run_dir / f"{stream}.jsonl"
+                _truncate_partial_line(path)
+                handle = open(path, "a", encoding="utf-8")
+                self._handles[stream] = handle
+
+            handle.write("".join(_dumps(r) + "\n" for r in records))
+            handle.flush()
+            os.fsync(handle.fileno())
+        else:
+            buffer = self._parquet_buffers.setdefault(stream, [])
+            buffer.extend(records)
+            if len(buffer) >= self.checkpoint_every:
+                self._flush_parquet(stream)
+
+    def _flush_parquet(self, stream):
+        records = self._parquet_buffers.pop(stream, None)
+        if not records:
+            return
+
+        part_dir = self.run_dir / stream
+        if stream not in self._part_index:
+            # Parts already on disk (resumed run) are counted once per stream
+            self._part_index[stream] = len(list(part_dir.glob("part-*.parquet"))) if part_dir.exists() else 0
+        _write_parquet_part(part_dir, records, self._part_index[stream])
+        self._part_index[stream] += 1
+
+
+# ------------------------------------------------------------------
+# Readers
+# ------------------------------------------------------------------
+
+def load_manifest(run_dir):
+    path = Path(run_dir) / RUN_MANIFEST
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_stream(run_dir, stream, fmt="jsonl"):
+    """
+    Lazily yields the records of one stream in write order.
+    """
+    run_dir = Path(run_dir)
+
+    if fmt == "jsonl":
+        path = run_dir / f"{stream}.jsonl"
+        if not path.exists():
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                # A crash can leave a partial trailing line behind
+                if not line.endswith("\n"):
+                    break
+                yield json.loads(line)
+    else:
+        import pandas as pd
+
+        part_dir = run_dir / stream
+        if not part_dir.exists():
+            return
+        for part in sorted(part_dir.glob("part-*.parquet")):
+            for record in pd.read_parquet(part).to_dict("records"):
+                yield {
+                    k: json.loads(v) if k in record.get("_json_fields", "").split(",") else v
+                    for k, v in record.items() if k != "_json_fields"
+                }
+
+
+# ------------------------------------------------------------------
+# Internal Helpers
+# ------------------------------------------------------------------
+
+def _truncate_partial_line(path):
+    if not path.exists():
+        return
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+def _remove_stream(run_dir, stream, fmt):
+    if fmt == "jsonl":
+        path = run_dir / f"{stream}.jsonl"
+        if path.exists():
+            path.unlink()
+    else:
+        part_dir = run_dir / stream
+        if part_dir.exists():
+            for part in part_dir.glob("part-*.parquet"):
+                part.unlink()
+
+
+def _write_parquet_part(part_dir, records, part_index):
+    import pandas as pd
+
+    part_dir.mkdir(parents=True, exist_ok=True)
+
+    # Nested payloads (metrics, flags, context) are stored as JSON text
+    rows = []
+    for record in records:
+        json_fields = [k for k, v in record.items() if isinstance(v, (dict, list))]
+        row = {
+            k: _dumps(v) if k in json_fields else v
+            for k, v in record.items()
+        }
+        row["_json_fields"] = ",".join(json_fields)
+        rows.append(row)
+
+    tmp_path = part_dir / f".part-{part_index:05d}.parquet.tmp"
+    pd.DataFrame(rows).to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, part_dir / f"part-{part_index:05d}.parquet")